@@ -1,6 +1,6 @@
 {
     'name': 'KES Inspections',
-    'version': '1.0',
+    'version': '1.1',
     'summary': 'Gestion des inspections techniques KES',
     'description': """
         Module de gestion complète des inspections techniques
@@ -16,10 +16,14 @@
     'depends': ['base', 'sale', 'mail', 'sale_management', 'hr'],
     'data': [
         'security/ir.model.access.csv',
+        'security/kes_inspections_security.xml',
 
         'data/sequences.xml',
         'data/inspecteur_data.xml',
         'data/label_templates.xml', 
+        'data/ir_config_parameter_data.xml',
+        'data/mail_activity_data.xml',
+        'data/ir_cron_data.xml',
         
         'views/inspection_affaire_views.xml',
         'views/sous_affaire_views.xml',
@@ -30,6 +34,11 @@
         'views/rapport_affaire_views.xml',
         'views/sale_order_views.xml',
         'views/menus.xml',
+        'views/rapport_import_views.xml',
+        'views/label_sheet_views.xml',
+        'views/label_printer_views.xml',
+
+        'report/kpi_report_views.xml',
         
     ],
     'images': [
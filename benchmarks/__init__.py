@@ -0,0 +1,19 @@
+# benchmarks/__init__.py
+"""Mesures de performance de la chaîne d'étiquettes.
+
+* ``pipeline`` : rendu pur (paquet ``rendering``), sans base de données,
+  étape par étape, sur les modèles livrés dans ``static/description/templates`` ;
+* ``dataset`` : jeu de données synthétique reproductible (graine) pour les
+  tests de charge, jusqu'au million d'étiquettes ;
+* ``startup`` : temps d'import du module dans un processus Odoo et
+  bibliothèques lourdes chargées à l'import.
+
+Chaque mesure est comparée à une référence enregistrée (``baselines.json``) ;
+un dépassement du seuil est signalé comme régression, une référence absente
+fait échouer la vérification. Les parcours Odoo complets (génération, export
+ZIP) sont mesurés par ``tests/test_benchmark_flows.py``
+(``--test-tags benchmark``), avec les mêmes références ; les budgets de
+requêtes SQL (un N+1 fait échouer la suite) par ``tests/test_query_budgets.py``.
+
+Ce paquet n'est pas importé par le module : il n'est jamais chargé en production.
+"""
@@ -0,0 +1,81 @@
+# benchmarks/common.py
+"""Rapport des mesures et comparaison aux références enregistrées."""
+import json
+import os
+import statistics
+import time
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+# Au-delà de référence × seuil, la mesure est une régression
+DEFAULT_THRESHOLD = 1.25
+
+
+def median_of(runs):
+    """Médiane étape par étape de plusieurs exécutions (listes de dicts)"""
+    keys = runs[0].keys()
+    return {key: statistics.median(run[key] for run in runs) for key in keys}
+
+
+def measure(env, func):
+    """(résultat, durée, requêtes SQL) de ``func()``, cache ORM vidé"""
+    env.flush_all()
+    env.invalidate_all()
+    queries = env.cr.sql_log_count
+    start = time.perf_counter()
+    result = func()
+    env.flush_all()
+    return result, time.perf_counter() - start, env.cr.sql_log_count - queries
+
+
+def load_baselines(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baselines(results, path=BASELINE_PATH):
+    """Enregistre ``results`` ({scénario: {métrique: valeur}}) comme références"""
+    baselines = load_baselines(path)
+    baselines.update(results)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def missing_baselines(results, baselines):
+    """Scénarios mesurés sans référence : ils ne peuvent pas être comparés"""
+    return sorted(scenario for scenario in results if scenario not in baselines)
+
+
+def check_regressions(results, baselines, threshold=DEFAULT_THRESHOLD):
+    """Liste des régressions : (scénario, métrique, référence, mesure)
+
+    Les nombres de requêtes (métriques ``queries``) sont déterministes : toute
+    hausse compte. Les durées tolèrent le seuil.
+    """
+    regressions = []
+    for scenario, metrics in results.items():
+        reference = baselines.get(scenario, {})
+        for metric, value in metrics.items():
+            if metric not in reference:
+                continue
+            limit = reference[metric] if metric == 'queries' else reference[metric] * threshold
+            if value > limit:
+                regressions.append((scenario, metric, reference[metric], value))
+    return regressions
+
+
+def print_report(results, baselines):
+    for scenario in sorted(results):
+        print(scenario)
+        reference = baselines.get(scenario, {})
+        for metric, value in results[scenario].items():
+            if metric == 'queries' or metric.endswith('_bytes'):
+                line = f"  {metric:<14} {value:>12}"
+            else:
+                line = f"  {metric:<14} {value * 1000:>10.1f} ms"
+            if metric in reference and reference[metric]:
+                line += f"   ({value / reference[metric]:.2f}× réf.)"
+            print(line)
@@ -0,0 +1,313 @@
+# benchmarks/dataset.py
+"""Jeu de données synthétique pour les tests de charge.
+
+Dans ``odoo-bin shell -d <base_de_test>`` ::
+
+    from odoo.addons.kes_inspections.benchmarks import dataset
+    dataset.generate(env, seed=42)                                   # ~10 000 étiquettes
+    dataset.generate(env, clients=1000, equipements_per_affaire=100,
+                     commit=True)                                     # ~1 000 000 étiquettes
+
+Les enregistrements « métier » peu nombreux (clients, inspecteurs, commandes,
+affaires, sous-affaires) passent par l'ORM pour respecter numérotation et
+valeurs calculées. Les gros volumes (équipements, étiquettes, rapports et
+leurs pièces jointes) sont insérés en SQL brut par paquets, avec les champs
+calculés stockés renseignés directement.
+
+Le contenu est entièrement déterminé par ``seed`` : deux générations avec la
+même graine et les mêmes volumes produisent les mêmes données (hors ids).
+Les QR Codes des étiquettes ne sont pas générés (champ vide) ; les rapports
+partagent un même petit PDF dans le filestore.
+
+À n'utiliser que sur une base de test.
+"""
+import hashlib
+import logging
+import random
+import string
+import time
+from datetime import date, timedelta
+from itertools import islice
+
+from psycopg2.extras import execute_values
+
+_logger = logging.getLogger(__name__)
+
+# Plus petit PDF valide : contenu commun à tous les rapports générés
+STUB_PDF = (
+    b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+    b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 595 842]>>endobj\n"
+    b"trailer<</Root 1 0 R>>\n%%EOF\n"
+)
+
+EQUIPEMENT_TYPES = (
+    'inspection_electrique', 'inspection_thermographie', 'identification_local', 'ascenseur',
+    'verification_periodique', 'verification_extincteur', 'arc_flash', 'plaque_identification',
+)
+
+# Contexte de création en masse : ni suivi, ni abonnés, ni messages de création
+MASS_CONTEXT = {
+    'tracking_disable': True,
+    'mail_create_nolog': True,
+    'mail_create_nosubscribe': True,
+    'mail_notrack': True,
+}
+
+
+def _insert_batches(cr, table, columns, rows, batch_size):
+    """INSERT multi-lignes par paquets de ``rows`` (itérable de (ligne, donnée)).
+
+    Génère, paquet par paquet, les couples (id inséré, donnée) : les lignes ne
+    sont jamais toutes en mémoire.
+    """
+    query = f'INSERT INTO "{table}" ({", ".join(columns)}) VALUES %s RETURNING id'
+    rows = iter(rows)
+    while batch := list(islice(rows, batch_size)):
+        ids = execute_values(cr._obj, query, [row for row, _data in batch], page_size=batch_size, fetch=True)
+        yield from ((row_id, data) for (row_id,), (_row, data) in zip(ids, batch))
+
+
+def _insert(cr, table, columns, rows, batch_size):
+    """INSERT multi-lignes par paquets ; retourne les ids dans l'ordre des lignes"""
+    return [row_id for row_id, _data in _insert_batches(cr, table, columns, ((row, None) for row in rows), batch_size)]
+
+
+class _Generator:
+
+    def __init__(self, env, seed, batch_size, commit):
+        self.env = env.with_context(**MASS_CONTEXT)
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.batch_size = batch_size
+        self.commit = commit
+        self.today = date.today()
+        # Colonnes d'audit communes aux insertions brutes
+        self.audit = (env.uid, env.cr.now(), env.uid, env.cr.now())
+
+    def _phase_done(self, label, count, start):
+        _logger.info("Jeu de données : %s %s en %.1f s", count, label, time.perf_counter() - start)
+        self.env.invalidate_all()
+        if self.commit:
+            self.env.cr.commit()
+
+    def _code(self, length=4):
+        return ''.join(self.rng.choice(string.ascii_uppercase + string.digits) for _ in range(length))
+
+    def clients(self, count):
+        start = time.perf_counter()
+        partners = self.env['res.partner'].create([{
+            'name': f"Client {self.seed}-{i:05d}",
+            'is_company': True,
+            'city': self.rng.choice(('Douala', 'Yaoundé', 'Kribi', 'Limbé', 'Garoua')),
+        } for i in range(count)])
+        self._phase_done('clients', count, start)
+        return partners
+
+    def inspecteurs(self, count):
+        start = time.perf_counter()
+        department = self.env['hr.department'].search([('name', '=', 'INSPECTION')], limit=1)
+        if not department:
+            department = self.env['hr.department'].create({'name': 'INSPECTION'})
+        employees = self.env['hr.employee'].create([{
+            'name': f"Inspecteur {self.seed}-{i:03d}",
+            'department_id': department.id,
+        } for i in range(count)])
+        self.env['kes_inspections.inspecteur'].create([{'employee_id': employee.id} for employee in employees])
+        self._phase_done('inspecteurs', count, start)
+        return employees
+
+    def products(self):
+        category = self.env['product.category'].create({'name': f"Inspection {self.seed}"})
+        return category, self.env['product.product'].create([{
+            'name': f"Inspection {type_equipement.replace('_', ' ')}",
+            'categ_id': category.id,
+            'type': 'service',
+            'default_code': type_equipement[:3].upper(),
+        } for type_equipement in EQUIPEMENT_TYPES])
+
+    def affaires(self, partners, employees, orders_per_client):
+        """Commandes confirmées et leurs affaires"""
+        start = time.perf_counter()
+        category, products = self.products()
+        orders = self.env['sale.order'].create([{
+            'partner_id': partner.id,
+            'department_id': category.id,
+            'order_line': [(0, 0, {
+                'product_id': self.rng.choice(products).id,
+                'product_uom_qty': self.rng.randint(1, 20),
+            })],
+        } for partner in partners for _ in range(orders_per_client)])
+        # Confirmation sans le flux complet (stock, factures, mails) : seul l'état compte ici
+        self.env.cr.execute("UPDATE sale_order SET state = 'sale' WHERE id IN %s", (tuple(orders.ids),))
+        self.env.invalidate_all()
+        states = ('draft', 'in_progress', 'in_progress', 'done')
+        affaires = self.env['kes_inspections.affaire']
+        for order in orders:
+            debut = self.today - timedelta(days=self.rng.randint(0, 720))
+            affaires |= affaires.create({
+                'sale_order_id': order.id,
+                'client_id': order.partner_id.id,
+                'charge_affaire_id': self.rng.choice(employees).id,
+                'site_intervention': order.partner_id.city,
+                'lieu_intervention': f"Bâtiment {self.rng.choice('ABCDEF')}",
+                'date_debut_intervention': debut,
+                'date_fin_intervention': debut + timedelta(days=self.rng.randint(1, 10)),
+                'state': self.rng.choice(states),
+            })
+        self._phase_done('affaires', len(affaires), start)
+        return affaires, products
+
+    def sous_affaires(self, affaires, per_affaire):
+        start = time.perf_counter()
+        sous_affaires = self.env['kes_inspections.sous_affaire'].create([
+            {'affaire_id': affaire.id, 'description': f"Lot {i + 1}"}
+            for affaire in affaires for i in range(per_affaire)
+        ])
+        self._phase_done('sous-affaires', len(sous_affaires), start)
+        return sous_affaires
+
+    def equipements(self, affaires, per_affaire):
+        """Équipements en SQL brut ; retourne [(id, affaire, type, code)]"""
+        from ..models.equipement import InspectionEquipement
+        start = time.perf_counter()
+        rows, meta = [], []
+        for affaire in affaires:
+            counters = {}
+            for i in range(per_affaire):
+                type_equipement = self.rng.choice(EQUIPEMENT_TYPES)
+                counters[type_equipement] = counters.get(type_equipement, 0) + 1
+                prefix = InspectionEquipement._CODE_PREFIXES.get(type_equipement, 'EQU')
+                code = f"{affaire.name}/{prefix}{str(counters[type_equipement]).zfill(3)}"
+                rows.append((f"Équipement {i + 1:03d}", 10, affaire.id, type_equipement, code,
+                             0, False, 'a_inspecter') + self.audit)
+                meta.append((affaire, type_equipement, code))
+        ids = _insert(self.env.cr, 'kes_inspections_equipement', (
+            'name', 'sequence', 'affaire_id', 'type_equipement', 'code_equipement',
+            'nombre_etiquettes', 'etiquettes_generes', 'state',
+            'create_uid', 'create_date', 'write_uid', 'write_date',
+        ), rows, self.batch_size)
+        self._phase_done('équipements', len(ids), start)
+        return [(equipement_id,) + item for equipement_id, item in zip(ids, meta)]
+
+    def etiquettes(self, equipements, sous_affaires, per_equipement, rapport_ratio):
+        """Étiquettes en SQL brut.
+
+        Retourne leur nombre et, pour une part ``rapport_ratio`` d'entre elles,
+        les [(id, equipement_id, sous_affaire_id, affaire_id)] qui recevront un rapport.
+        """
+        from ..models.etiquette import InspectionEtiquette
+        start = time.perf_counter()
+        templates = {
+            type_equipement: self.env.ref(f'kes_inspections.{xml_id}', raise_if_not_found=False)
+            for type_equipement, xml_id in InspectionEtiquette._MAPPING_EQUIPEMENT_TEMPLATE.items()
+        }
+        sous_affaires_by_affaire = {}
+        for sous_affaire in sous_affaires:
+            sous_affaires_by_affaire.setdefault(sous_affaire.affaire_id.id, []).append(sous_affaire.id)
+        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
+
+        def rows():
+            for equipement_id, affaire, type_equipement, code_equipement in equipements:
+                choices = sous_affaires_by_affaire[affaire.id]
+                template = templates.get(type_equipement)
+                client_id = affaire.client_id.id
+                date_generation = self.today - timedelta(days=self.rng.randint(0, 720))
+                for numero in range(1, per_equipement + 1):
+                    sous_affaire_id = choices[numero % len(choices)]
+                    code = f"{code_equipement}/ET{str(numero).zfill(2)}_{self._code()}"
+                    with_rapport = self.rng.random() < rapport_ratio
+                    yield (
+                        f"Étiquette {code}", code, numero, sous_affaire_id, affaire.id, client_id,
+                        equipement_id, date_generation, template.id if template else None, 0,
+                        f"{base_url}/inspection/etiquette/{code}",
+                    ) + self.audit, (equipement_id, sous_affaire_id, affaire.id) if with_rapport else None
+
+        count = 0
+        selection = []
+        for etiquette_id, data in _insert_batches(self.env.cr, 'kes_inspections_etiquette', (
+            'name', 'code_etiquette', 'numero_etiquette', 'sous_affaire_id', 'affaire_id', 'partner_id',
+            'equipement_id', 'date_generation', 'label_template_id', 'rapport_count', 'qr_code_url',
+            'create_uid', 'create_date', 'write_uid', 'write_date',
+        ), rows(), self.batch_size):
+            count += 1
+            if data:
+                selection.append((etiquette_id,) + data)
+        if equipements:
+            self.env.cr.execute("""
+                UPDATE kes_inspections_equipement
+                   SET nombre_etiquettes = %s, etiquettes_generes = TRUE
+                 WHERE id IN %s
+            """, (per_equipement, tuple(item[0] for item in equipements)))
+        self._phase_done('étiquettes', count, start)
+        return count, selection
+
+    def rapports(self, selection):
+        """Rapports (et leurs pièces jointes) des étiquettes sélectionnées"""
+        start = time.perf_counter()
+        if not selection:
+            return []
+        Attachment = self.env['ir.attachment']
+        checksum = hashlib.sha1(STUB_PDF).hexdigest()
+        store_fname = Attachment._file_write(STUB_PDF, checksum)
+        rows = [(
+            f"Rapport {i + 1}", f"rapport_{etiquette_id}.pdf", 'pdf', self.today, sous_affaire_id,
+            etiquette_id, equipement_id, affaire_id, checksum,
+        ) + self.audit for i, (etiquette_id, equipement_id, sous_affaire_id, affaire_id) in enumerate(selection)]
+        ids = _insert(self.env.cr, 'kes_inspections_rapport', (
+            'name', 'filename', 'file_type', 'date_upload', 'sous_affaire_id',
+            'etiquette_id', 'equipement_id', 'affaire_id', 'file_checksum',
+            'create_uid', 'create_date', 'write_uid', 'write_date',
+        ), rows, self.batch_size)
+        # Pièces jointes du champ ``file`` : toutes pointent vers le même fichier
+        _insert(self.env.cr, 'ir_attachment', (
+            'name', 'res_model', 'res_field', 'res_id', 'type', 'store_fname', 'file_size',
+            'checksum', 'mimetype', 'public', 'create_uid', 'create_date', 'write_uid', 'write_date',
+        ), [
+            ('file', 'kes_inspections.rapport', 'file', rapport_id, 'binary', store_fname, len(STUB_PDF),
+             checksum, 'application/pdf', False) + self.audit
+            for rapport_id in ids
+        ], self.batch_size)
+        self.env.cr.execute("""
+            UPDATE kes_inspections_etiquette e
+               SET rapport_count = r.nb
+              FROM (SELECT etiquette_id, COUNT(*) AS nb
+                      FROM kes_inspections_rapport
+                     WHERE id IN %s
+                  GROUP BY etiquette_id) r
+             WHERE r.etiquette_id = e.id
+        """, (tuple(ids),))
+        self._phase_done('rapports', len(ids), start)
+        return ids
+
+
+def generate(env, seed=42, clients=100, orders_per_client=1, sous_affaires_per_affaire=2,
+             equipements_per_affaire=10, etiquettes_per_equipement=10, inspecteurs=20,
+             rapport_ratio=0.2, batch_size=5000, commit=False):
+    """Remplit la base ; retourne le nombre d'enregistrements créés par type.
+
+    Volume d'étiquettes : clients × orders_per_client × equipements_per_affaire
+    × etiquettes_per_equipement. Avec ``commit=True``, chaque étape est validée
+    dès qu'elle est terminée.
+    """
+    start = time.perf_counter()
+    generator = _Generator(env, seed, batch_size, commit)
+    partners = generator.clients(clients)
+    employees = generator.inspecteurs(inspecteurs)
+    affaires, _products = generator.affaires(partners, employees, orders_per_client)
+    sous_affaires = generator.sous_affaires(affaires, sous_affaires_per_affaire)
+    equipements = generator.equipements(affaires, equipements_per_affaire)
+    etiquette_count, selection = generator.etiquettes(
+        equipements, sous_affaires, etiquettes_per_equipement, rapport_ratio)
+    rapports = generator.rapports(selection)
+    counts = {
+        'clients': len(partners),
+        'inspecteurs': len(employees),
+        'affaires': len(affaires),
+        'sous_affaires': len(sous_affaires),
+        'equipements': len(equipements),
+        'etiquettes': etiquette_count,
+        'rapports': len(rapports),
+    }
+    _logger.info("Jeu de données (graine %s) généré en %.1f s : %s", seed, time.perf_counter() - start, counts)
+    return counts
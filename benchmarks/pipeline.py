@@ -0,0 +1,137 @@
+# benchmarks/pipeline.py
+"""Rendu PNG + ZIP des étiquettes, étape par étape, sans base de données.
+
+Aucune base n'est utilisée, mais le paquet est importé comme le reste du
+module ; dans ``odoo-bin shell`` ::
+
+    from odoo.addons.kes_inspections.benchmarks import pipeline
+    pipeline.main([])                            # 10 et 100 étiquettes, tous les modèles
+    pipeline.main(['-n', '10000', '-t', 'ienc']) # un modèle, gros volume
+    pipeline.main(['--check'])                   # compare aux références (1 si régression ou référence absente)
+    pipeline.main(['--save-baseline'])           # enregistre les références
+    pipeline.main(['--dpi', '300', '--width-mm', '50'])  # fond pré-réduit (label.template.output_dpi)
+
+La géométrie des modèles est lue dans ``data/label_templates.xml`` et les
+fonds dans ``static/description/templates``, comme à l'installation.
+"""
+import argparse
+import io
+import os
+import sys
+import zipfile
+from xml.etree import ElementTree
+
+from ..rendering import LabelSpec, TemplateSpec, TextSpec
+from ..rendering import raster
+from ..rendering.images import image_size
+from ..rendering.raster import encode_png, normalize_template, render_label_image
+from ..rendering.timing import StageTimer
+from .common import (DEFAULT_THRESHOLD, check_regressions, load_baselines, median_of,
+                     missing_baselines, print_report, save_baselines)
+
+MODULE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGES = ('decode', 'qr', 'paste', 'text', 'png', 'zip')
+
+
+def load_templates():
+    """{code: (TemplateSpec, TextSpec de référence)} des modèles livrés"""
+    tree = ElementTree.parse(os.path.join(MODULE_PATH, 'data', 'label_templates.xml'))
+    templates = {}
+    for record in tree.iter('record'):
+        if record.get('model') != 'label.template':
+            continue
+        code = record.get('id').replace('label_template_', '')
+        values = {field.get('name'): field.text for field in record.iter('field')}
+        with open(os.path.join(MODULE_PATH, 'static', 'description', 'templates', f'{code}.png'), 'rb') as f:
+            image = f.read()
+        spec = TemplateSpec(image, int(values['qr_position_x']), int(values['qr_position_y']),
+                            int(values['qr_size']), key=f'benchmark:{code}')
+        text = TextSpec(int(values.get('client_name_x') or 0), int(values.get('client_name_y') or 0), '',
+                        int(values.get('font_size') or 12), values.get('font_color') or '#000000')
+        templates[code] = (spec, text)
+    return templates
+
+
+def scale_template(template, text, width_px):
+    """Modèle et texte ramenés à ``width_px`` de large (cf. label.template._get_render_spec)"""
+    image = normalize_template(template.image, width_px)
+    scale = image_size(image)[0] / template.size[0]
+    spec = TemplateSpec(image, round(template.qr_x * scale), round(template.qr_y * scale),
+                        max(1, round(template.qr_size * scale)), key=f'{template.key}:{width_px}')
+    return spec, text.scaled(scale)
+
+
+def make_label(index, text):
+    """Étiquette au contenu réaliste (cf. etiquette._get_qr_payload)"""
+    code = f"EQ/2026/{index:05d}"
+    texts = ()
+    if text.x and text.y:
+        texts = (TextSpec(text.x, text.y, f"CLIENT{index % 97:02d}/SITE{index % 13:02d}/{index}",
+                          text.font_size, text.color),)
+    return LabelSpec(qr_payload=f"{code}\nClient: Client {index % 97}\nProduit: Vérification", texts=texts)
+
+
+def run_pipeline(template, text, count):
+    """Rendu de ``count`` étiquettes dans un ZIP ; durées par étape et taille"""
+    # Fond décodé une fois par exécution, comme dans un worker qui démarre
+    raster._DECODED_TEMPLATES.clear()
+    timer = StageTimer()
+    for stage in STAGES:
+        timer.durations[stage] = 0.0
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for index in range(1, count + 1):
+            label = make_label(index, text)
+            data = encode_png(render_label_image(template, label, timer), timer=timer)
+            with timer.stage('zip'):
+                zip_file.writestr(f"etiquette_{index}.png", data)
+    durations = dict(timer.durations)
+    durations['total'] = sum(durations.values())
+    durations['zip_bytes'] = buffer.tell()
+    return durations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--count', type=int, action='append',
+                        help="nombre d'étiquettes (répétable ; défaut : 10 et 100)")
+    parser.add_argument('-t', '--template', action='append', help="code du modèle (ex. ienc ; défaut : tous)")
+    parser.add_argument('-r', '--repeat', type=int, default=3, help="exécutions par scénario (médiane)")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--check', action='store_true', help="code de sortie 1 en cas de régression")
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--dpi', type=int, help="résolution de sortie (avec --width-mm)")
+    parser.add_argument('--width-mm', type=float, default=50.0, help="largeur imprimée (défaut : 50 mm)")
+    args = parser.parse_args(argv)
+    width_px = round(args.width_mm / 25.4 * args.dpi) if args.dpi else None
+
+    templates = load_templates()
+    codes = args.template or sorted(templates)
+    results = {}
+    for code in codes:
+        template, text = templates[code]
+        name = f'pipeline.{code}'
+        if width_px:
+            template, text = scale_template(template, text, width_px)
+            name = f'{name}@{args.dpi}dpi'
+        for count in args.count or (10, 100):
+            runs = [run_pipeline(template, text, count) for _ in range(max(1, args.repeat))]
+            results[f'{name}.{count}'] = median_of(runs)
+
+    baselines = load_baselines()
+    print_report(results, baselines)
+    if args.save_baseline:
+        save_baselines(results)
+        print("Références enregistrées.")
+        return 0
+    missing = missing_baselines(results, baselines)
+    for scenario in missing:
+        print(f"AUCUNE RÉFÉRENCE pour {scenario} : lancer avec --save-baseline sur la machine de référence")
+    regressions = check_regressions(results, baselines, args.threshold)
+    for scenario, metric, reference, value in regressions:
+        print(f"RÉGRESSION {scenario} {metric} : {reference} -> {value}")
+    return 1 if (regressions or missing) and args.check else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+# benchmarks/startup.py
+"""Coût du chargement du module dans un processus Odoo.
+
+Mesure, dans des interpréteurs neufs où ``odoo`` est déjà importé (comme dans
+un worker), le temps d'import du paquet du module et les bibliothèques
+lourdes qu'il charge au passage. Depuis le dossier du module ::
+
+    python -m benchmarks.startup --addons-path /chemin/vers/addons
+    python -m benchmarks.startup --addons-path ... --check     # échec si une bibliothèque lourde est chargée
+
+Pour comparer avant / après une modification, lancer la commande sur les
+deux révisions (``git stash`` ou ``git checkout``) : la durée affichée est
+la contribution du module au chargement du registre, hors base de données.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+MODULE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULE_NAME = os.path.basename(MODULE_PATH)
+
+# Bibliothèques que le module ne doit charger qu'au premier rendu
+LAZY_MODULES = ('qrcode', 'PIL.ImageDraw', 'PIL.ImageFont', 'reportlab.pdfgen.canvas')
+
+_PROBE = """
+import json, sys, time
+import odoo
+from odoo.tools import config
+config.parse_config(['--addons-path=' + sys.argv[1]])
+lazy = sys.argv[3].split(',')
+already = [name for name in lazy if name in sys.modules]
+start = time.perf_counter()
+__import__('odoo.addons.' + sys.argv[2])
+duration = time.perf_counter() - start
+loaded = [name for name in lazy if name in sys.modules and name not in already]
+print(json.dumps({'duration': duration, 'loaded': loaded, 'already': already}))
+"""
+
+
+def probe(addons_path):
+    output = subprocess.run(
+        [sys.executable, '-c', _PROBE, addons_path, MODULE_NAME, ','.join(LAZY_MODULES)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--addons-path', default=os.path.dirname(MODULE_PATH),
+                        help="chemins des modules (défaut : dossier parent du module)")
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    parser.add_argument('--check', action='store_true',
+                        help="code de sortie 1 si une bibliothèque lourde est chargée à l'import")
+    args = parser.parse_args(argv)
+
+    runs = [probe(args.addons_path) for _ in range(max(1, args.repeat))]
+    durations = [run['duration'] for run in runs]
+    loaded = runs[-1]['loaded']
+    print(f"Import de {MODULE_NAME} : médiane {statistics.median(durations) * 1000:.1f} ms "
+          f"(min {min(durations) * 1000:.1f} ms, {len(runs)} exécutions)")
+    if runs[-1]['already']:
+        print(f"Déjà chargées par Odoo : {', '.join(runs[-1]['already'])}")
+    print(f"Chargées par le module : {', '.join(loaded) or 'aucune'}")
+    return 1 if args.check and loaded else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
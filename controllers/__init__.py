@@ -1,3 +1,6 @@
 # -*- coding: utf-8 -*-
 
 from . import controllers
+from . import upload
+from . import thumbnail
+from . import dossier
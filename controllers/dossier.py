@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+from odoo import api, http
+from odoo.http import request
+from odoo.modules.registry import Registry
+
+
+class KesAffaireDossier(http.Controller):
+
+    @http.route('/kes_inspections/affaire/<int:affaire_id>/dossier', type='http', auth='user', methods=['GET'])
+    def affaire_dossier(self, affaire_id, **kw):
+        """Diffuse le ZIP du dossier complet d'une affaire"""
+        affaire = request.env['kes_inspections.affaire'].browse(affaire_id).exists()
+        if not affaire:
+            raise request.not_found()
+        affaire.check_access('read')
+
+        # La réponse est lue après la fermeture du curseur de la requête : le ZIP
+        # est produit sur son propre curseur, qui prend le verrou dès maintenant.
+        # Un refus a donc lieu avant l'envoi des en-têtes, et le verrou est tenu
+        # jusqu'à la fin de la diffusion.
+        cr = Registry(request.env.cr.dbname).cursor()
+        try:
+            env = api.Environment(cr, request.env.uid, dict(request.env.context))
+            dossier = env['kes_inspections.affaire'].browse(affaire_id)
+            dossier._lock_dossier()
+        except Exception:
+            cr.close()
+            raise
+
+        def stream():
+            for chunk in dossier._iter_dossier_zip():
+                if chunk:
+                    yield chunk
+            # Mesure de performance éventuelle
+            cr.commit()
+
+        response = request.make_response(stream(), headers=[
+            ('Content-Type', 'application/zip'),
+            ('Content-Disposition', http.content_disposition(affaire._get_dossier_filename())),
+            ('Cache-Control', 'no-store'),
+        ])
+        response.call_on_close(cr.close)
+        return response
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from odoo import http
+from odoo.http import request
+
+# Modèles dont la miniature peut être servie
+THUMBNAIL_MODELS = ('kes_inspections.rapport', 'kes_inspections.rapport.affaire')
+# Une URL portant ?unique= change avec le document : elle peut être mise en cache longtemps
+THUMBNAIL_MAX_AGE = 365 * 24 * 3600
+
+
+class KesDocumentThumbnail(http.Controller):
+
+    @http.route('/kes_inspections/thumbnail/<string:model>/<int:res_id>', type='http', auth='user', methods=['GET'])
+    def document_thumbnail(self, model, res_id, unique=None, **kw):
+        """Sert la miniature d'un rapport, jamais le document d'origine"""
+        if model not in THUMBNAIL_MODELS:
+            raise request.not_found()
+        record = request.env[model].browse(res_id).exists()
+        if not record:
+            raise request.not_found()
+        record.check_access('read')
+
+        ir_binary = request.env['ir.binary']
+        if record.thumbnail_checksum and record.sudo().thumbnail:
+            stream = ir_binary._get_stream_from(record.sudo(), 'thumbnail')
+        else:
+            stream = ir_binary._get_placeholder_stream()
+            unique = None
+        return stream.get_response(max_age=THUMBNAIL_MAX_AGE if unique else 0, immutable=bool(unique))
+
+
+class KesEtiquettePreview(http.Controller):
+
+    @http.route('/kes_inspections/etiquette/<int:etiquette_id>/preview', type='http', auth='user', methods=['GET'])
+    def etiquette_preview(self, etiquette_id, unique=None, **kw):
+        """Sert l'aperçu basse résolution d'une étiquette (rendu à la demande s'il est périmé)"""
+        etiquette = request.env['kes_inspections.etiquette'].browse(etiquette_id).exists()
+        if not etiquette:
+            raise request.not_found()
+        etiquette.check_access('read')
+
+        ir_binary = request.env['ir.binary']
+        attachment = etiquette._get_preview()
+        if attachment:
+            stream = ir_binary._get_stream_from(attachment)
+        else:
+            stream = ir_binary._get_placeholder_stream()
+            unique = None
+        return stream.get_response(max_age=THUMBNAIL_MAX_AGE if unique else 0, immutable=bool(unique))
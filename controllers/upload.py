@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""Points d'entrée du téléversement par morceaux des rapports.
+
+Protocole :
+    1. POST /kes_inspections/upload/start (JSON) -> jeton et taille de morceau
+    2. PUT  /kes_inspections/upload/<jeton>?offset=N (corps brut) pour chaque morceau
+    3. GET  /kes_inspections/upload/<jeton> pour connaître l'octet de reprise
+    4. POST /kes_inspections/upload/<jeton>/finish (JSON) -> rapport créé
+"""
+import json
+
+from odoo import http
+from odoo.exceptions import UserError
+from odoo.http import request
+
+from ..models.upload_session import CHUNK_SIZE
+
+
+class KesChunkedUpload(http.Controller):
+
+    def _get_session(self, token):
+        session = request.env['kes_inspections.upload.session'].search([
+            ('token', '=', token),
+            ('user_id', '=', request.env.uid),
+        ], limit=1)
+        if not session:
+            raise request.not_found()
+        return session
+
+    def _json_response(self, payload, status=200):
+        return request.make_response(
+            json.dumps(payload),
+            headers=[('Content-Type', 'application/json'), ('Cache-Control', 'no-store')],
+            status=status,
+        )
+
+    @http.route('/kes_inspections/upload/start', type='json', auth='user', methods=['POST'])
+    def upload_start(self, filename, size, checksum, target_model='kes_inspections.rapport',
+                     sous_affaire_id=None, etiquette_id=None, affaire_id=None, **kw):
+        session = request.env['kes_inspections.upload.session'].create({
+            'filename': filename,
+            'total_size': int(size),
+            'checksum': checksum,
+            'target_model': target_model,
+            'sous_affaire_id': sous_affaire_id,
+            'etiquette_id': etiquette_id,
+            'affaire_id': affaire_id,
+        })
+        return {'token': session.token, 'chunk_size': CHUNK_SIZE, 'received': 0}
+
+    @http.route('/kes_inspections/upload/<string:token>', type='http', auth='user', methods=['GET'])
+    def upload_status(self, token, **kw):
+        session = self._get_session(token)
+        return self._json_response({
+            'received': session.received_size,
+            'size': session.total_size,
+            'state': session.state,
+        })
+
+    @http.route('/kes_inspections/upload/<string:token>', type='http', auth='user',
+                methods=['PUT', 'POST'], csrf=False)
+    def upload_chunk(self, token, offset=0, **kw):
+        session = self._get_session(token)
+        try:
+            received = session.write_chunk(int(offset), request.httprequest.stream)
+        except UserError as e:
+            return self._json_response({'error': str(e), 'received': session.received_size}, status=409)
+        return self._json_response({'received': received, 'size': session.total_size})
+
+    @http.route('/kes_inspections/upload/<string:token>/finish', type='json', auth='user', methods=['POST'])
+    def upload_finish(self, token, **kw):
+        session = self._get_session(token)
+        res_id = session.finish()
+        return {'res_model': session.target_model, 'res_id': res_id}
@@ -0,0 +1,16 @@
+# migrations/1.1/post-migrate.py
+"""Regroupe les documents téléversés identiques sur un seul fichier du filestore."""
+import logging
+
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    report = env['kes_inspections.document.mixin']._deduplicate_documents()
+    _logger.info("kes_inspections 1.1 : %s Mo récupérés sur le filestore",
+                 round(report['octets_recuperes'] / (1024 * 1024), 2))
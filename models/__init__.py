@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
 
+from . import document_mixin
+from . import document_fulltext
+from . import document_thumbnail
 from . import inspection_models
 from . import sale_order
 from . import equipement
@@ -12,3 +15,15 @@ from . import sous_affaire_inspecteur
 from . import sous_affaire_produit
 from . import label_template
 from . import label_generator
+from . import affaire_alerte
+from . import affaire_renouvellement
+from . import upload_session
+from . import rapport_import
+from . import affaire_dossier
+from . import sous_affaire_rapport_consolide
+from . import affaire_archive
+from . import download_cache
+from . import label_sheet
+from . import label_zpl
+from . import label_svg
+from . import perf_sample
@@ -0,0 +1,138 @@
+# models/affaire_alerte.py
+import logging
+import threading
+from datetime import timedelta
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+# Horizons par défaut (en jours avant la prochaine inspection)
+DEFAULT_ALERTE_HORIZONS = '90,30,7'
+
+
+class InspectionAffaireAlerte(models.Model):
+    _inherit = 'kes_inspections.affaire'
+
+    # 🔹 SUIVI DES ALERTES DÉJÀ ENVOYÉES (rend le cron idempotent)
+    alerte_date_notifiee = fields.Date(
+        string='Échéance déjà alertée',
+        copy=False,
+        readonly=True,
+        help="Date de prochaine inspection pour laquelle une alerte a été créée."
+    )
+    alerte_horizon_notifie = fields.Integer(
+        string='Dernier horizon alerté (jours)',
+        copy=False,
+        readonly=True
+    )
+
+    @api.model
+    def _get_alerte_horizons(self):
+        """Horizons configurés, du plus lointain au plus proche"""
+        param = self.env['ir.config_parameter'].sudo().get_param(
+            'kes_inspections.alerte_horizons', DEFAULT_ALERTE_HORIZONS)
+        horizons = set()
+        for value in param.split(','):
+            try:
+                days = int(value.strip())
+            except ValueError:
+                continue
+            if days > 0:
+                horizons.add(days)
+        return sorted(horizons, reverse=True) or [30]
+
+    @api.model
+    def _cron_alertes_prochaines_inspections(self, batch_size=1000):
+        """Crée les activités de rappel pour les inspections arrivant à échéance.
+
+        Une seule requête de plage (indexée) sur ``date_prochaine_inspection``,
+        puis traitement par lots avec création groupée des activités et commit
+        après chaque lot. Une affaire n'est alertée qu'une fois par horizon et
+        par échéance : relancer le cron ne crée pas de doublons.
+        """
+        horizons = self._get_alerte_horizons()
+        today = fields.Date.context_today(self)
+
+        affaire_ids = self.search([
+            ('date_prochaine_inspection', '>=', today),
+            ('date_prochaine_inspection', '<=', today + timedelta(days=horizons[0])),
+        ], order='date_prochaine_inspection, id').ids
+
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        activity_type = self.env.ref('kes_inspections.mail_activity_prochaine_inspection')
+        res_model_id = self.env['ir.model']._get_id(self._name)
+        total = 0
+
+        for start in range(0, len(affaire_ids), batch_size):
+            affaires = self.browse(affaire_ids[start:start + batch_size])
+            total += affaires._creer_alertes_prochaine_inspection(
+                horizons, today, activity_type, res_model_id)
+            if auto_commit:
+                self.env.cr.commit()
+
+        _logger.info("Alertes prochaines inspections : %s activité(s) créée(s) ou mise(s) à jour sur %s affaire(s)",
+                     total, len(affaire_ids))
+        return total
+
+    def _creer_alertes_prochaine_inspection(self, horizons, today, activity_type, res_model_id):
+        """Traite un lot d'affaires : une activité par affaire, mise à jour si elle existe déjà"""
+        # Horizon applicable = le plus petit horizon qui couvre le délai restant
+        a_alerter = {}
+        for affaire in self:
+            remaining = (affaire.date_prochaine_inspection - today).days
+            horizon = min(h for h in horizons if remaining <= h)
+            deja_alertee = (
+                affaire.alerte_date_notifiee == affaire.date_prochaine_inspection
+                and affaire.alerte_horizon_notifie
+                and affaire.alerte_horizon_notifie <= horizon
+            )
+            if not deja_alertee:
+                a_alerter[affaire] = horizon
+
+        if not a_alerter:
+            return 0
+
+        # Activités encore ouvertes sur ces affaires (une seule requête)
+        existing = self.env['mail.activity'].search([
+            ('res_model', '=', self._name),
+            ('res_id', 'in', [affaire.id for affaire in a_alerter]),
+            ('activity_type_id', '=', activity_type.id),
+        ])
+        existing_by_res = {activity.res_id: activity for activity in existing}
+
+        vals_list = []
+        by_horizon = {}
+        for affaire, horizon in a_alerter.items():
+            summary = f"Prochaine inspection {affaire.name} (J-{horizon})"
+            activity = existing_by_res.get(affaire.id)
+            if activity:
+                activity.write({'summary': summary, 'date_deadline': affaire.date_prochaine_inspection})
+            else:
+                user = affaire.charge_affaire_id.user_id or affaire.create_uid
+                vals_list.append({
+                    'res_model_id': res_model_id,
+                    'res_id': affaire.id,
+                    'activity_type_id': activity_type.id,
+                    'user_id': user.id,
+                    'date_deadline': affaire.date_prochaine_inspection,
+                    'summary': summary,
+                    'note': f"Recontacter {affaire.client_id.name or 'le client'} pour planifier "
+                            f"la prochaine inspection du {affaire.date_prochaine_inspection}.",
+                })
+            by_horizon.setdefault(horizon, []).append(affaire.id)
+
+        if vals_list:
+            self.env['mail.activity'].with_context(mail_activity_quick_update=True).create(vals_list)
+
+        # Mémoriser l'alerte envoyée : un UPDATE par horizon
+        for horizon, ids in by_horizon.items():
+            self.env.cr.execute("""
+                UPDATE kes_inspections_affaire
+                   SET alerte_horizon_notifie = %s,
+                       alerte_date_notifiee = date_prochaine_inspection
+                 WHERE id IN %s
+            """, (horizon, tuple(ids)))
+        self.invalidate_recordset(['alerte_horizon_notifie', 'alerte_date_notifiee'])
+
+        return len(a_alerter)
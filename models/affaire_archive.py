@@ -0,0 +1,255 @@
+# models/affaire_archive.py
+"""Archivage à froid des fichiers des affaires clôturées.
+
+Un cron regroupe les fichiers (rapports, documents, QR codes...) des affaires
+terminées depuis plus de N mois dans une archive ZIP par affaire, rangée dans
+un répertoire séparé du filestore. Les fichiers d'origine sont ensuite
+supprimés du filestore « chaud », ce qui allège sauvegardes et restaurations.
+
+Les pièces jointes gardent leur ``store_fname`` : au premier accès (lecture
+ou téléchargement), le fichier est extrait de l'archive et remis en place.
+"""
+import logging
+import os
+import threading
+import zipfile
+from functools import partial
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import models, fields, api, tools
+
+_logger = logging.getLogger(__name__)
+
+
+def _remove_files(paths):
+    """Suppression des originaux, une fois l'archivage validé en base"""
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError as e:
+            _logger.warning("Suppression impossible de %s : %s", path, e)
+
+
+class KesArchiveBundle(models.Model):
+    _name = 'kes_inspections.archive.bundle'
+    _description = "Archive froide des fichiers d'une affaire"
+    _order = 'create_date desc'
+
+    name = fields.Char(string='Fichier d\'archive', required=True, readonly=True)
+    affaire_id = fields.Many2one('kes_inspections.affaire', string='Affaire', readonly=True,
+                                 index=True, ondelete='set null')
+    file_count = fields.Integer(string='Fichiers archivés', readonly=True)
+    original_size = fields.Integer(string='Taille d\'origine (octets)', readonly=True)
+    archive_size = fields.Integer(string='Taille archivée (octets)', readonly=True)
+
+    @api.model
+    def _get_archive_dir(self):
+        path = self.env['ir.config_parameter'].sudo().get_param('kes_inspections.archive_path')
+        if not path:
+            path = os.path.join(tools.config['data_dir'], 'kes_archives', self.env.cr.dbname)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _full_path(self):
+        self.ensure_one()
+        return os.path.join(self._get_archive_dir(), self.name)
+
+    def _restore_files(self, store_fnames):
+        """Extrait ``store_fnames`` de l'archive vers le filestore"""
+        self.ensure_one()
+        Attachment = self.env['ir.attachment']
+        with zipfile.ZipFile(self._full_path()) as bundle:
+            members = set(bundle.namelist())
+            for fname in store_fnames:
+                if fname not in members:
+                    _logger.error("Fichier %s absent de l'archive %s", fname, self.name)
+                    continue
+                full_path = Attachment._full_path(fname)
+                if os.path.exists(full_path):
+                    continue
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                tmp_path = f'{full_path}.restore{os.getpid()}'
+                with bundle.open(fname) as source, open(tmp_path, 'wb') as target:
+                    for buffer in iter(lambda: source.read(1024 * 1024), b''):
+                        target.write(buffer)
+                os.replace(tmp_path, full_path)
+
+
+class IrAttachment(models.Model):
+    _inherit = 'ir.attachment'
+
+    kes_archive_bundle_id = fields.Many2one(
+        'kes_inspections.archive.bundle',
+        string='Archive froide',
+        index='btree_not_null',
+        ondelete='restrict',
+        copy=False,
+    )
+
+    def _restore_from_archive(self):
+        """Remet dans le filestore les fichiers archivés de ces pièces jointes"""
+        archived = self.sudo().filtered('kes_archive_bundle_id')
+        if not archived:
+            return
+        for bundle in archived.kes_archive_bundle_id:
+            fnames = set(archived.filtered(lambda a: a.kes_archive_bundle_id == bundle).mapped('store_fname'))
+            bundle._restore_files(fnames)
+        # Toutes les pièces jointes partageant ces fichiers redeviennent « chaudes »
+        self.env.cr.execute(
+            "UPDATE ir_attachment SET kes_archive_bundle_id = NULL WHERE store_fname IN %s",
+            (tuple(archived.mapped('store_fname')),)
+        )
+        self.invalidate_model(['kes_archive_bundle_id'])
+
+    @api.model
+    def _file_read(self, fname):
+        if not os.path.exists(self._full_path(fname)):
+            self.sudo().search([
+                ('store_fname', '=', fname),
+                ('kes_archive_bundle_id', '!=', False),
+            ], limit=1)._restore_from_archive()
+        return super()._file_read(fname)
+
+
+class IrBinary(models.AbstractModel):
+    _inherit = 'ir.binary'
+
+    def _record_to_stream(self, record, field_name):
+        # Les téléchargements (/web/content) lisent directement le fichier :
+        # on le restaure avant d'ouvrir le flux.
+        if record._name == 'ir.attachment':
+            record._restore_from_archive()
+        elif record.id:
+            self.env['ir.attachment'].sudo().search([
+                ('res_model', '=', record._name),
+                ('res_field', '=', field_name),
+                ('res_id', '=', record.id),
+                ('kes_archive_bundle_id', '!=', False),
+            ])._restore_from_archive()
+        return super()._record_to_stream(record, field_name)
+
+
+class InspectionAffaireArchive(models.Model):
+    _inherit = 'kes_inspections.affaire'
+
+    date_cloture = fields.Datetime(string='Date de clôture', readonly=True, copy=False)
+    archive_bundle_ids = fields.One2many('kes_inspections.archive.bundle', 'affaire_id', string='Archives froides')
+    date_archivage = fields.Datetime(string='Fichiers archivés le', readonly=True, copy=False)
+
+    def write(self, vals):
+        if vals.get('state') == 'done' and 'date_cloture' not in vals:
+            vals = dict(vals, date_cloture=fields.Datetime.now())
+        elif vals.get('state') in ('draft', 'in_progress'):
+            vals = dict(vals, date_cloture=False, date_archivage=False)
+        return super().write(vals)
+
+    @api.model
+    def _cron_archiver_affaires_closes(self, batch_size=20):
+        """Archive les fichiers des affaires terminées depuis plus de N mois"""
+        months = int(self.env['ir.config_parameter'].sudo().get_param(
+            'kes_inspections.archive_after_months', 24))
+        limit_date = fields.Datetime.now() - relativedelta(months=months)
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        domain = [
+            ('state', '=', 'done'),
+            ('date_archivage', '=', False),
+            '|',
+            ('date_cloture', '<', limit_date),
+            '&', ('date_cloture', '=', False), ('write_date', '<', limit_date),
+        ]
+        failed = []
+        while True:
+            affaires = self.search(domain + [('id', 'not in', failed)], limit=batch_size, order='id')
+            if not affaires:
+                break
+            for affaire in affaires:
+                try:
+                    affaire._archiver_fichiers()
+                except Exception:
+                    if not auto_commit:
+                        raise
+                    _logger.exception("Archivage impossible pour l'affaire %s", affaire.id)
+                    self.env.cr.rollback()
+                    failed.append(affaire.id)
+                    continue
+                if auto_commit:
+                    self.env.cr.commit()
+            if not auto_commit:
+                break
+
+    def _get_archive_attachments(self):
+        """Pièces jointes stockées dans le filestore et rattachées à l'affaire"""
+        self.ensure_one()
+        sous_affaires = self.sous_affaire_ids
+        owners = [
+            (self._name, self.ids),
+            ('kes_inspections.rapport.affaire', self.rapport_affaire_ids.ids),
+            ('kes_inspections.sous_affaire', sous_affaires.ids),
+            ('kes_inspections.bond_commande', sous_affaires.bond_commande_ids.ids),
+            ('kes_inspections.pv', sous_affaires.pv_ids.ids),
+            ('kes_inspections.enquete_satisfaction', sous_affaires.enquete_satisfaction_ids.ids),
+            ('kes_inspections.rapport', sous_affaires.rapport_ids.ids),
+            ('kes_inspections.etiquette', sous_affaires.etiquette_ids.ids),
+            ('kes_inspections.equipement', self.equipement_ids.ids),
+        ]
+        domains = [
+            [('res_model', '=', model), ('res_id', 'in', ids)]
+            for model, ids in owners if ids
+        ]
+        return self.env['ir.attachment'].sudo().search(
+            [('store_fname', '!=', False), ('kes_archive_bundle_id', '=', False)]
+            + ['|'] * (len(domains) - 1) + [leaf for domain in domains for leaf in domain]
+        )
+
+    def _archiver_fichiers(self):
+        """Crée l'archive de l'affaire puis retire les fichiers du filestore"""
+        self.ensure_one()
+        Attachment = self.env['ir.attachment']
+        attachments = self._get_archive_attachments()
+        fnames = set()
+        if attachments:
+            # Fichiers (adressés par contenu) partagés avec une pièce jointe
+            # extérieure à l'affaire : ils restent dans le filestore
+            self.env.cr.execute("""
+                SELECT DISTINCT a.store_fname
+                  FROM ir_attachment a
+                 WHERE a.id IN %s
+                   AND NOT EXISTS (
+                       SELECT 1 FROM ir_attachment o
+                        WHERE o.store_fname = a.store_fname
+                          AND o.id NOT IN %s)
+            """, (tuple(attachments.ids), tuple(attachments.ids)))
+            fnames = {
+                fname for fname, in self.env.cr.fetchall()
+                if os.path.exists(Attachment._full_path(fname))
+            }
+        if not fnames:
+            self.date_archivage = fields.Datetime.now()
+            return
+
+        archive_dir = self.env['kes_inspections.archive.bundle']._get_archive_dir()
+        name = f"affaire_{self.id}_{fields.Datetime.now().strftime('%Y%m%d%H%M%S')}.zip"
+        path = os.path.join(archive_dir, name)
+        original_size = 0
+        with zipfile.ZipFile(f'{path}.tmp', 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as bundle:
+            for fname in sorted(fnames):
+                full_path = Attachment._full_path(fname)
+                original_size += os.path.getsize(full_path)
+                bundle.write(full_path, fname)
+        with open(f'{path}.tmp', 'rb') as tmp:
+            os.fsync(tmp.fileno())
+        os.replace(f'{path}.tmp', path)
+
+        bundle = self.env['kes_inspections.archive.bundle'].sudo().create({
+            'name': name,
+            'affaire_id': self.id,
+            'file_count': len(fnames),
+            'original_size': original_size,
+            'archive_size': os.path.getsize(path),
+        })
+        attachments.filtered(lambda a: a.store_fname in fnames).write({'kes_archive_bundle_id': bundle.id})
+        self.date_archivage = fields.Datetime.now()
+        # Les originaux ne sont supprimés qu'après validation de la transaction
+        self.env.cr.postcommit.add(partial(_remove_files, [Attachment._full_path(f) for f in fnames]))
+        _logger.info("Affaire %s : %s fichiers archivés dans %s", self.id, len(fnames), name)
@@ -0,0 +1,158 @@
+# models/affaire_dossier.py
+"""Export d'un dossier complet d'affaire en un seul ZIP diffusé en continu.
+
+Le ZIP est produit à la volée : chaque document est lu par blocs depuis son
+fichier du filestore et chaque bloc compressé est envoyé immédiatement au
+client. La mémoire utilisée reste constante, quelle que soit la taille du
+dossier.
+"""
+import io
+import zipfile
+from datetime import datetime
+
+from odoo import models
+
+from .generation_lock import acquire_generation_lock
+from .perf_sample import perf_probe
+
+COPY_BUFFER = 1024 * 1024
+
+
+class ZipStreamSink(io.RawIOBase):
+    """Flux d'écriture non positionnable : zipfile y écrit, on vide au fil de l'eau"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def safe_name(value):
+    """Nom de fichier ou de dossier sans séparateurs"""
+    return (value or 'sans_nom').replace('/', '_').replace('\\', '_').strip() or 'sans_nom'
+
+
+class InspectionAffaireDossier(models.Model):
+    _inherit = 'kes_inspections.affaire'
+
+    def action_exporter_dossier(self):
+        """Télécharge le dossier complet de l'affaire (ZIP diffusé en continu)"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/kes_inspections/affaire/{self.id}/dossier',
+            'target': 'self',
+        }
+
+    def _get_dossier_filename(self):
+        self.ensure_one()
+        return f"dossier_{safe_name(self.name)}.zip"
+
+    def _get_document_attachments_map(self, records, field_name):
+        """Pièces jointes d'un champ Binary pour tout un lot : {res_id: attachment}"""
+        if not records:
+            return {}
+        attachments = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', records._name),
+            ('res_field', '=', field_name),
+            ('res_id', 'in', records.ids),
+        ])
+        return {attachment.res_id: attachment for attachment in attachments}
+
+    def _iter_dossier_entries(self):
+        """Entrées du dossier : (chemin dans le ZIP, pièce jointe ou étiquette)"""
+        self.ensure_one()
+        root = safe_name(self.name)
+
+        rapports_affaire = self.rapport_affaire_ids
+        attachments = self._get_document_attachments_map(rapports_affaire, 'file')
+        for rapport in rapports_affaire:
+            if rapport.id in attachments:
+                yield f"{root}/rapports_affaire/{safe_name(rapport.filename)}", attachments[rapport.id]
+
+        sous_affaires = self.sous_affaire_ids
+        documents = [
+            ('bon_de_commande', sous_affaires.bond_commande_ids, 'bond_commande_file', 'bond_commande_filename'),
+            ('pv', sous_affaires.pv_ids, 'pv_file', 'pv_filename'),
+            ('enquetes_satisfaction', sous_affaires.enquete_satisfaction_ids,
+             'enquete_satisfaction_file', 'enquete_satisfaction_filename'),
+            ('rapports', sous_affaires.rapport_ids, 'file', 'filename'),
+        ]
+        for folder, records, field_name, filename_field in documents:
+            attachments = self._get_document_attachments_map(records, field_name)
+            for record in records:
+                if record.id in attachments:
+                    path = f"{root}/{safe_name(record.sous_affaire_id.name)}/{folder}/{safe_name(record[filename_field])}"
+                    yield path, attachments[record.id]
+
+        for etiquette in sous_affaires.etiquette_ids:
+            path = f"{root}/{safe_name(etiquette.sous_affaire_id.name)}/etiquettes/etiquette_{safe_name(etiquette.code_etiquette)}.png"
+            yield path, etiquette
+
+    def _lock_dossier(self):
+        """Verrou partagé contre une génération d'étiquettes concurrente.
+
+        À prendre sur le curseur qui diffusera le ZIP, avant l'envoi des
+        en-têtes : il est tenu jusqu'à la fin de sa transaction.
+        """
+        self.ensure_one()
+        acquire_generation_lock(self.sous_affaire_ids, shared=True, wait=False)
+
+    def _iter_dossier_zip(self):
+        """Générateur des octets du ZIP du dossier (verrou pris par ``_lock_dossier``)"""
+        self.ensure_one()
+        from ..rendering.raster import encode_png
+
+        sink = ZipStreamSink()
+        seen = set()
+        # Une seule mesure pour tout l'export ; les étiquettes y cumulent leurs étapes
+        with perf_probe(self.env, 'affaire.action_exporter_dossier') as probe:
+            with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED, allowZip64=True, compresslevel=1) as archive:
+                for path, source in self._iter_dossier_entries():
+                    # Deux documents de même nom dans un dossier : suffixe numéroté
+                    unique_path, index = path, 1
+                    while unique_path in seen:
+                        stem, dot, ext = path.rpartition('.')
+                        unique_path = f"{stem} ({index}).{ext}" if dot else f"{path} ({index})"
+                        index += 1
+                    seen.add(unique_path)
+
+                    info = zipfile.ZipInfo(unique_path, date_time=datetime.now().timetuple()[:6])
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    with archive.open(info, 'w', force_zip64=True) as entry:
+                        if source._name == 'ir.attachment':
+                            for chunk in self._copy_attachment(source, entry, sink):
+                                probe.bytes_out += len(chunk)
+                                yield chunk
+                        else:
+                            entry.write(encode_png(source.generate_etiquette_image(probe), timer=probe))
+                            probe.label_count += 1
+                    chunk = sink.drain()
+                    probe.bytes_out += len(chunk)
+                    yield chunk
+            chunk = sink.drain()
+            probe.bytes_out += len(chunk)
+            yield chunk
+
+    def _copy_attachment(self, attachment, entry, sink):
+        """Copie une pièce jointe par blocs depuis le filestore"""
+        attachment._restore_from_archive()
+        if attachment.store_fname:
+            with open(attachment._full_path(attachment.store_fname), 'rb') as source:
+                for buffer in iter(lambda: source.read(COPY_BUFFER), b''):
+                    entry.write(buffer)
+                    yield sink.drain()
+        else:
+            entry.write(attachment.raw or b'')
+            yield sink.drain()
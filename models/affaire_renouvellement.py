@@ -0,0 +1,118 @@
+# models/affaire_renouvellement.py
+from odoo import models, fields, api, Command
+from odoo.exceptions import UserError
+
+
+class InspectionAffaireRenouvellement(models.Model):
+    _inherit = 'kes_inspections.affaire'
+
+    # 🔹 DEVIS DE RENOUVELLEMENT GÉNÉRÉS DEPUIS CETTE AFFAIRE
+    devis_renouvellement_ids = fields.One2many(
+        'sale.order',
+        'affaire_origine_id',
+        string='Devis de renouvellement'
+    )
+    devis_renouvellement_count = fields.Integer(
+        string='Nombre de devis de renouvellement',
+        compute='_compute_devis_renouvellement_count'
+    )
+
+    @api.depends('devis_renouvellement_ids')
+    def _compute_devis_renouvellement_count(self):
+        counts = {
+            affaire.id: count
+            for affaire, count in self.env['sale.order']._read_group(
+                [('affaire_origine_id', 'in', self.ids)], ['affaire_origine_id'], ['__count'])
+        }
+        for affaire in self:
+            affaire.devis_renouvellement_count = counts.get(affaire.id, 0)
+
+    def action_generer_devis_renouvellement(self):
+        """Crée en lot les devis de renouvellement des affaires sélectionnées.
+
+        Les commandes d'origine et leurs lignes sont chargées en une fois, puis
+        tous les devis sont créés par un seul ``create`` multi-enregistrements.
+        Les affaires qui ont déjà un devis de renouvellement ouvert sont ignorées.
+        """
+        affaires = self.filtered('sale_order_id')
+        if not affaires:
+            raise UserError("Aucune des affaires sélectionnées n'est liée à une commande de vente.")
+
+        # Devis de renouvellement encore ouverts (une seule requête)
+        deja_ouverts = self.env['sale.order'].search([
+            ('affaire_origine_id', 'in', affaires.ids),
+            ('state', 'in', ('draft', 'sent')),
+        ])
+        affaires -= deja_ouverts.mapped('affaire_origine_id')
+        if not affaires:
+            raise UserError("Toutes les affaires sélectionnées ont déjà un devis de renouvellement en cours.")
+
+        # Préchargement groupé des commandes d'origine et de leurs lignes
+        orders = affaires.mapped('sale_order_id')
+        lines = self.env['sale.order.line'].search([('order_id', 'in', orders.ids)], order='order_id, sequence, id')
+        lines_by_order = {}
+        for line in lines:
+            lines_by_order.setdefault(line.order_id.id, []).append(line)
+
+        vals_list = []
+        for affaire in affaires:
+            order = affaire.sale_order_id
+            vals_list.append({
+                'partner_id': order.partner_id.id,
+                'partner_invoice_id': order.partner_invoice_id.id,
+                'partner_shipping_id': order.partner_shipping_id.id,
+                'contact': order.contact.id,
+                'department_id': order.department_id.id,
+                'description': order.description,
+                'pricelist_id': order.pricelist_id.id,
+                'payment_term_id': order.payment_term_id.id,
+                'company_id': order.company_id.id,
+                'user_id': order.user_id.id,
+                'origin': f"Renouvellement {affaire.name}",
+                'affaire_origine_id': affaire.id,
+                'order_line': [
+                    Command.create(self._prepare_ligne_renouvellement(line))
+                    for line in lines_by_order.get(order.id, [])
+                ],
+            })
+
+        devis = self.env['sale.order'].create(vals_list)
+
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Devis de renouvellement',
+            'res_model': 'sale.order',
+            'view_mode': 'list,form',
+            'domain': [('id', 'in', devis.ids)],
+        }
+
+    @api.model
+    def _prepare_ligne_renouvellement(self, line):
+        """Valeurs d'une ligne de devis recopiée depuis la commande d'origine"""
+        if line.display_type:
+            return {
+                'display_type': line.display_type,
+                'name': line.name,
+                'sequence': line.sequence,
+            }
+        return {
+            'product_id': line.product_id.id,
+            'name': line.name,
+            'sequence': line.sequence,
+            'product_uom_qty': line.product_uom_qty,
+            'product_uom': line.product_uom.id,
+            'price_unit': line.price_unit,
+            'discount': line.discount,
+            'tax_id': [Command.set(line.tax_id.ids)],
+        }
+
+    def action_view_devis_renouvellement(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': f'Devis de renouvellement - {self.name}',
+            'res_model': 'sale.order',
+            'view_mode': 'list,form',
+            'domain': [('affaire_origine_id', '=', self.id)],
+            'context': {'default_affaire_origine_id': self.id},
+        }
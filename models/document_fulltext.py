@@ -0,0 +1,176 @@
+# models/document_fulltext.py
+"""Recherche plein texte dans le contenu des rapports PDF / Word.
+
+Le texte est extrait par un cron, uniquement pour les documents nouveaux ou
+modifiés (``content_checksum`` différent de ``file_checksum``), avec les
+bibliothèques locales : lecteur PDF d'Odoo et lecture directe du XML des
+fichiers DOCX. Il est indexé dans une colonne ``tsvector`` avec index GIN.
+"""
+import io
+import logging
+import re
+import threading
+import zipfile
+
+import psycopg2
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+# Configuration de recherche PostgreSQL
+TS_CONFIG = 'french'
+# Texte conservé (affichage, recherche) par document
+MAX_TEXT_LENGTH = 500000
+# Un tsvector est limité à 1 Mo (positions comprises) : seul ce début du texte
+# est indexé, bien en deçà de la limite même pour un texte sans répétitions
+MAX_TSVECTOR_INPUT = 100000
+
+_DOCX_PARAGRAPH = re.compile(r'</w:p>')
+_XML_TAG = re.compile(r'<[^>]+>')
+
+
+def extract_pdf_text(stream):
+    """Texte d'un PDF, page par page"""
+    from odoo.tools.pdf import PdfFileReader
+    reader = PdfFileReader(stream, strict=False)
+    parts = []
+    length = 0
+    for page in reader.pages:
+        text = page.extract_text() if hasattr(page, 'extract_text') else page.extractText()
+        parts.append(text or '')
+        length += len(text or '')
+        if length >= MAX_TEXT_LENGTH:
+            break
+    return '\n'.join(parts)
+
+
+def extract_docx_text(stream):
+    """Texte d'un DOCX lu directement dans word/document.xml"""
+    with zipfile.ZipFile(stream) as docx:
+        xml = docx.read('word/document.xml').decode('utf-8', errors='ignore')
+    xml = _DOCX_PARAGRAPH.sub('\n', xml)
+    return _XML_TAG.sub('', xml)
+
+
+class KesDocumentFulltextMixin(models.AbstractModel):
+    _name = 'kes_inspections.document.fulltext.mixin'
+    _inherit = 'kes_inspections.document.mixin'
+    _description = 'Document indexé en plein texte'
+
+    content_text = fields.Text(string='Contenu extrait', readonly=True, copy=False, prefetch=False)
+    content_checksum = fields.Char(string='Empreinte du contenu indexé', readonly=True, copy=False)
+    content_search = fields.Char(
+        string='Contenu du document',
+        compute='_compute_content_search',
+        search='_search_content_search'
+    )
+
+    def init(self):
+        super().init()
+        if self._abstract:
+            return
+        self.env.cr.execute(f'ALTER TABLE "{self._table}" ADD COLUMN IF NOT EXISTS content_tsv tsvector')
+        self.env.cr.execute(
+            f'CREATE INDEX IF NOT EXISTS "{self._table}_content_tsv_idx" ON "{self._table}" USING GIN (content_tsv)'
+        )
+
+    def _compute_content_search(self):
+        for record in self:
+            record.content_search = False
+
+    def _search_content_search(self, operator, value):
+        if operator not in ('ilike', 'like', '=') or not value:
+            return []
+        self.env.cr.execute(f"""
+            SELECT id FROM "{self._table}"
+             WHERE content_tsv @@ plainto_tsquery(%s, %s)
+        """, (TS_CONFIG, value))
+        return [('id', 'in', [row[0] for row in self.env.cr.fetchall()])]
+
+    def _document_changed(self):
+        super()._document_changed()
+        self._trigger_content_extraction()
+
+    @api.model
+    def _trigger_content_extraction(self):
+        cron = self.env.ref('kes_inspections.ir_cron_extract_document_content', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+
+    # ─────────────────────────────────────────────────────────────
+    # 🔸 EXTRACTION INCRÉMENTALE
+    # ─────────────────────────────────────────────────────────────
+
+    @api.model
+    def _cron_extract_document_content(self, batch_size=50):
+        """Indexe les documents nouveaux ou modifiés de tous les modèles concernés"""
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        for model_name in self.env.registry.descendants(['kes_inspections.document.fulltext.mixin'], '_inherit'):
+            model = self.env[model_name]
+            if model._abstract:
+                continue
+            while True:
+                self.env.cr.execute(f"""
+                    SELECT id FROM "{model._table}"
+                     WHERE file_checksum IS NOT NULL
+                       AND content_checksum IS DISTINCT FROM file_checksum
+                     ORDER BY id
+                     LIMIT %s
+                """, (batch_size,))
+                ids = [row[0] for row in self.env.cr.fetchall()]
+                if not ids:
+                    break
+                model.browse(ids)._extract_content()
+                if auto_commit:
+                    self.env.cr.commit()
+                else:
+                    break
+
+    def _extract_content(self):
+        """Extrait et indexe le texte des documents (une pièce jointe ouverte à la fois)"""
+        attachments = {att.res_id: att for att in self._get_document_attachments()}
+        for record in self:
+            attachment = attachments.get(record.id)
+            text = ''
+            if attachment:
+                try:
+                    text = record._extract_attachment_text(attachment)
+                except Exception as e:
+                    _logger.warning("Extraction impossible pour %s,%s : %s", record._name, record.id, e)
+            text = (text or '')[:MAX_TEXT_LENGTH]
+            try:
+                # Un document en échec ne doit pas annuler l'indexation du lot
+                with self.env.cr.savepoint():
+                    record._write_content(text, text[:MAX_TSVECTOR_INPUT])
+            except psycopg2.Error as e:
+                _logger.warning("Indexation impossible pour %s,%s : %s", record._name, record.id, e)
+                # Empreinte mémorisée sans index pour ne pas réessayer en boucle
+                record._write_content(text, '')
+        self.invalidate_recordset(['content_text', 'content_checksum'])
+
+    def _write_content(self, text, indexed_text):
+        self.ensure_one()
+        self.env.cr.execute(f"""
+            UPDATE "{self._table}"
+               SET content_text = %s,
+                   content_checksum = file_checksum,
+                   content_tsv = to_tsvector(%s, %s)
+             WHERE id = %s
+        """, (text, TS_CONFIG, indexed_text, self.id))
+
+    def _extract_attachment_text(self, attachment):
+        if attachment.store_fname:
+            stream = open(attachment._full_path(attachment.store_fname), 'rb')
+        else:
+            stream = io.BytesIO(attachment.raw or b'')
+        with stream:
+            # Détection par signature : PDF ou conteneur ZIP (DOCX)
+            signature = stream.read(4)
+            stream.seek(0)
+            if signature == b'%PDF':
+                return extract_pdf_text(stream)
+            if signature == b'PK\x03\x04':
+                return extract_docx_text(stream)
+        # Ancien format .doc binaire : pas d'extracteur local fiable
+        return ''
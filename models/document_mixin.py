@@ -0,0 +1,145 @@
+# models/document_mixin.py
+"""Mixin commun aux documents téléversés (rapports, bons de commande, PV...).
+
+Les champs Binary de ces modèles sont stockés en ``ir.attachment`` dont le
+fichier est adressé par son contenu (``<sha1[:2]>/<sha1>``) : un même PDF
+envoyé plusieurs fois n'occupe qu'un fichier dans le filestore. Le mixin
+expose l'empreinte du document sur l'enregistrement (indexée, donc
+recherchable) et fournit la migration qui regroupe les doublons hérités.
+"""
+import base64
+import hashlib
+import logging
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+
+class KesDocumentMixin(models.AbstractModel):
+    _name = 'kes_inspections.document.mixin'
+    _description = 'Document téléversé (dédupliqué par empreinte)'
+
+    # Nom du champ Binary portant le document (à surcharger)
+    _document_field = 'file'
+
+    file_checksum = fields.Char(
+        string='Empreinte du fichier',
+        compute='_compute_file_checksum',
+        store=True,
+        index=True,
+        readonly=True,
+        copy=False
+    )
+
+    @api.depends(lambda self: [self._document_field])
+    def _compute_file_checksum(self):
+        """Reprend l'empreinte SHA-1 de la pièce jointe (une requête pour tout le lot)"""
+        attachments = self._get_document_attachments()
+        checksums = {attachment.res_id: attachment.checksum for attachment in attachments}
+        for record in self:
+            record.file_checksum = checksums.get(record.id, False)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        if any(vals.get(self._document_field) for vals in vals_list):
+            records._document_changed()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if self._document_field in vals:
+            self._document_changed()
+        return res
+
+    def _document_changed(self):
+        """Appelé quand le document des enregistrements change (écriture du champ
+        ou téléversement par morceaux) ; les mixins y branchent leurs traitements"""
+
+    def _get_document_attachments(self):
+        """Pièces jointes portant le document des enregistrements"""
+        ids = [record_id for record_id in self.ids if isinstance(record_id, int)]
+        if not ids:
+            return self.env['ir.attachment']
+        return self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', self._document_field),
+            ('res_id', 'in', ids),
+        ])
+
+    def _find_same_content(self, datas):
+        """Documents du même modèle ayant exactement ce contenu (base64)"""
+        if not datas:
+            return self.browse()
+        checksum = hashlib.sha1(base64.b64decode(datas)).hexdigest()
+        return self.search([('file_checksum', '=', checksum), ('id', 'not in', self._origin.ids)])
+
+    @api.model
+    def _get_document_models(self):
+        """Modèles concrets qui héritent du mixin, avec leur champ document"""
+        result = {}
+        for model_name in self.env.registry.descendants(['kes_inspections.document.mixin'], '_inherit'):
+            model = self.env[model_name]
+            if not model._abstract and not model._transient:
+                result[model_name] = model._document_field
+        return result
+
+    @api.model
+    def _deduplicate_documents(self):
+        """Regroupe les documents identiques sur un seul fichier du filestore.
+
+        Les pièces jointes de même empreinte qui pointent vers des fichiers
+        distincts (fichiers hérités d'anciennes versions ou restaurés à la main)
+        sont rattachées au même fichier ; les copies devenues orphelines sont
+        confiées au ramasse-miettes du filestore. Retourne un rapport chiffré.
+        """
+        Attachment = self.env['ir.attachment'].sudo()
+        report = {'documents': 0, 'doublons': 0, 'octets_partages': 0, 'fichiers_liberes': 0, 'octets_recuperes': 0}
+
+        domain_models = self._get_document_models()
+        if not domain_models:
+            return report
+
+        conditions = []
+        params = []
+        for model_name, field_name in domain_models.items():
+            conditions.append("(res_model = %s AND res_field = %s)")
+            params += [model_name, field_name]
+
+        self.env.cr.execute(f"""
+            SELECT checksum,
+                   array_agg(id ORDER BY id),
+                   array_agg(store_fname ORDER BY id),
+                   MAX(file_size)
+              FROM ir_attachment
+             WHERE checksum IS NOT NULL
+               AND store_fname IS NOT NULL
+               AND ({' OR '.join(conditions)})
+          GROUP BY checksum
+        """, params)
+
+        for checksum, attachment_ids, store_fnames, file_size in self.env.cr.fetchall():
+            report['documents'] += len(attachment_ids)
+            report['doublons'] += len(attachment_ids) - 1
+            report['octets_partages'] += (len(attachment_ids) - 1) * (file_size or 0)
+            canonical = store_fnames[0]
+            obsolete = {fname for fname in store_fnames if fname != canonical}
+            if not obsolete:
+                continue
+            to_repoint = [att_id for att_id, fname in zip(attachment_ids, store_fnames) if fname != canonical]
+            self.env.cr.execute(
+                "UPDATE ir_attachment SET store_fname = %s WHERE id IN %s",
+                (canonical, tuple(to_repoint))
+            )
+            for fname in obsolete:
+                Attachment._file_delete(fname)
+            report['fichiers_liberes'] += len(obsolete)
+            report['octets_recuperes'] += len(obsolete) * (file_size or 0)
+
+        Attachment.invalidate_model(['store_fname'])
+        _logger.info(
+            "Déduplication des documents : %(documents)s document(s), %(doublons)s référence(s) en double "
+            "(%(octets_partages)s octet(s) stockés une seule fois), %(fichiers_liberes)s fichier(s) libéré(s), "
+            "%(octets_recuperes)s octet(s) récupéré(s)", report)
+        return report
@@ -0,0 +1,153 @@
+# models/document_thumbnail.py
+"""Miniatures de première page des rapports.
+
+Générées en arrière-plan par un cron après chaque téléversement, stockées en
+WebP compact (PNG à défaut) et servies par un point d'entrée image cachable :
+les vues liste et kanban affichent un aperçu sans jamais transférer le
+document d'origine.
+"""
+import base64
+import io
+import logging
+import shutil
+import subprocess
+import threading
+import zipfile
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = 256
+
+
+def render_pdf_first_page(path, size=THUMBNAIL_SIZE):
+    """PNG de la première page d'un PDF (PyMuPDF, sinon pdftoppm), ou None"""
+    try:
+        import fitz  # PyMuPDF
+    except ImportError:
+        fitz = None
+    if fitz:
+        with fitz.open(path) as pdf:
+            if not pdf.page_count:
+                return None
+            page = pdf[0]
+            scale = size / max(page.rect.width, page.rect.height)
+            return page.get_pixmap(matrix=fitz.Matrix(scale, scale)).tobytes('png')
+
+    pdftoppm = shutil.which('pdftoppm')
+    if pdftoppm:
+        result = subprocess.run(
+            [pdftoppm, '-f', '1', '-l', '1', '-singlefile', '-png', '-scale-to', str(size), path, '-'],
+            capture_output=True, timeout=60, check=False,
+        )
+        if result.returncode == 0 and result.stdout:
+            return result.stdout
+    return None
+
+
+def docx_embedded_thumbnail(path):
+    """Miniature enregistrée par Word dans docProps/, si présente"""
+    with zipfile.ZipFile(path) as docx:
+        for name in docx.namelist():
+            if name.lower().startswith('docprops/thumbnail.'):
+                return docx.read(name)
+    return None
+
+
+def encode_thumbnail(image_data, size=THUMBNAIL_SIZE):
+    """Réduit l'image et l'encode en WebP (PNG si WebP indisponible)"""
+    from PIL import Image
+    img = Image.open(io.BytesIO(image_data))
+    img.thumbnail((size, size))
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGB')
+    output = io.BytesIO()
+    try:
+        img.save(output, format='WEBP', quality=70, method=4)
+    except (KeyError, OSError):
+        output = io.BytesIO()
+        img.save(output, format='PNG', optimize=True)
+    return output.getvalue()
+
+
+class KesDocumentThumbnailMixin(models.AbstractModel):
+    _name = 'kes_inspections.document.thumbnail.mixin'
+    _inherit = 'kes_inspections.document.mixin'
+    _description = 'Document avec miniature de première page'
+
+    thumbnail = fields.Binary(string='Aperçu', attachment=True, readonly=True, copy=False)
+    thumbnail_checksum = fields.Char(string='Empreinte de la miniature', readonly=True, copy=False)
+    thumbnail_url = fields.Char(string='Aperçu', compute='_compute_thumbnail_url')
+
+    @api.depends('thumbnail_checksum')
+    def _compute_thumbnail_url(self):
+        for record in self:
+            if record.id and record.thumbnail_checksum:
+                record.thumbnail_url = (
+                    f'/kes_inspections/thumbnail/{record._name}/{record.id}?unique={record.thumbnail_checksum[:12]}'
+                )
+            else:
+                record.thumbnail_url = False
+
+    def _document_changed(self):
+        super()._document_changed()
+        self._trigger_thumbnail_generation()
+
+    @api.model
+    def _trigger_thumbnail_generation(self):
+        cron = self.env.ref('kes_inspections.ir_cron_generate_document_thumbnails', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+
+    @api.model
+    def _cron_generate_document_thumbnails(self, batch_size=50):
+        """Génère les miniatures manquantes ou périmées"""
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        for model_name in self.env.registry.descendants(['kes_inspections.document.thumbnail.mixin'], '_inherit'):
+            model = self.env[model_name]
+            if model._abstract:
+                continue
+            while True:
+                self.env.cr.execute(f"""
+                    SELECT id FROM "{model._table}"
+                     WHERE file_checksum IS NOT NULL
+                       AND thumbnail_checksum IS DISTINCT FROM file_checksum
+                     ORDER BY id
+                     LIMIT %s
+                """, (batch_size,))
+                ids = [row[0] for row in self.env.cr.fetchall()]
+                if not ids:
+                    break
+                model.browse(ids)._generate_thumbnails()
+                if auto_commit:
+                    self.env.cr.commit()
+                else:
+                    break
+
+    def _generate_thumbnails(self):
+        attachments = {att.res_id: att for att in self._get_document_attachments()}
+        for record in self:
+            attachment = attachments.get(record.id)
+            thumbnail = False
+            if attachment and attachment.store_fname:
+                try:
+                    thumbnail = record._render_thumbnail(attachment._full_path(attachment.store_fname))
+                except Exception as e:
+                    _logger.warning("Miniature impossible pour %s,%s : %s", record._name, record.id, e)
+            # L'empreinte est mémorisée même sans miniature pour ne pas réessayer en boucle
+            record.write({
+                'thumbnail': thumbnail or False,
+                'thumbnail_checksum': record.file_checksum,
+            })
+
+    def _render_thumbnail(self, path):
+        with open(path, 'rb') as source:
+            signature = source.read(4)
+        if signature == b'%PDF':
+            image = render_pdf_first_page(path)
+        elif signature == b'PK\x03\x04':
+            image = docx_embedded_thumbnail(path)
+        else:
+            image = None
+        return base64.b64encode(encode_thumbnail(image)) if image else False
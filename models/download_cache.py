@@ -0,0 +1,76 @@
+# models/download_cache.py
+"""Pièces jointes temporaires des téléchargements (ZIP d'étiquettes...).
+
+Chaque pièce jointe produite pour un téléchargement porte une clé calculée
+à partir de la sélection demandée et des données qui déterminent son contenu.
+Une nouvelle demande identique réutilise la pièce jointe existante au lieu
+d'en créer une nouvelle ; un cron supprime celles qui ne servent plus depuis
+``kes_inspections.download_ttl_hours`` heures.
+"""
+import hashlib
+import threading
+from datetime import timedelta
+
+from odoo import models, fields, api
+
+
+def download_key(*parts):
+    """Empreinte SHA-1 stable des éléments d'une demande de téléchargement"""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+class IrAttachmentDownload(models.Model):
+    _inherit = 'ir.attachment'
+
+    kes_download_key = fields.Char(string='Clé de téléchargement', index='btree_not_null', copy=False)
+    kes_download_date = fields.Datetime(string='Dernier téléchargement', copy=False)
+
+    @api.model
+    def _get_transient_download(self, key, name, mimetype, producer, res_model=False, res_id=False):
+        """Pièce jointe temporaire de ``key``, créée avec ``producer()`` si besoin.
+
+        La clé inclut l'utilisateur : une pièce jointe sans ``res_id`` n'est
+        lisible que par son créateur.
+        """
+        key = download_key(key, self.env.uid)
+        attachment = self.sudo().search([('kes_download_key', '=', key)], limit=1)
+        if attachment:
+            attachment.kes_download_date = fields.Datetime.now()
+            return attachment.sudo(False)
+        return self.create({
+            'name': name,
+            'type': 'binary',
+            'raw': producer(),
+            'res_model': res_model,
+            'res_id': res_id,
+            'mimetype': mimetype,
+            'kes_download_key': key,
+            'kes_download_date': fields.Datetime.now(),
+        })
+
+    @api.model
+    def _cron_gc_transient_downloads(self, batch_size=500):
+        """Supprime par lots les téléchargements temporaires expirés"""
+        ttl = int(self.env['ir.config_parameter'].sudo().get_param('kes_inspections.download_ttl_hours', 24))
+        limit_date = fields.Datetime.now() - timedelta(hours=ttl)
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        domain = [
+            '|',
+            '&', ('kes_download_key', '!=', False), ('kes_download_date', '<', limit_date),
+            # Copies créées à chaque clic avant l'ajout de la clé
+            '&', '&', '&', ('kes_download_key', '=', False),
+            ('res_model', '=', 'kes_inspections.etiquette'),
+            ('create_date', '<', limit_date),
+            '|',
+            '&', ('res_id', '=', False), ('mimetype', '=', 'application/zip'),
+            ('name', '=like', 'QRCode\\_%.png'),
+        ]
+        while True:
+            attachments = self.sudo().search(domain, limit=batch_size)
+            if not attachments:
+                break
+            attachments.unlink()
+            if auto_commit:
+                self.env.cr.commit()
+            else:
+                break
@@ -3,9 +3,8 @@ from odoo import models, fields, api
 from odoo.exceptions import ValidationError
 import secrets
 import string
-import base64
-from io import BytesIO
-import zipfile
+
+from .generation_lock import acquire_generation_lock, concurrent_run_notification
 
 
 class InspectionEquipement(models.Model):
@@ -65,16 +64,24 @@ class InspectionEquipement(models.Model):
     @api.depends('type_equipement', 'affaire_id', 'affaire_id.equipement_ids')
     def _compute_code_equipement(self):
         """Génère le code équipement basé sur le type et le compteur"""
+        # Équipements par (affaire, type), comptés en une requête pour tout le lot
+        affaires = self.affaire_id
+        counts = {}
+        if affaires:
+            counts = {
+                (affaire.id, type_equipement): count
+                for affaire, type_equipement, count in self._read_group(
+                    [('affaire_id', 'in', affaires.ids)], ['affaire_id', 'type_equipement'], ['__count'])
+            }
         for equipement in self:
             if equipement.type_equipement and equipement.affaire_id:
                 prefix = self._CODE_PREFIXES.get(equipement.type_equipement, 'EQU')
                 
-                # Compter les équipements du même type dans cette affaire
-                same_type_count = self.search_count([
-                    ('affaire_id', '=', equipement.affaire_id.id),
-                    ('type_equipement', '=', equipement.type_equipement),
-                    ('id', '!=', equipement.id)  # Exclure l'équipement actuel
-                ])
+                # Compter les équipements du même type dans cette affaire,
+                # sans l'équipement actuel s'il est déjà enregistré
+                same_type_count = counts.get((equipement.affaire_id.id, equipement.type_equipement), 0)
+                if equipement.id:
+                    same_type_count = max(0, same_type_count - 1)
                 
                 numero = same_type_count + 1
                 equipement.code_equipement = f"{equipement.affaire_id.name}/{prefix}{str(numero).zfill(3)}"
@@ -106,11 +113,16 @@ class InspectionEquipement(models.Model):
         if self.nombre_etiquettes <= 0:
             raise ValidationError("Le nombre d'étiquettes doit être supérieur à 0")
         
+        # Un autre utilisateur régénère déjà cette série : on se rattache à son résultat
+        if not acquire_generation_lock(self):
+            return concurrent_run_notification(self, self.name)
+        
         # Supprimer les anciennes étiquettes
         self.etiquette_ids.unlink()
         
-        # Générer de nouvelles étiquettes uniques
+        # Générer de nouvelles étiquettes uniques (créées en un seul lot)
         codes_generes = set()
+        etiquettes_vals = []
         for i in range(self.nombre_etiquettes):
             # Générer un code unique (éviter les doublons)
             for attempt in range(10):  # 10 tentatives max
@@ -121,14 +133,16 @@ class InspectionEquipement(models.Model):
             else:
                 raise ValidationError("Impossible de générer un code d'étiquette unique")
             
-            # Créer l'étiquette
-            self.env['kes_inspections.etiquette'].create({
+            etiquettes_vals.append({
                 'equipement_id': self.id,
                 'code_etiquette': code_unique,
                 'numero_etiquette': i + 1,
                 'date_generation': fields.Date.today(),
             })
         
+        # Créer les étiquettes
+        self.env['kes_inspections.etiquette'].create(etiquettes_vals)
+        
         return {
             'type': 'ir.actions.client',
             'tag': 'display_notification',
@@ -158,41 +172,22 @@ class InspectionEquipement(models.Model):
         }
     
     def action_generate_zip_etiquettes(self):
-        """Génère un ZIP avec toutes les étiquettes sélectionnées"""
-        if not self:
+        """Génère un ZIP avec toutes les étiquettes des équipements sélectionnés"""
+        etiquettes = self.etiquette_ids
+        if not etiquettes:
             raise ValidationError("Aucune étiquette sélectionnée.")
         
-        zip_buffer = BytesIO()
+        # Pas d'export pendant qu'une génération recrée la série
+        acquire_generation_lock(self, shared=True, wait=False)
         
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for etiquette in self:
-                try:
-                    # Générer l'image
-                    etiquette_image = etiquette.generate_etiquette_image()
-                    
-                    # Convertir en bytes
-                    img_buffer = BytesIO()
-                    etiquette_image.save(img_buffer, format='PNG')
-                    img_buffer.seek(0)
-                    
-                    # Ajouter au ZIP
-                    filename = f"etiquette_{etiquette.code_etiquette}.png"
-                    zip_file.writestr(filename, img_buffer.getvalue())
-                    
-                except Exception as e:
-                    raise ValidationError(f"Erreur avec l'étiquette {etiquette.code_etiquette}: {str(e)}")
-        
-        zip_buffer.seek(0)
-        zip_data = base64.b64encode(zip_buffer.getvalue())
-        
-        # Créer attachment pour téléchargement
-        attachment = self.env['ir.attachment'].create({
-            'name': f'etiquettes_{fields.Datetime.now().strftime("%Y%m%d_%H%M%S")}.zip',
-            'type': 'binary',
-            'datas': zip_data,
-            'res_model': 'kes_inspections.etiquette',
-            'mimetype': 'application/zip'
-        })
+        # 🔹 Même sélection, mêmes données : on réutilise le ZIP déjà produit
+        attachment = self.env['ir.attachment']._get_transient_download(
+            ('etiquettes_zip', etiquettes._get_render_key()),
+            f'etiquettes_{fields.Datetime.now().strftime("%Y%m%d_%H%M%S")}.zip',
+            'application/zip',
+            etiquettes._render_zip_etiquettes,
+            res_model='kes_inspections.etiquette',
+        )
         
         return {
             'type': 'ir.actions.act_url',
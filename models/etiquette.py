@@ -1,15 +1,24 @@
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError
 import base64
+import importlib.util
 from io import BytesIO
-import qrcode
+import logging
 import zipfile
+from urllib.parse import urlencode
 
-try:
-    from PIL import Image, ImageDraw, ImageFont
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
+from ..rendering import LabelSpec, TextSpec
+from ..rendering.qr import qr_code
+from ..rendering.timing import NULL_TIMER
+from .generation_lock import acquire_generation_lock
+from .download_cache import download_key
+from .label_template import PREVIEW_WIDTH
+from .perf_sample import perf_probe
+
+_logger = logging.getLogger(__name__)
+
+# Pillow (via ``rendering.raster``) n'est importé qu'au premier rendu
+PIL_AVAILABLE = importlib.util.find_spec('PIL') is not None
 
 class InspectionEtiquette(models.Model):
     _name = 'kes_inspections.etiquette'
@@ -79,6 +88,9 @@ class InspectionEtiquette(models.Model):
     # QR Code
     qr_code = fields.Binary(string='QR Code', compute='_generate_qr_code', store=True)
     qr_code_url = fields.Char(string='URL QR Code', compute='_generate_qr_code', store=True)
+
+    # Aperçu basse résolution (pièce jointe par clé de rendu, cf. _get_preview)
+    preview_url = fields.Char(string='Aperçu', compute='_compute_preview_url')
     
     # Mapping des templates
     _MAPPING_EQUIPEMENT_TEMPLATE = {
@@ -126,10 +138,7 @@ class InspectionEtiquette(models.Model):
                 url = f"{base_url}/inspection/etiquette/{etiquette.code_etiquette}"
                 etiquette.qr_code_url = url
 
-                qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=4)
-                qr.add_data(url)
-                qr.make(fit=True)
-                img = qr.make_image(fill_color="black", back_color="white")
+                img = qr_code(url).make_image(fill_color="black", back_color="white")
 
                 buffer = BytesIO()
                 img.save(buffer, format="PNG")
@@ -140,24 +149,110 @@ class InspectionEtiquette(models.Model):
 
     def _get_default_font(self, size=12, bold=False):
         """Retourne une police par défaut, optionnellement en gras"""
+        from ..rendering.raster import load_font
+        return load_font(size, bold)
+
+    def _get_qr_payload(self):
+        """Contenu du QR Code imprimé sur l'étiquette"""
+        self.ensure_one()
+        partner_name = self.partner_id.name if self.partner_id else "Client non défini"
+        product_name = self.product_id.name if self.product_id else "N/A"
+        return f"{self.code_etiquette}\nClient: {partner_name}\nProduit: {product_name}"
+
+    def _get_label_text(self):
+        """Texte imprimé sur l'étiquette : client/lieu/numéro (8 caractères max par partie)"""
+        self.ensure_one()
+        client_name = self.partner_id.name if self.partner_id else "Client"
+        # Lieu d'intervention depuis l'affaire principale
+        lieu_intervention = self.affaire_id.lieu_intervention or self.affaire_id.site_intervention or "Lieu"
+        return f"{client_name[:8]}/{lieu_intervention[:8]}/{self.numero_etiquette}"
+
+    def _get_label_spec(self, scale=None):
+        """Contenu variable de l'étiquette pour le paquet ``rendering``
+
+        Textes à l'échelle du fond de rendu du modèle, ou à ``scale`` (aperçus).
+        """
+        self.ensure_one()
+        template = self.label_template_id
+        texts = ()
+        if template.client_name_x and template.client_name_y:
+            texts = (TextSpec(template.client_name_x, template.client_name_y, self._get_label_text(),
+                              template.font_size, template.font_color),)
+        label = LabelSpec(qr_payload=self._get_qr_payload(), texts=texts)
+        if scale is None:
+            scale = template._get_render_scale() if template else 1.0
+        return label.scaled(scale)
+
+    def _get_preview_keys(self):
+        """{id: clé de l'aperçu} ; la clé change avec les données de rendu"""
+        return {
+            render_key[0]: download_key('etiquette_preview', PREVIEW_WIDTH, render_key)
+            for render_key in self._get_render_key()
+        }
+
+    @api.depends('code_etiquette', 'numero_etiquette', 'partner_id.name', 'product_id.name',
+                 'affaire_id.lieu_intervention', 'affaire_id.site_intervention', 'label_template_id')
+    def _compute_preview_url(self):
+        etiquettes = self.filtered(lambda etiquette: etiquette.id and etiquette.label_template_id)
+        # Modèles lus une fois pour toute la liste, clés calculées en un passage
+        etiquettes.label_template_id.fetch(['write_date'])
+        keys = etiquettes._get_preview_keys()
+        for etiquette in self:
+            key = keys.get(etiquette.id)
+            etiquette.preview_url = (
+                f'/kes_inspections/etiquette/{etiquette.id}/preview?unique={key[:12]}' if key else False
+            )
+
+    def _get_preview(self):
+        """Pièce jointe PNG de l'aperçu, rendue seulement si les données ont changé.
+
+        L'aperçu est une pièce jointe repérée par sa clé (``kes_download_key``) :
+        la ligne de l'étiquette n'est jamais modifiée par l'affichage. Sans
+        ``kes_download_date``, elle échappe à la purge des téléchargements ; elle
+        est remplacée au rendu suivant et supprimée avec l'étiquette. Retourne
+        une pièce jointe vide si l'aperçu ne peut pas être rendu.
+        """
+        self.ensure_one()
+        Attachment = self.env['ir.attachment'].sudo()
+        key = self._get_preview_keys()[self.id]
+        attachment = Attachment.search([('kes_download_key', '=', key)], limit=1)
+        if attachment or not PIL_AVAILABLE:
+            return attachment
+        spec = self.label_template_id._get_preview_spec()
+        if not spec:
+            return Attachment
+        from ..rendering.raster import encode_png, render_label_image
         try:
-            if bold:
-                # Essayer d'abord une police en gras
-                try:
-                    return ImageFont.truetype("/usr/share/fonts/dejavu/DejaVuSans-Bold.ttf", size)
-                except:
-                    # Fallback : utiliser la police normale en augmentant la taille pour simuler le gras
-                    return ImageFont.truetype("/usr/share/fonts/dejavu/DejaVuSans.ttf", int(size * 1.1))
-            else:
-                return ImageFont.truetype("/usr/share/fonts/dejavu/DejaVuSans.ttf", size)
-        except:
-            try:
-                return ImageFont.load_default()
-            except:
-                return None
-            
-    def generate_etiquette_image(self):
-        """Génère l'image de l'étiquette avec le template"""
+            image = render_label_image(spec, self._get_label_spec(self.label_template_id.preview_scale))
+            data = encode_png(image, optimize=True)
+        except Exception as e:
+            _logger.warning("Aperçu impossible pour l'étiquette %s : %s", self.code_etiquette, e)
+            return Attachment
+        name = f"apercu_etiquette_{self.id}.png"
+        attachment = Attachment.create({
+            'name': name,
+            'type': 'binary',
+            'raw': data,
+            'res_model': self._name,
+            'res_id': self.id,
+            'mimetype': 'image/png',
+            'kes_download_key': key,
+        })
+        # Aperçus périmés de cette étiquette
+        Attachment.search([
+            ('res_model', '=', self._name),
+            ('res_id', '=', self.id),
+            ('name', '=', name),
+            ('id', '!=', attachment.id),
+        ]).unlink()
+        return attachment
+
+    def generate_etiquette_image(self, timer=None):
+        """Génère l'image de l'étiquette avec le template
+
+        Appelée seule, la génération est mesurée (``perf_sample``) ; un export
+        passe son propre ``timer`` pour cumuler les étapes de toutes les étiquettes.
+        """
         self.ensure_one()
         
         if not self.label_template_id:
@@ -169,87 +264,13 @@ class InspectionEtiquette(models.Model):
         if not PIL_AVAILABLE:
             raise ValidationError("La bibliothèque PIL/Pillow n'est pas installée.")
         
+        from ..rendering.raster import render_label_image
         try:
-            # Charger l'image template
-            template_data = base64.b64decode(self.label_template_id.template_image)
-            base_img = Image.open(BytesIO(template_data))
-            
-            if base_img.mode not in ('RGB', 'RGBA'):
-                base_img = base_img.convert('RGBA')
-            
-            original_size = base_img.size
-            
-            # Générer QR code
-            partner_name = self.partner_id.name if self.partner_id else "Client non défini"
-            product_name = self.product_id.name if self.product_id else "N/A"
-            qr_data = f"{self.code_etiquette}\nClient: {partner_name}\nProduit: {product_name}"
-            
-            qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=4)
-            qr.add_data(qr_data)
-            qr.make(fit=True)
-            qr_img = qr.make_image(fill_color="black", back_color="white")
-            qr_img = qr_img.resize((self.label_template_id.qr_size, self.label_template_id.qr_size), Image.Resampling.LANCZOS)
-            
-            # Coller QR code
-            if base_img.mode == 'RGBA':
-                base_img.paste(qr_img, (self.label_template_id.qr_position_x, self.label_template_id.qr_position_y), qr_img)
-            else:
-                base_img.paste(qr_img, (self.label_template_id.qr_position_x, self.label_template_id.qr_position_y))
-            
-            # Ajouter texte
-            draw = ImageDraw.Draw(base_img)
-            font = self._get_default_font(self.label_template_id.font_size)
-            
-            # 🔥 SUPPRIMÉ : Ancien bloc pour le code étiquette
-            # if self.label_template_id.client_number_x and self.label_template_id.client_number_y:
-            #     draw.text(
-            #         (self.label_template_id.client_number_x, self.label_template_id.client_number_y),
-            #         self.code_etiquette,
-            #         fill=self.label_template_id.font_color,
-            #         font=font
-            #     )
-            
-            # 🔥 NOUVEAU : Format client/lieu_intervention/numero_etiquette
-            if self.label_template_id.client_name_x and self.label_template_id.client_name_y:
-                # Récupérer le nom du client
-                client_name = self.partner_id.name if self.partner_id else "Client"
-                
-                # Récupérer le lieu d'intervention depuis l'affaire principale
-                lieu_intervention = ""
-                if self.affaire_id and self.affaire_id.lieu_intervention:
-                    lieu_intervention = self.affaire_id.lieu_intervention
-                elif self.affaire_id and self.affaire_id.site_intervention:
-                    lieu_intervention = self.affaire_id.site_intervention
-                else:
-                    lieu_intervention = "Lieu"
-                
-                # Limiter à 8 caractères maximum pour chaque partie
-                if len(client_name) > 8:
-                    client_formatted = client_name[:8]
-                else:
-                    client_formatted = client_name
-                
-                if len(lieu_intervention) > 8:
-                    lieu_formatted = lieu_intervention[:8]
-                else:
-                    lieu_formatted = lieu_intervention
-                
-                # 🔥 FORMAT : client/lieu/numero
-                client_text = f"{client_formatted}/{lieu_formatted}/{self.numero_etiquette}"
-                
-                draw.text(
-                    (self.label_template_id.client_name_x, self.label_template_id.client_name_y),
-                    client_text,
-                    fill=self.label_template_id.font_color,
-                    font=font
-                )
-            
-            # Redimensionner si nécessaire
-            if base_img.size != original_size:
-                base_img = base_img.resize(original_size, Image.Resampling.LANCZOS)
-            
-            return base_img
-            
+            if timer is not None:
+                return render_label_image(self.label_template_id._get_render_spec(), self._get_label_spec(), timer)
+            with perf_probe(self.env, 'etiquette.generate_etiquette_image') as probe:
+                probe.label_count = 1
+                return render_label_image(self.label_template_id._get_render_spec(), self._get_label_spec(), probe)
         except Exception as e:
             raise ValidationError(f"Erreur lors de la génération d'image: {str(e)}")
         
@@ -257,8 +278,16 @@ class InspectionEtiquette(models.Model):
         """Génère un ZIP avec toutes les étiquettes sélectionnées"""
         if not self:
             raise ValidationError("Aucune étiquette sélectionnée.")
-        
-        zip_buffer = BytesIO()
+
+        with perf_probe(self.env, 'etiquette.action_generate_zip_etiquettes') as probe:
+            probe.label_count = len(self)
+            return self._generate_zip_etiquettes(probe)
+
+    def _generate_zip_etiquettes(self, probe):
+        # Pas d'export pendant qu'une génération recrée la série
+        with probe.stage('lock'):
+            acquire_generation_lock(self.mapped('sous_affaire_id'), shared=True, wait=False)
+            acquire_generation_lock(self.mapped('equipement_id'), shared=True, wait=False)
         
         # 🔥 CORRECTION : Nom du ZIP basé sur la référence de la sous-affaire SANS créer de dossiers
         if len(self) == 1:
@@ -275,52 +304,81 @@ class InspectionEtiquette(models.Model):
                 # Étiquettes de différentes sous-affaires : nom générique
                 zip_folder_name = f"etiquettes_{fields.Datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
+        # 🔹 Même sélection, mêmes données : on réutilise le ZIP déjà produit
+        zip_filename = f"{zip_folder_name}.zip"
+        with probe.stage('key'):
+            key = self._get_render_key()
+        # Temps de l'étape « attachment » : recherche et écriture de la pièce
+        # jointe, hors rendu (mesuré par étape dans _render_zip_etiquettes)
+        with probe.stage('attachment'):
+            attachment = self.env['ir.attachment']._get_transient_download(
+                ('etiquettes_zip', key),
+                zip_filename,
+                'application/zip',
+                lambda: self._render_zip_etiquettes(probe),
+                res_model='kes_inspections.etiquette',
+            )
+        probe.bytes_out = attachment.file_size
+
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/web/content/{attachment.id}?download=true',
+            'target': 'self',
+        }
+
+    def _get_render_key(self):
+        """Données qui déterminent le rendu des étiquettes (clé de cache)"""
+        return tuple(
+            (
+                etiquette.id,
+                etiquette.code_etiquette,
+                etiquette.numero_etiquette,
+                etiquette.partner_id.name,
+                etiquette.product_id.name,
+                etiquette.affaire_id.lieu_intervention,
+                etiquette.affaire_id.site_intervention,
+                etiquette.label_template_id.id,
+                str(etiquette.label_template_id.write_date),
+            )
+            for etiquette in self.sorted('id')
+        )
+
+    def _render_zip_etiquettes(self, timer=NULL_TIMER):
+        """Contenu du ZIP des images d'étiquettes"""
+        from ..rendering.raster import encode_png
+        zip_buffer = BytesIO()
         with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
             for etiquette in self:
                 try:
                     # Générer l'image
-                    etiquette_image = etiquette.generate_etiquette_image()
-                    
+                    etiquette_image = etiquette.generate_etiquette_image(timer)
+
                     # Convertir en bytes
-                    img_buffer = BytesIO()
-                    etiquette_image.save(img_buffer, format='PNG')
-                    img_buffer.seek(0)
-                    
+                    image_data = encode_png(etiquette_image, timer=timer)
+
                     # 🔥 CORRECTION : Nom de fichier SIMPLE sans chemin
                     filename = f"etiquette_{etiquette.code_etiquette}.png"
-                    zip_file.writestr(filename, img_buffer.getvalue())
-                    
+                    with timer.stage('zip'):
+                        zip_file.writestr(filename, image_data)
+
                 except Exception as e:
                     raise ValidationError(f"Erreur avec l'étiquette {etiquette.code_etiquette}: {str(e)}")
-        
-        zip_buffer.seek(0)
-        zip_data = base64.b64encode(zip_buffer.getvalue())
-        
-        # 🔥 CORRECTION : Nom du fichier ZIP propre
-        zip_filename = f"{zip_folder_name}.zip"
-        
-        # Créer attachment pour téléchargement
-        attachment = self.env['ir.attachment'].create({
-            'name': zip_filename,
-            'type': 'binary',
-            'datas': zip_data,
-            'res_model': 'kes_inspections.etiquette',
-            'mimetype': 'application/zip'
-        })
-        
-        return {
-            'type': 'ir.actions.act_url',
-            'url': f'/web/content/{attachment.id}?download=true',
-            'target': 'self',
-        }
+        return zip_buffer.getvalue()
 
-    @api.model
-    def create(self, vals):
-        if 'code_etiquette' in vals:
-            existing = self.search([('code_etiquette', '=', vals['code_etiquette'])], limit=1)
+    @api.model_create_multi
+    def create(self, vals_list):
+        # Une seule recherche pour tous les codes du lot
+        codes = [vals['code_etiquette'] for vals in vals_list if vals.get('code_etiquette')]
+        if codes:
+            seen = set()
+            for code in codes:
+                if code in seen:
+                    raise ValidationError(f"Le code étiquette {code} existe déjà!")
+                seen.add(code)
+            existing = self.search([('code_etiquette', 'in', codes)], limit=1)
             if existing:
-                raise ValidationError(f"Le code étiquette {vals['code_etiquette']} existe déjà!")
-        return super().create(vals)
+                raise ValidationError(f"Le code étiquette {existing.code_etiquette} existe déjà!")
+        return super().create(vals_list)
     
 
 
@@ -331,23 +389,16 @@ class InspectionEtiquette(models.Model):
         if not self.qr_code:
             raise ValidationError("Aucun QR Code disponible pour cette étiquette.")
         
-        # Créer un attachment temporaire
-        filename = f"QRCode_{self.code_etiquette}.png"
-        
-        attachment = self.env['ir.attachment'].create({
-            'name': filename,
-            'type': 'binary',
-            'datas': self.qr_code,
-            'res_model': 'kes_inspections.etiquette',
-            'res_id': self.id,
-            'mimetype': 'image/png'
-        })
-        
-        # Retourner l'URL de téléchargement de l'attachment
-        download_url = f'/web/content/{attachment.id}?download=true'
+        # Le QR Code est déjà stocké en pièce jointe : téléchargement direct du
+        # champ, sans créer de copie à chaque clic
+        filename = f"QRCode_{self.code_etiquette}.png".replace('/', '_')
+        download_url = (
+            f'/web/content/kes_inspections.etiquette/{self.id}/qr_code'
+            f'?download=true&{urlencode({"filename": filename})}'
+        )
         
         return {
             'type': 'ir.actions.act_url',
             'url': download_url,
             'target': 'new',  # Ouvre dans un nouvel onglet/fenêtre
-        }
\ No newline at end of file
+        }
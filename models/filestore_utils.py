@@ -0,0 +1,63 @@
+# models/filestore_utils.py
+"""Rangement direct de fichiers volumineux dans le filestore.
+
+``ir.attachment.create({'raw': ...})`` impose d'avoir tout le contenu en
+mémoire. Ici le fichier, déjà écrit sur disque, est haché par blocs puis
+déplacé à son emplacement adressé par le contenu (``<sha1[:2]>/<sha1>``),
+comme le fait ``ir.attachment._file_write``.
+"""
+import hashlib
+import os
+
+COPY_BUFFER = 1024 * 1024
+
+
+def file_sha1(path):
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as source:
+        for buffer in iter(lambda: source.read(COPY_BUFFER), b''):
+            sha1.update(buffer)
+    return sha1.hexdigest()
+
+
+def move_to_filestore(env, path, checksum=None):
+    """Déplace ``path`` dans le filestore ; retourne (store_fname, checksum, taille)"""
+    checksum = checksum or file_sha1(path)
+    size = os.path.getsize(path)
+    store_fname = f'{checksum[:2]}/{checksum}'
+    full_path = env['ir.attachment']._full_path(store_fname)
+    if os.path.exists(full_path):
+        os.remove(path)
+    else:
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        os.replace(path, full_path)
+    return store_fname, checksum, size
+
+
+def attach_file(env, path, name, res_model, res_id, res_field=False, mimetype=None, checksum=None):
+    """Crée la pièce jointe d'un fichier du disque sans le charger en mémoire"""
+    store_fname, checksum, size = move_to_filestore(env, path, checksum)
+    attachment = env['ir.attachment'].sudo().create({
+        'name': name,
+        'type': 'binary',
+        'res_model': res_model,
+        'res_field': res_field,
+        'res_id': res_id,
+        'mimetype': mimetype or 'application/octet-stream',
+    })
+    # ir.attachment.create écarte store_fname / file_size / checksum (calculés
+    # d'après le contenu) : le fichier déjà rangé est rattaché en SQL
+    env.cr.execute("""
+        UPDATE ir_attachment
+           SET store_fname = %s, file_size = %s, checksum = %s
+         WHERE id = %s
+    """, (store_fname, size, checksum, attachment.id))
+    attachment.invalidate_recordset(['store_fname', 'file_size', 'checksum', 'raw', 'datas'])
+    return attachment
+
+
+def temp_path(env, name):
+    """Chemin de travail dans le filestore (même disque que la destination)"""
+    path = env['ir.attachment']._full_path(f'kes_tmp/{name}')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
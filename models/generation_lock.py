@@ -0,0 +1,92 @@
+# models/generation_lock.py
+"""Verrous consultatifs PostgreSQL autour de la génération des étiquettes.
+
+Deux utilisateurs qui lancent « Générer » sur le même équipement ou la même
+sous-affaire suppriment puis recréent la même série : le second finit en
+échec de sérialisation après avoir rendu toutes ses images pour rien.
+Les verrous sont pris au niveau de la transaction (``pg_*_advisory_xact_lock``)
+et donc libérés automatiquement au commit ou au rollback.
+"""
+import zlib
+
+from odoo.exceptions import UserError
+
+# Délai d'attente maximal d'une exécution concurrente. Au-delà, PostgreSQL lève
+# LockNotAvailable et Odoo rejoue la requête HTTP dans une nouvelle transaction.
+LOCK_WAIT_TIMEOUT = '5s'
+
+
+def _lock_keys(scope, ids):
+    """Clés (espace, id) triées pour éviter les interblocages"""
+    namespace = zlib.crc32(scope.encode()) & 0x7FFFFFFF
+    return [(namespace, record_id) for record_id in sorted(set(ids))]
+
+
+def acquire_generation_lock(records, shared=False, wait=True):
+    """Verrouille ``records`` pour une génération ou un export.
+
+    Retourne True si le verrou a été obtenu immédiatement. Si une autre
+    exécution le détient :
+
+    * ``wait=True`` : attend sa fin (au plus LOCK_WAIT_TIMEOUT) puis retourne
+      False ; l'appelant doit alors réutiliser le résultat de l'exécution
+      concurrente (``check_concurrent_run``) au lieu de refaire le travail ;
+    * ``wait=False`` : lève immédiatement une UserError.
+    """
+    cr = records.env.cr
+    keys = _lock_keys(records._name, records.ids)
+    try_lock = 'pg_try_advisory_xact_lock_shared' if shared else 'pg_try_advisory_xact_lock'
+    lock = 'pg_advisory_xact_lock_shared' if shared else 'pg_advisory_xact_lock'
+
+    contended = []
+    for namespace, record_id in keys:
+        cr.execute(f"SELECT {try_lock}(%s, %s)", (namespace, record_id))
+        if not cr.fetchone()[0]:
+            contended.append((namespace, record_id))
+
+    if not contended:
+        return True
+
+    if not wait:
+        raise UserError(
+            "Une génération d'étiquettes est déjà en cours sur ces enregistrements. "
+            "Veuillez réessayer dans quelques instants."
+        )
+
+    cr.execute("SET LOCAL lock_timeout = %s", (LOCK_WAIT_TIMEOUT,))
+    for namespace, record_id in contended:
+        cr.execute(f"SELECT {lock}(%s, %s)", (namespace, record_id))
+    cr.execute("SET LOCAL lock_timeout = DEFAULT")
+    return False
+
+
+def check_concurrent_run(records):
+    """Vérifie, après attente du verrou, que l'exécution concurrente a produit des étiquettes.
+
+    Si elle a été annulée (rollback), rien n'a été généré ; et en lecture
+    répétable ses lignes peuvent rester invisibles pour la transaction en
+    cours. Dans les deux cas on ne prétend pas que le travail est fait :
+    l'utilisateur relance simplement l'action.
+    """
+    records.invalidate_recordset(['etiquette_ids'])
+    if not records.etiquette_ids:
+        raise UserError(
+            "Une génération d'étiquettes était en cours sur ces enregistrements. "
+            "Veuillez réessayer dans quelques instants."
+        )
+
+
+def concurrent_run_notification(records, name):
+    """Notification renvoyée quand on s'est rattaché à une exécution concurrente"""
+    check_concurrent_run(records)
+    return {
+        'type': 'ir.actions.client',
+        'tag': 'display_notification',
+        'params': {
+            'title': 'Génération déjà effectuée',
+            'message': f"Les étiquettes de {name} viennent d'être générées par un autre utilisateur. "
+                       "Rechargez la page pour les afficher.",
+            'type': 'warning',
+            'sticky': False,
+        }
+    }
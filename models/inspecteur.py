@@ -53,13 +53,16 @@ class InspectionInspecteur(models.Model):
     @api.depends('employee_id')
     def _compute_planning_sous_affaires(self):
         """Calcule les sous-affaires où l'inspecteur est assigné"""
+        # Affectations de tous les inspecteurs en une requête
+        sous_affaires_by_employee = {}
+        if self.employee_id:
+            for employee, sous_affaires in self.env['kes_inspections.sous_affaire_inspecteur']._read_group(
+                    [('inspecteur_id', 'in', self.employee_id.ids)], ['inspecteur_id'], ['sous_affaire_id:recordset']):
+                sous_affaires_by_employee[employee.id] = sous_affaires.ids
         for inspecteur in self:
             if inspecteur.employee_id:
                 # Récupérer toutes les sous-affaires où cet employé est inspecteur
-                sous_affaires = self.env['kes_inspections.sous_affaire_inspecteur'].search([
-                    ('inspecteur_id', '=', inspecteur.employee_id.id)
-                ]).mapped('sous_affaire_id')
-                inspecteur.planning_sous_affaire_ids = [(6, 0, sous_affaires.ids)]
+                inspecteur.planning_sous_affaire_ids = [(6, 0, sous_affaires_by_employee.get(inspecteur.employee_id.id, []))]
             else:
                 inspecteur.planning_sous_affaire_ids = [(5, 0, 0)]
 
@@ -49,7 +49,8 @@ class InspectionAffaire(models.Model):
     date_prochaine_inspection = fields.Date(
         string='Date prochaine inspection',
         compute='_compute_date_prochaine_inspection',
-        store=True
+        store=True,
+        index=True
     )
     
     # 🔹 DÉPARTEMENT DEPUIS LA VENTE
@@ -142,41 +143,52 @@ class InspectionAffaire(models.Model):
     # 🔸 MÉTHODES CRUD
     # ─────────────────────────────────────────────────────────────
     
-    @api.model
-    def create(self, vals):
-        if not vals.get('name') or vals['name'] == 'Nouvelle':
-            order_ref = ''
-            if vals.get('sale_order_id'):
-                order = self.env['sale.order'].browse(vals['sale_order_id'])
-                order_ref = order.name or ''
-            
+    @api.model_create_multi
+    def create(self, vals_list):
+        # Numérotation du lot à partir de la dernière affaire : une seule recherche
+        to_number = [vals for vals in vals_list if not vals.get('name') or vals['name'] == 'Nouvelle']
+        if to_number:
+            orders = self.env['sale.order'].browse(
+                [vals['sale_order_id'] for vals in to_number if vals.get('sale_order_id')])
+            order_refs = {order.id: order.name or '' for order in orders}
             last_affaire = self.search([], order='id desc', limit=1)
             next_num = (int(last_affaire.name.split('/I')[-1]) + 1) if last_affaire and '/I' in last_affaire.name else 1
-            inspection_seq = str(next_num).zfill(3)
-            
-            vals['name'] = f"{order_ref}/I{inspection_seq}" if order_ref else f"I{inspection_seq}"
-        
-        return super(InspectionAffaire, self).create(vals)
+            for vals in to_number:
+                order_ref = order_refs.get(vals.get('sale_order_id'), '')
+                inspection_seq = str(next_num).zfill(3)
+                vals['name'] = f"{order_ref}/I{inspection_seq}" if order_ref else f"I{inspection_seq}"
+                next_num += 1
+
+        return super(InspectionAffaire, self).create(vals_list)
 
     @api.model
     def create_from_sale_order(self, order):
         """Crée une affaire depuis une commande de vente"""
-        for line in order.order_line:
-            if line.product_id.categ_id and 'inspection' in line.product_id.categ_id.name.lower():
-                existing = self.search([('sale_order_id', '=', order.id)], limit=1)
-                if not existing:
-                    # Trouver un chargé d'affaire par défaut
-                    charge_affaire = self.env['hr.employee'].search([
-                        ('department_id.name', '=', 'INSPECTION')
-                    ], limit=1)
-                    
-                    return self.create({
-                        'sale_order_id': order.id,
-                        'client_id': order.partner_id.id,
-                        'site_intervention': order.partner_id.name or 'Site client',
-                        'charge_affaire_id': charge_affaire.id if charge_affaire else False,
-                    })
-        return False
+        return self._create_from_sale_orders(order)[:1] or False
+
+    @api.model
+    def _create_from_sale_orders(self, orders):
+        """Crée en un lot les affaires des commandes comportant une prestation d'inspection"""
+        orders = orders.filtered(lambda order: any(
+            line.product_id.categ_id and 'inspection' in line.product_id.categ_id.name.lower()
+            for line in order.order_line
+        ))
+        if not orders:
+            return self.browse()
+        existing = self.search([('sale_order_id', 'in', orders.ids)])
+        orders -= existing.sale_order_id
+        if not orders:
+            return self.browse()
+        # Trouver un chargé d'affaire par défaut
+        charge_affaire = self.env['hr.employee'].search([
+            ('department_id.name', '=', 'INSPECTION')
+        ], limit=1)
+        return self.create([{
+            'sale_order_id': order.id,
+            'client_id': order.partner_id.id,
+            'site_intervention': order.partner_id.name or 'Site client',
+            'charge_affaire_id': charge_affaire.id if charge_affaire else False,
+        } for order in orders])
 
     # ─────────────────────────────────────────────────────────────
     # 🔸 ACTIONS
@@ -241,40 +253,3 @@ class InspectionAffaire(models.Model):
                 'sticky': False,
             }
         }
-
-# Surcharge Sale Order
-class SaleOrder(models.Model):
-    _inherit = 'sale.order'
-
-    inspection_affaire_count = fields.Integer(
-        string="Affaires d'Inspection",
-        compute='_compute_inspection_affaire_count'
-    )
-
-    def _compute_inspection_affaire_count(self):
-        for order in self:
-            order.inspection_affaire_count = self.env['kes_inspections.affaire'].search_count([
-                ('sale_order_id', '=', order.id)
-            ])
-
-    def action_confirm(self):
-        res = super(SaleOrder, self).action_confirm()
-        for order in self:
-            for line in order.order_line:
-                if line.product_id.categ_id and 'inspection' in line.product_id.categ_id.name.lower():
-                    self.env['kes_inspections.affaire'].create_from_sale_order(order)
-                    break
-        return res
-
-    def action_open_inspection_affaire(self):
-        self.ensure_one()
-        affaire = self.env['kes_inspections.affaire'].search([('sale_order_id', '=', self.id)], limit=1)
-        if affaire:
-            return {
-                'type': 'ir.actions.act_window',
-                'name': 'Affaire dInspection',
-                'res_model': 'kes_inspections.affaire',
-                'res_id': affaire.id,
-                'view_mode': 'form',
-                'target': 'current',
-            }
\ No newline at end of file
@@ -1,11 +1,13 @@
 import base64
 import io
 import zipfile
-from PIL import Image, ImageDraw, ImageFont
-import qrcode
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 
+from ..rendering import LabelSpec, TextSpec
+from ..rendering.timing import NULL_TIMER
+from .perf_sample import perf_probe
+
 class LabelGenerator(models.Model):
     _name = 'label.generator'
     _description = 'Générateur d\'étiquettes'
@@ -32,25 +34,13 @@ class LabelGenerator(models.Model):
     @api.model
     def _get_default_font(self):
         """Retourne une police par défaut"""
-        try:
-            return ImageFont.truetype("/usr/share/fonts/dejavu/DejaVuSans.ttf", 12)
-        except:
-            return ImageFont.load_default()
+        from ..rendering.raster import load_font
+        return load_font(12)
     
     def generate_qr_code(self, data, size=100):
         """Génère un QR code"""
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_H,
-            box_size=10,
-            border=1,
-        )
-        qr.add_data(data)
-        qr.make(fit=True)
-        
-        qr_img = qr.make_image(fill_color="black", back_color="white")
-        qr_img = qr_img.resize((size, size), Image.Resampling.LANCZOS)
-        return qr_img
+        from ..rendering.raster import build_qr_image
+        return build_qr_image(LabelSpec(qr_payload=data, qr_error_correction='H', qr_border=1), size)
     
     def _generate_unique_label_number(self, partner, product, sequence):
         """Génère un numéro unique pour l'étiquette"""
@@ -58,73 +48,40 @@ class LabelGenerator(models.Model):
         # P = Partner ID, P = Product ID, N = Sequence
         return f"P{partner.id:05d}-P{product.id:05d}-{sequence:04d}"
     
-    def create_label(self, template, partner, product, label_number, unique_code):
+    def _get_label_spec(self, template, partner, product, label_number, unique_code):
+        """Contenu variable de l'étiquette pour le paquet ``rendering``"""
+        qr_data = f"{unique_code}\nClient: {partner.name}\nProduit: {product.name}\nN°: {label_number}"
+        texts = [
+            # Code unique
+            TextSpec(template.client_number_x, template.client_number_y, unique_code, 12, template.font_color),
+            # Nom client
+            TextSpec(template.client_name_x, template.client_name_y, f"{partner.name[:20]}", 12, template.font_color),
+        ]
+        # Nom du produit (si espace disponible)
+        if 'product_name_x' in template._fields and 'product_name_y' in template._fields:
+            texts.append(TextSpec(template.product_name_x, template.product_name_y,
+                                  f"{product.name[:25]}", 12, template.font_color))
+        label = LabelSpec(qr_payload=qr_data, texts=tuple(texts), qr_error_correction='H', qr_border=1)
+        return label.scaled(template._get_render_scale())
+
+    def create_label(self, template, partner, product, label_number, unique_code, timer=NULL_TIMER):
         """Crée une étiquette pour un client et produit donné"""
         if not template.template_image:
             raise UserError(_("Le modèle d'étiquette n'a pas d'image de base."))
         
-        # Charger l'image de base et conserver sa taille d'origine
-        template_data = base64.b64decode(template.template_image)
-        base_img = Image.open(io.BytesIO(template_data))
-        
-        # Conserver le mode original de l'image (RGB, RGBA, etc.)
-        # Convertir en RGBA seulement si nécessaire pour la transparence
-        if base_img.mode not in ('RGB', 'RGBA'):
-            base_img = base_img.convert('RGBA')
-        
-        # Stocker la taille d'origine
-        original_size = base_img.size
-        
-        # Créer le QR code avec le code unique
-        qr_data = f"{unique_code}\nClient: {partner.name}\nProduit: {product.name}\nN°: {label_number}"
-        
-        qr_img = self.generate_qr_code(qr_data, template.qr_size)
-        
-        # Coller le QR code sur l'image (sans modifier la taille de base)
-        if base_img.mode == 'RGBA':
-            base_img.paste(qr_img, (template.qr_position_x, template.qr_position_y), qr_img)
-        else:
-            base_img.paste(qr_img, (template.qr_position_x, template.qr_position_y))
-        
-        # Ajouter le texte
-        draw = ImageDraw.Draw(base_img)
-        font = self._get_default_font()
-        
-        # Code unique
-        draw.text(
-            (template.client_number_x, template.client_number_y),
-            unique_code,
-            fill=template.font_color,
-            font=font
+        from ..rendering.raster import render_label_image
+        return render_label_image(
+            template._get_render_spec(),
+            self._get_label_spec(template, partner, product, label_number, unique_code),
+            timer,
         )
-        
-        # Nom client
-        client_text = f"{partner.name[:20]}"
-        draw.text(
-            (template.client_name_x, template.client_name_y),
-            client_text,
-            fill=template.font_color,
-            font=font
-        )
-        
-        # Nom du produit (si espace disponible)
-        if hasattr(template, 'product_name_x') and hasattr(template, 'product_name_y'):
-            product_text = f"{product.name[:25]}"
-            draw.text(
-                (template.product_name_x, template.product_name_y),
-                product_text,
-                fill=template.font_color,
-                font=font
-            )
-        
-        # Vérifier que la taille n'a pas changé
-        if base_img.size != original_size:
-            base_img = base_img.resize(original_size, Image.Resampling.LANCZOS)
-        
-        return base_img
     
     def action_generate_labels(self):
         """Génère toutes les étiquettes avec des numéros uniques"""
+        with perf_probe(self.env, 'label.generator.action_generate_labels') as probe:
+            return self._generate_labels(probe)
+
+    def _generate_labels(self, probe):
         if not self.partner_id:
             raise UserError(_("Veuillez sélectionner un client."))
         
@@ -157,7 +114,8 @@ class LabelGenerator(models.Model):
                 self.partner_id, 
                 self.product_id,
                 sequence_number,
-                unique_code
+                unique_code,
+                probe,
             )
             
             filename = f"label_{unique_code}.png"
@@ -165,31 +123,35 @@ class LabelGenerator(models.Model):
         
         if not labels:
             raise UserError(_("Aucune étiquette n'a pu être générée."))
+        probe.label_count = len(labels)
         
         # Créer le fichier ZIP
+        from ..rendering.raster import encode_png
         zip_buffer = io.BytesIO()
         with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
             for filename, img, unique_code in labels:
-                img_buffer = io.BytesIO()
                 # Sauvegarder avec le format d'origine si possible
-                img.save(img_buffer, format='PNG', optimize=False)
-                img_buffer.seek(0)
-                zip_file.writestr(filename, img_buffer.getvalue())
+                image_data = encode_png(img, optimize=False, timer=probe)
+                with probe.stage('zip'):
+                    zip_file.writestr(filename, image_data)
         
-        zip_buffer.seek(0)
-        zip_data = base64.b64encode(zip_buffer.getvalue())
+        probe.bytes_out = zip_buffer.tell()
+        with probe.stage('base64'):
+            zip_data = base64.b64encode(zip_buffer.getvalue())
 
         generation_name = f"Etiquettes_{self.partner_id.name}_{self.product_id.name}"
 
         # Mettre à jour l'enregistrement
-        self.write({
-            'name': generation_name,
-            'state': 'generated',
-            'zip_file': zip_data,
-            'zip_filename': f"etiquettes_{generation_name.replace(' ', '_')}.zip",
-            'generation_date': fields.Datetime.now(),
-            'next_label_number': self.next_label_number + self.label_count
-        })
+        with probe.stage('attachment'):
+            self.write({
+                'name': generation_name,
+                'state': 'generated',
+                'zip_file': zip_data,
+                'zip_filename': f"etiquettes_{generation_name.replace(' ', '_')}.zip",
+                'generation_date': fields.Datetime.now(),
+                'next_label_number': self.next_label_number + self.label_count
+            })
+            self.flush_recordset()
         
         return {
             'type': 'ir.actions.act_window',
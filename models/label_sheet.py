@@ -0,0 +1,77 @@
+# models/label_sheet.py
+"""Planches PDF d'étiquettes prêtes à imprimer.
+
+Les étiquettes sont composées N par page (A4, A3 ou rouleau) directement en
+PDF avec reportlab, sans passer par les PNG ni par wkhtmltopdf :
+
+* le fond de chaque modèle est dessiné une seule fois dans un XObject
+  (formulaire PDF) réutilisé par toutes les étiquettes de ce modèle ;
+* le QR Code est tracé en vectoriel à partir de la matrice ``qrcode`` ;
+* le texte est du vrai texte PDF.
+
+Un fichier de 1 000 étiquettes reste ainsi léger et rapide à produire.
+"""
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+
+from ..rendering.pdf import render_sheet_pdf
+
+
+class KesLabelSheetWizard(models.TransientModel):
+    _name = 'kes_inspections.label.sheet.wizard'
+    _description = "Impression d'étiquettes en planches PDF"
+
+    etiquette_ids = fields.Many2many('kes_inspections.etiquette', string='Étiquettes', required=True)
+    page_format = fields.Selection([
+        ('a4', 'A4'),
+        ('a3', 'A3'),
+        ('roll', 'Rouleau (une étiquette par page)'),
+    ], string='Format', default='a4', required=True)
+    label_width_mm = fields.Float(string='Largeur étiquette (mm)', default=50.0, required=True)
+    margin_mm = fields.Float(string='Marges (mm)', default=10.0)
+    gap_mm = fields.Float(string='Espacement (mm)', default=4.0)
+    cut_marks = fields.Boolean(string='Traits de coupe', default=True)
+
+    @api.model
+    def default_get(self, fields_list):
+        res = super().default_get(fields_list)
+        if self.env.context.get('active_model') == 'kes_inspections.etiquette' and 'etiquette_ids' in fields_list:
+            res['etiquette_ids'] = [(6, 0, self.env.context.get('active_ids', []))]
+        elif self.env.context.get('active_model') == 'kes_inspections.sous_affaire' and 'etiquette_ids' in fields_list:
+            sous_affaires = self.env['kes_inspections.sous_affaire'].browse(self.env.context.get('active_ids', []))
+            res['etiquette_ids'] = [(6, 0, sous_affaires.etiquette_ids.ids)]
+        return res
+
+    def action_imprimer(self):
+        self.ensure_one()
+        etiquettes = self.etiquette_ids
+        if not etiquettes:
+            raise UserError("Aucune étiquette sélectionnée.")
+        if self.label_width_mm <= 0:
+            raise UserError("La largeur d'étiquette doit être positive.")
+        if etiquettes.filtered(lambda e: not e.label_template_id.template_image):
+            raise UserError("Certaines étiquettes n'ont pas de modèle avec image de base.")
+
+        attachment = self.env['ir.attachment']._get_transient_download(
+            ('etiquettes_pdf', etiquettes._get_render_key(), self.page_format,
+             self.label_width_mm, self.margin_mm, self.gap_mm, self.cut_marks),
+            f"etiquettes_{fields.Datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+            'application/pdf',
+            lambda: self._render_pdf(etiquettes),
+            res_model='kes_inspections.etiquette',
+        )
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/web/content/{attachment.id}?download=true',
+            'target': 'self',
+        }
+
+    def _render_pdf(self, etiquettes):
+        """PDF multi-pages des étiquettes"""
+        items = [(etiquette.label_template_id._get_render_spec(), etiquette._get_label_spec())
+                 for etiquette in etiquettes]
+        try:
+            return render_sheet_pdf(items, self.page_format, self.label_width_mm,
+                                    self.margin_mm, self.gap_mm, self.cut_marks)
+        except ValueError as e:
+            raise UserError(str(e))
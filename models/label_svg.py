@@ -0,0 +1,88 @@
+# models/label_svg.py
+"""Étiquettes vectorielles (SVG).
+
+Rendu par simple construction de texte, sans Pillow : le fond du modèle est
+référencé (et non recopié), le QR Code est un unique chemin construit depuis
+la matrice ``qrcode`` et le texte reste du vrai texte. Une étiquette pèse
+quelques Ko, contre environ 1 Mo en PNG pleine résolution.
+"""
+import io
+import zipfile
+
+from odoo import models, fields
+from odoo.exceptions import ValidationError
+
+from ..rendering.svg import render_label_svg
+
+
+class InspectionEtiquetteSvg(models.Model):
+    _inherit = 'kes_inspections.etiquette'
+
+    def _get_template_href(self):
+        """URL absolue de l'image du modèle (référencée, jamais recopiée)"""
+        self.ensure_one()
+        base_url = self.get_base_url()
+        template = self.label_template_id
+        return f"{base_url}/web/image/label.template/{template.id}/template_image"
+
+    def generate_etiquette_svg(self, background_href=None, size=None):
+        """SVG de l'étiquette (pendant vectoriel de generate_etiquette_image)"""
+        self.ensure_one()
+        template = self.label_template_id
+        if not template:
+            raise ValidationError("Aucun modèle d'étiquette associé.")
+        if not template.template_image:
+            raise ValidationError("Le modèle d'étiquette n'a pas d'image de base.")
+
+        return render_label_svg(
+            template._get_render_spec(),
+            self._get_label_spec(),
+            background_href or self._get_template_href(),
+            size,
+        )
+
+    def action_generate_zip_svg(self):
+        """ZIP des étiquettes en SVG ; chaque fond de modèle n'y figure qu'une fois"""
+        if not self:
+            raise ValidationError("Aucune étiquette sélectionnée.")
+        attachment = self.env['ir.attachment']._get_transient_download(
+            ('etiquettes_svg', self._get_render_key()),
+            f"etiquettes_svg_{fields.Datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+            'application/zip',
+            self._render_zip_svg,
+            res_model='kes_inspections.etiquette',
+        )
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/web/content/{attachment.id}?download=true',
+            'target': 'self',
+        }
+
+    def _render_zip_svg(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            for template in self.label_template_id:
+                # Fond déjà compressé : stocké tel quel
+                zip_file.writestr(f"fonds/modele_{template.id}.png", template._get_render_spec().image,
+                                  compress_type=zipfile.ZIP_STORED)
+            for etiquette in self:
+                svg = etiquette.generate_etiquette_svg(
+                    background_href=f"fonds/modele_{etiquette.label_template_id.id}.png",
+                )
+                zip_file.writestr(f"etiquette_{etiquette.code_etiquette.replace('/', '_')}.svg", svg)
+        return buffer.getvalue()
+
+
+class LabelGeneratorSvg(models.Model):
+    _inherit = 'label.generator'
+
+    def create_label_svg(self, template, partner, product, label_number, unique_code, background_href=None):
+        """Pendant vectoriel de create_label"""
+        if not template.template_image:
+            raise ValidationError("Le modèle d'étiquette n'a pas d'image de base.")
+        href = background_href or f"{self.get_base_url()}/web/image/label.template/{template.id}/template_image"
+        return render_label_svg(
+            template._get_render_spec(),
+            self._get_label_spec(template, partner, product, label_number, unique_code),
+            href,
+        )
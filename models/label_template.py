@@ -1,7 +1,34 @@
 from odoo import models, fields, api
 import base64
+import hashlib
+import logging
 import os
 
+from ..rendering import TemplateSpec
+from ..rendering.images import image_size
+
+_logger = logging.getLogger(__name__)
+
+# Fonds livrés avec le module : identifiant XML -> fichier de static/description/templates
+MODULE_TEMPLATE_IMAGES = {
+    'label_template_iec': 'iec.png',
+    'label_template_ienc': 'ienc.png',
+    'label_template_le': 'le.png',
+    'label_template_vcie': 'vcie.png',
+    'label_template_vgpa': 'vgpa.png',
+    'label_template_vgpeis': 'vgpeis.png',
+    'label_template_vpge': 'vpge.png',
+    'label_template_vti': 'vti.png',
+}
+
+# Specs de rendu par (base, modèle, date de modification) : le fond n'est
+# décodé du base64 qu'une fois par version du modèle
+_RENDER_SPECS = {}
+_RENDER_SPECS_MAX = 32
+
+# Largeur (px) des aperçus d'étiquettes
+PREVIEW_WIDTH = 300
+
 class LabelTemplate(models.Model):
     _name = 'label.template'
     _description = 'Modèle d\'étiquette'
@@ -10,6 +37,30 @@ class LabelTemplate(models.Model):
     name = fields.Char('Nom du modèle', required=True)
     sequence = fields.Integer('Séquence', default=10)
     template_image = fields.Image('Image du modèle', required=True)
+    # Empreinte du fichier du module chargé dans template_image ; vidée quand
+    # l'image est remplacée à la main (le chargement ne l'écrase alors plus)
+    template_image_checksum = fields.Char('Empreinte de l\'image livrée', readonly=True, copy=False)
+    # Copie normalisée pour les moteurs de rendu (mode RGB/RGBA, sans métadonnées),
+    # réduite à la résolution de sortie quand elle est définie
+    render_image = fields.Binary('Image de rendu', compute='_compute_render_image', store=True,
+                                 attachment=True, readonly=True)
+    # Rapport largeur de render_image / largeur de template_image
+    render_scale = fields.Float('Échelle de rendu', compute='_compute_render_image', store=True,
+                                readonly=True, digits=(16, 6))
+
+    # Fond réduit pour les aperçus (PREVIEW_WIDTH px de large)
+    preview_image = fields.Binary('Fond d\'aperçu', compute='_compute_preview_image', store=True,
+                                  attachment=True, readonly=True)
+    preview_scale = fields.Float('Échelle d\'aperçu', compute='_compute_preview_image', store=True,
+                                 readonly=True, digits=(16, 6))
+
+    # Dimensions physiques : les positions ci-dessous sont en pixels de l'image
+    # du modèle, soit en mm une fois la largeur de l'étiquette connue
+    label_width_mm = fields.Float('Largeur étiquette (mm)',
+                                  help="Largeur imprimée de l'étiquette ; vide = taille de l'image du modèle")
+    output_dpi = fields.Integer('Résolution de sortie (dpi)',
+                                help="Résolution des étiquettes générées ; vide = résolution de l'image du modèle")
+    output_width_px = fields.Integer('Largeur de sortie (px)', compute='_compute_output_width_px')
     active = fields.Boolean('Actif', default=True)
     
     # Positions pour le QR code (en pixels depuis le coin supérieur gauche)
@@ -30,6 +81,91 @@ class LabelTemplate(models.Model):
     # Type de produit/service associé
     product_ids = fields.Many2many('product.product', string='Produits')
     
+    @api.depends('label_width_mm', 'output_dpi')
+    def _compute_output_width_px(self):
+        for template in self:
+            if template.label_width_mm > 0 and template.output_dpi > 0:
+                template.output_width_px = round(template.label_width_mm / 25.4 * template.output_dpi)
+            else:
+                template.output_width_px = 0
+
+    @api.depends('template_image', 'label_width_mm', 'output_dpi')
+    def _compute_render_image(self):
+        for template in self:
+            template.render_image = False
+            template.render_scale = 1.0
+            if not template.template_image:
+                continue
+            source = base64.b64decode(template.template_image)
+            try:
+                from ..rendering.raster import normalize_template
+                master = normalize_template(source, template.output_width_px or None)
+                scale = image_size(master)[0] / image_size(source)[0]
+            except (ImportError, OSError, ValueError) as e:
+                # Sans copie de rendu, les moteurs utilisent l'image d'origine
+                _logger.warning("Copie de rendu impossible pour le modèle %s : %s", template.id, e)
+                continue
+            template.render_image = base64.b64encode(master)
+            template.render_scale = scale
+
+    @api.depends('template_image')
+    def _compute_preview_image(self):
+        for template in self:
+            template.preview_image = False
+            template.preview_scale = 0.0
+            if not template.template_image:
+                continue
+            source = base64.b64decode(template.template_image)
+            try:
+                from ..rendering.raster import normalize_template
+                master = normalize_template(source, PREVIEW_WIDTH)
+                scale = image_size(master)[0] / image_size(source)[0]
+            except (ImportError, OSError, ValueError) as e:
+                _logger.warning("Fond d'aperçu impossible pour le modèle %s : %s", template.id, e)
+                continue
+            template.preview_image = base64.b64encode(master)
+            template.preview_scale = scale
+
+    def write(self, vals):
+        if 'template_image' in vals and not self.env.context.get('kes_template_loading'):
+            vals = dict(vals, template_image_checksum=False)
+        return super().write(vals)
+
+    @api.model
+    def _load_module_images(self):
+        """Charge les fonds livrés dans les modèles (installation et mise à jour).
+
+        Un fond n'est réécrit que si le fichier du module a changé depuis le
+        dernier chargement ; un fond remplacé à la main n'est jamais écrasé.
+        """
+        module_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        loader = self.with_context(kes_template_loading=True)
+        for xml_id, image_name in MODULE_TEMPLATE_IMAGES.items():
+            template = loader.env.ref(f'kes_inspections.{xml_id}', raise_if_not_found=False)
+            if not template:
+                _logger.warning("Modèle d'étiquette introuvable : %s", xml_id)
+                continue
+            image_path = os.path.join(module_path, 'static', 'description', 'templates', image_name)
+            if not os.path.exists(image_path):
+                _logger.warning("Image de modèle introuvable : %s", image_path)
+                continue
+            with open(image_path, 'rb') as f:
+                image_data = f.read()
+            checksum = hashlib.sha1(image_data).hexdigest()
+            if template.template_image_checksum == checksum:
+                continue
+            if template.template_image and not template.template_image_checksum:
+                # Image déjà présente sans empreinte : chargée avant le suivi des
+                # empreintes (identique au fichier) ou remplacée à la main
+                if hashlib.sha1(base64.b64decode(template.template_image)).hexdigest() == checksum:
+                    template.template_image_checksum = checksum
+                continue
+            template.write({
+                'template_image': base64.b64encode(image_data),
+                'template_image_checksum': checksum,
+            })
+            _logger.info("Image du modèle %s chargée depuis %s", xml_id, image_name)
+
     @api.model
     def get_template_for_product(self, product_id):
         """Retourne le modèle approprié pour un produit donné"""
@@ -44,6 +180,43 @@ class LabelTemplate(models.Model):
         # Modèle par défaut
         return self.search([('active', '=', True)], limit=1)
     
+    def _get_render_scale(self):
+        """Échelle entre la géométrie saisie et le fond utilisé au rendu"""
+        self.ensure_one()
+        return (self.render_scale or 1.0) if self.render_image else 1.0
+
+    def _get_render_spec(self):
+        """Fond et géométrie du modèle pour le paquet ``rendering``
+
+        La géométrie est ramenée à l'échelle du fond de rendu ; les textes de
+        l'étiquette passent par ``LabelSpec.scaled(_get_render_scale())``.
+        """
+        self.ensure_one()
+        return self._build_render_spec('render', self.render_image or self.template_image,
+                                       self._get_render_scale())
+
+    def _get_preview_spec(self):
+        """Pendant de ``_get_render_spec`` sur le fond d'aperçu ; False s'il n'existe pas"""
+        self.ensure_one()
+        if not self.preview_image:
+            return False
+        return self._build_render_spec('preview', self.preview_image, self.preview_scale)
+
+    def _build_render_spec(self, variant, image, scale):
+        key = f"{self.env.cr.dbname}:{self.id}:{self.write_date}:{variant}"
+        spec = _RENDER_SPECS.get(key)
+        if spec is None:
+            if len(_RENDER_SPECS) >= _RENDER_SPECS_MAX:
+                _RENDER_SPECS.clear()
+            spec = _RENDER_SPECS[key] = TemplateSpec(
+                image=base64.b64decode(image),
+                qr_x=round(self.qr_position_x * scale),
+                qr_y=round(self.qr_position_y * scale),
+                qr_size=max(1, round(self.qr_size * scale)),
+                key=key,
+            )
+        return spec
+
     @api.model
     def _load_image_from_module(self, image_path):
         """Charge une image depuis le module et la convertit en base64"""
@@ -0,0 +1,125 @@
+# models/label_zpl.py
+"""Impression directe sur imprimantes thermiques (langage ZPL).
+
+Au lieu d'envoyer une image RGBA de 2000 px par étiquette, chaque
+``label.template`` est traduit en mise en page ZPL :
+
+* le fond fixe est converti une seule fois en graphique monochrome, envoyé
+  en début de travail (``~DG``) et rappelé par chaque étiquette (``^XG``) ;
+* le QR Code est produit par l'imprimante elle-même (``^BQ``) ;
+* le texte est un champ ZPL placé aux coordonnées ``client_name_x/y``.
+
+Les travaux partent par lots en TCP brut (port 9100) avec nouvelles
+tentatives en cas d'erreur réseau.
+"""
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+
+from ..rendering.zpl import DPMM, RawPrinterSpooler, image_to_zpl_graphic, render_label_zpl
+
+
+class KesLabelPrinter(models.Model):
+    _name = 'kes_inspections.label.printer'
+    _description = 'Imprimante thermique d\'étiquettes'
+    _order = 'name'
+
+    name = fields.Char(string='Nom', required=True)
+    host = fields.Char(string='Adresse IP / hôte', required=True)
+    port = fields.Integer(string='Port', default=9100, required=True)
+    dpi = fields.Selection([
+        ('203', '203 dpi'),
+        ('300', '300 dpi'),
+        ('600', '600 dpi'),
+    ], string='Résolution', default='203', required=True)
+    label_width_mm = fields.Float(string='Largeur étiquette (mm)', default=50.0, required=True)
+    batch_size = fields.Integer(string='Étiquettes par envoi', default=100)
+    retries = fields.Integer(string='Nouvelles tentatives', default=3)
+    active = fields.Boolean(default=True)
+
+    def _get_spooler(self):
+        self.ensure_one()
+        return RawPrinterSpooler(self.host, self.port, retries=self.retries)
+
+    def _build_zpl(self, etiquettes, copies=1):
+        """Graphiques des modèles (une fois) et étiquettes ZPL"""
+        self.ensure_one()
+        width_dots = int(round(self.label_width_mm * DPMM[self.dpi]))
+        header = []
+        layouts = {}
+        for template in etiquettes.label_template_id:
+            if not template.template_image:
+                raise UserError(f"Le modèle {template.name} n'a pas d'image de base.")
+            spec = template._get_render_spec()
+            name = f'R:KES{template.id}.GRF'
+            command, graphic_width, graphic_height = image_to_zpl_graphic(spec.image, width_dots, name)
+            header.append(command)
+            layouts[template.id] = (spec, name, (graphic_width, graphic_height), graphic_width / spec.size[0])
+
+        labels = []
+        for etiquette in etiquettes:
+            spec, name, size_dots, scale = layouts[etiquette.label_template_id.id]
+            labels.append(render_label_zpl(spec, etiquette._get_label_spec(), name, size_dots, scale, copies))
+        return '\n'.join(header), labels
+
+    def print_etiquettes(self, etiquettes, copies=1):
+        """Imprime les étiquettes ; retourne le nombre d'étiquettes envoyées"""
+        self.ensure_one()
+        header, labels = self._build_zpl(etiquettes, copies)
+        try:
+            return self._get_spooler().send_batches(header, labels, max(1, self.batch_size))
+        except OSError as e:
+            raise UserError(f"Impression impossible sur {self.name} ({self.host}:{self.port}) : {e}")
+
+    def action_test_connexion(self):
+        self.ensure_one()
+        try:
+            # ~HS : demande d'état, sans impression
+            self._get_spooler().send('~HS')
+        except OSError as e:
+            raise UserError(f"Connexion impossible à {self.host}:{self.port} : {e}")
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': "Imprimante joignable",
+                'message': f"{self.name} ({self.host}:{self.port})",
+                'type': 'success',
+            },
+        }
+
+
+class KesLabelPrintWizard(models.TransientModel):
+    _name = 'kes_inspections.label.print.wizard'
+    _description = 'Impression thermique des étiquettes'
+
+    printer_id = fields.Many2one('kes_inspections.label.printer', string='Imprimante', required=True)
+    etiquette_ids = fields.Many2many('kes_inspections.etiquette', string='Étiquettes', required=True)
+    copies = fields.Integer(string='Exemplaires', default=1, required=True)
+
+    @api.model
+    def default_get(self, fields_list):
+        res = super().default_get(fields_list)
+        context = self.env.context
+        if 'etiquette_ids' in fields_list:
+            if context.get('active_model') == 'kes_inspections.etiquette':
+                res['etiquette_ids'] = [(6, 0, context.get('active_ids', []))]
+            elif context.get('active_model') == 'kes_inspections.sous_affaire':
+                sous_affaires = self.env['kes_inspections.sous_affaire'].browse(context.get('active_ids', []))
+                res['etiquette_ids'] = [(6, 0, sous_affaires.etiquette_ids.ids)]
+        return res
+
+    def action_imprimer(self):
+        self.ensure_one()
+        if self.copies < 1:
+            raise UserError("Le nombre d'exemplaires doit être au moins 1.")
+        count = self.printer_id.print_etiquettes(self.etiquette_ids, self.copies)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': "Impression envoyée",
+                'message': f"{count} étiquette(s) envoyée(s) à {self.printer_id.name}.",
+                'type': 'success',
+                'next': {'type': 'ir.actions.act_window_close'},
+            },
+        }
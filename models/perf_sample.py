@@ -0,0 +1,102 @@
+# models/perf_sample.py
+"""Mesures de performance de la génération et de l'export des étiquettes.
+
+Quand ``kes_inspections.perf_enabled`` vaut ``True``, chaque appel instrumenté
+enregistre un échantillon : durée totale, durée par étape (décodage du fond,
+QR Code, PNG, ZIP, écriture de la pièce jointe...), nombre d'étiquettes,
+octets produits et requêtes SQL. Un cron ne conserve que les
+``kes_inspections.perf_max_samples`` derniers échantillons.
+
+Désactivée, l'instrumentation se limite à la lecture (en cache) du paramètre.
+"""
+import time
+from contextlib import contextmanager
+
+from odoo import models, fields, api
+
+from ..rendering.timing import NULL_TIMER, StageTimer
+
+
+class PerfProbe(StageTimer):
+    """Mesure en cours ; ``label_count`` et ``bytes_out`` sont renseignés par l'appelant"""
+
+    def __init__(self):
+        super().__init__()
+        self.label_count = 0
+        self.bytes_out = 0
+
+
+class _NullProbe:
+    label_count = 0
+    bytes_out = 0
+
+    def stage(self, name):
+        return NULL_TIMER.stage(name)
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_PROBE = _NullProbe()
+
+
+def perf_enabled(env):
+    param = env['ir.config_parameter'].sudo().get_param('kes_inspections.perf_enabled', 'False')
+    return param.lower() in ('1', 'true', 'yes')
+
+
+@contextmanager
+def perf_probe(env, action):
+    """Enregistre un échantillon pour ``action`` si l'instrumentation est active.
+
+    Aucun échantillon n'est enregistré si le bloc lève une exception.
+    """
+    if not perf_enabled(env):
+        yield _NULL_PROBE
+        return
+    probe = PerfProbe()
+    queries = env.cr.sql_log_count
+    start = time.perf_counter()
+    yield probe
+    duration = time.perf_counter() - start
+    env['kes_inspections.perf_sample'].sudo().create({
+        'action': action,
+        'duration_ms': duration * 1000,
+        'stages': {name: round(value * 1000, 3) for name, value in probe.durations.items()},
+        'label_count': probe.label_count,
+        'bytes_out': probe.bytes_out,
+        'query_count': env.cr.sql_log_count - queries,
+        'user_id': env.uid,
+    })
+
+
+class KesPerfSample(models.Model):
+    _name = 'kes_inspections.perf_sample'
+    _description = 'Mesure de performance (étiquettes)'
+    _order = 'id desc'
+
+    action = fields.Char(string='Action', required=True, index=True, readonly=True)
+    duration_ms = fields.Float(string='Durée (ms)', readonly=True)
+    stages = fields.Json(string='Durées par étape (ms)', readonly=True)
+    label_count = fields.Integer(string='Étiquettes', readonly=True)
+    bytes_out = fields.Integer(string='Octets produits', readonly=True)
+    query_count = fields.Integer(string='Requêtes SQL', readonly=True)
+    user_id = fields.Many2one('res.users', string='Utilisateur', readonly=True, ondelete='set null')
+    stages_display = fields.Char(string='Étapes', compute='_compute_stages_display')
+
+    @api.depends('stages')
+    def _compute_stages_display(self):
+        for sample in self:
+            sample.stages_display = ' · '.join(
+                f"{name} {value:.1f}" for name, value in sorted((sample.stages or {}).items(), key=lambda x: -x[1])
+            )
+
+    @api.model
+    def _cron_purge_samples(self):
+        """Ne garde que les N derniers échantillons"""
+        keep = int(self.env['ir.config_parameter'].sudo().get_param('kes_inspections.perf_max_samples', 50000))
+        self.env.cr.execute("""
+            DELETE FROM kes_inspections_perf_sample
+             WHERE id <= (SELECT MAX(id) FROM kes_inspections_perf_sample) - %s
+        """, (keep,))
+        self.invalidate_model()
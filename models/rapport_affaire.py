@@ -3,6 +3,11 @@ from odoo.exceptions import ValidationError
 
 class InspectionRapportAffaire(models.Model):
     _name = 'kes_inspections.rapport.affaire'
+    _inherit = [
+        'kes_inspections.document.mixin',
+        'kes_inspections.document.fulltext.mixin',
+        'kes_inspections.document.thumbnail.mixin',
+    ]
     _description = "Rapport PDF lié directement à une affaire"
     _order = 'create_date desc'
 
@@ -24,21 +29,22 @@ class InspectionRapportAffaire(models.Model):
         ('filename_unique_per_affaire', 'unique(filename, affaire_id)', 'Ce fichier existe déjà pour cette affaire.')
     ]
 
-    @api.model
-    def create(self, vals):
-        if 'filename' in vals and vals['filename']:
-            fname = vals['filename'].lower()
-            # 🔹 ACCEPTER PDF ET WORD
-            if not (fname.endswith('.pdf') or fname.endswith('.doc') or fname.endswith('.docx')):
-                raise ValidationError("Seuls les fichiers PDF et Word sont acceptés.")
-            
-            # Déterminer le type de fichier
-            if fname.endswith('.pdf'):
-                vals['file_type'] = 'pdf'
-            else:
-                vals['file_type'] = 'word'
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if 'filename' in vals and vals['filename']:
+                fname = vals['filename'].lower()
+                # 🔹 ACCEPTER PDF ET WORD
+                if not (fname.endswith('.pdf') or fname.endswith('.doc') or fname.endswith('.docx')):
+                    raise ValidationError("Seuls les fichiers PDF et Word sont acceptés.")
+                
+                # Déterminer le type de fichier
+                if fname.endswith('.pdf'):
+                    vals['file_type'] = 'pdf'
+                else:
+                    vals['file_type'] = 'word'
                 
-        return super().create(vals)
+        return super().create(vals_list)
 
     def action_download(self):
         """Retourne l'action de téléchargement"""
@@ -0,0 +1,146 @@
+# models/rapport_import.py
+import base64
+import io
+import os
+import zipfile
+
+from odoo import models, fields
+from odoo.exceptions import UserError
+
+# Extensions acceptées par kes_inspections.rapport
+EXTENSIONS_RAPPORT = ('.pdf', '.doc', '.docx')
+# Taille d'un lot de création (nombre de fichiers / volume cumulé)
+BATCH_COUNT = 100
+BATCH_BYTES = 64 * 1024 * 1024
+
+
+def normaliser_code(value):
+    """Clé de correspondance code étiquette <-> nom de fichier.
+
+    Les codes contiennent des « / » interdits dans les noms de fichiers :
+    on les compare avec des « _ », sans casse et sans le préfixe ``etiquette_``
+    utilisé par l'export ZIP des étiquettes.
+    """
+    value = value.replace('\\', '_').replace('/', '_').strip().upper()
+    if value.startswith('ETIQUETTE_'):
+        value = value[len('ETIQUETTE_'):]
+    return value
+
+
+class RapportImportWizard(models.TransientModel):
+    _name = 'kes_inspections.rapport.import'
+    _description = 'Import groupé de rapports depuis un ZIP'
+
+    zip_file = fields.Binary(string='Archive ZIP', required=True)
+    zip_filename = fields.Char(string='Nom du fichier')
+    sous_affaire_id = fields.Many2one(
+        'kes_inspections.sous_affaire',
+        string='Limiter à la sous-affaire',
+        help="Si renseigné, seuls les codes d'étiquettes de cette sous-affaire sont recherchés."
+    )
+    state = fields.Selection([('draft', 'Brouillon'), ('done', 'Terminé')], default='draft')
+    nb_importes = fields.Integer(string='Rapports importés', readonly=True)
+    nb_deja_presents = fields.Integer(string='Déjà présents', readonly=True)
+    fichiers_non_rattaches = fields.Text(string='Fichiers non rattachés', readonly=True)
+
+    def _open_zip(self):
+        """Ouvre l'archive en place (filestore) sans l'extraire ni la charger entière"""
+        attachment = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', 'zip_file'),
+            ('res_id', '=', self.id),
+        ], limit=1)
+        if attachment.store_fname:
+            source = attachment._full_path(attachment.store_fname)
+        else:
+            source = io.BytesIO(attachment.raw or base64.b64decode(self.zip_file))
+        try:
+            return zipfile.ZipFile(source)
+        except zipfile.BadZipFile:
+            raise UserError("Le fichier envoyé n'est pas une archive ZIP valide.")
+
+    def _get_code_map(self):
+        """Table code normalisé -> (étiquette, sous-affaire) en une seule requête"""
+        query = "SELECT id, code_etiquette, sous_affaire_id FROM kes_inspections_etiquette"
+        params = []
+        if self.sous_affaire_id:
+            query += " WHERE sous_affaire_id = %s"
+            params.append(self.sous_affaire_id.id)
+        self.env.cr.execute(query, params)
+        return {
+            normaliser_code(code): (etiquette_id, sous_affaire_id)
+            for etiquette_id, code, sous_affaire_id in self.env.cr.fetchall()
+        }
+
+    def action_importer(self):
+        """Importe chaque fichier du ZIP comme rapport de l'étiquette correspondante"""
+        self.ensure_one()
+        code_map = self._get_code_map()
+        if not code_map:
+            raise UserError("Aucune étiquette trouvée pour le rattachement des rapports.")
+
+        # Rapports déjà présents (contrainte unique filename / étiquette)
+        self.env.cr.execute(
+            "SELECT filename, etiquette_id FROM kes_inspections_rapport WHERE etiquette_id IN %s",
+            (tuple({etiquette_id for etiquette_id, _sa in code_map.values()}),)
+        )
+        existants = set(self.env.cr.fetchall())
+
+        Rapport = self.env['kes_inspections.rapport']
+        non_rattaches = []
+        deja_presents = 0
+        importes = 0
+        batch, batch_bytes = [], 0
+
+        with self._open_zip() as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                filename = os.path.basename(info.filename)
+                stem, ext = os.path.splitext(filename)
+                if ext.lower() not in EXTENSIONS_RAPPORT:
+                    non_rattaches.append(f"{info.filename} (format non pris en charge)")
+                    continue
+                match = code_map.get(normaliser_code(stem))
+                if not match:
+                    non_rattaches.append(info.filename)
+                    continue
+                etiquette_id, sous_affaire_id = match
+                if (filename, etiquette_id) in existants:
+                    deja_presents += 1
+                    continue
+                existants.add((filename, etiquette_id))
+
+                # Une seule entrée décompressée en mémoire à la fois
+                with archive.open(info) as entry:
+                    content = entry.read()
+                batch.append({
+                    'name': stem,
+                    'filename': filename,
+                    'file': base64.b64encode(content),
+                    'etiquette_id': etiquette_id,
+                    'sous_affaire_id': sous_affaire_id,
+                })
+                batch_bytes += len(content)
+                if len(batch) >= BATCH_COUNT or batch_bytes >= BATCH_BYTES:
+                    importes += len(Rapport.create(batch))
+                    self.env.flush_all()
+                    self.env.invalidate_all()
+                    batch, batch_bytes = [], 0
+
+        if batch:
+            importes += len(Rapport.create(batch))
+
+        self.write({
+            'state': 'done',
+            'nb_importes': importes,
+            'nb_deja_presents': deja_presents,
+            'fichiers_non_rattaches': '\n'.join(non_rattaches) or False,
+        })
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
@@ -9,6 +9,13 @@ class SaleOrder(models.Model):
     description = fields.Char(string='Objet de la commande')
     x_studio_objet = fields.Char(string='Objet')
     department_id = fields.Many2one('product.category', string="Département", required=True)
+    affaire_origine_id = fields.Many2one(
+        'kes_inspections.affaire',
+        string="Affaire renouvelée",
+        index=True,
+        copy=False,
+        readonly=True
+    )
 
 
     
@@ -33,14 +40,8 @@ class SaleOrder(models.Model):
     def action_confirm(self):
         """Surcharge de la confirmation de commande pour créer auto l'affaire"""
         res = super(SaleOrder, self).action_confirm()
-        
-        for order in self:
-            # Vérifie chaque ligne de produit pour trouver une catégorie "inspection"
-            for line in order.order_line:
-                if line.product_id.categ_id and 'inspection' in line.product_id.categ_id.name.lower():
-                    self.env['kes_inspections.affaire'].create_from_sale_order(order)
-                    break  # Une seule affaire par commande
-        
+        # Une affaire par commande comportant une prestation d'inspection, créées en un lot
+        self.env['kes_inspections.affaire']._create_from_sale_orders(self)
         return res
 
     # Champ computed pour afficher le compte des affaires liées
@@ -50,10 +51,13 @@ class SaleOrder(models.Model):
     )
 
     def _compute_inspection_affaire_count(self):
+        counts = {
+            order.id: count
+            for order, count in self.env['kes_inspections.affaire']._read_group(
+                [('sale_order_id', 'in', self.ids)], ['sale_order_id'], ['__count'])
+        }
         for order in self:
-            order.inspection_affaire_count = self.env['kes_inspections.affaire'].search_count([
-                ('sale_order_id', '=', order.id)
-            ])
+            order.inspection_affaire_count = counts.get(order.id, 0)
 
     def action_open_inspection_affaire(self):
         """Ouvre l'affaire d'inspection liée à cette commande"""
@@ -1,6 +1,8 @@
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError
 
+from .generation_lock import acquire_generation_lock, concurrent_run_notification
+
 class InspectionSousAffaire(models.Model):
     _name = 'kes_inspections.sous_affaire'
     _description = 'Sous-affaire dInspection'
@@ -107,17 +109,6 @@ class InspectionSousAffaire(models.Model):
             else:
                 rec.partner_id = False
     
-    @api.model
-    def create(self, vals):
-        """Surcharge de la création pour s'assurer qu'on a une affaire avec client"""
-        # Vérifier que l'affaire a un client
-        if vals.get('affaire_id'):
-            affaire = self.env['kes_inspections.affaire'].browse(vals['affaire_id'])
-            if not affaire.client_id:
-                raise ValidationError("L'affaire principale doit avoir un client défini avant de créer une sous-affaire.")
-        
-        return super().create(vals)
-    
     @api.depends('affaire_id', 'affaire_id.sale_order_id', 'affaire_id.sale_order_id.order_line')
     def _compute_types_intervention(self):
         """Récupère les produits de la commande de vente liée"""
@@ -162,27 +153,36 @@ class InspectionSousAffaire(models.Model):
         
         return res
 
-    @api.model
-    def create(self, vals):
-        # Si la référence n'est pas encore générée, la générer maintenant
-        if not vals.get('name') and vals.get('affaire_id'):
-            affaire = self.env['kes_inspections.affaire'].browse(vals['affaire_id'])
-            existing_count = self.search_count([('affaire_id', '=', vals['affaire_id'])])
-            numero = existing_count + 1
-            vals['name'] = f"{affaire.name}/SA{str(numero).zfill(3)}"
+    @api.model_create_multi
+    def create(self, vals_list):
+        # Si la référence n'est pas encore générée, la générer maintenant :
+        # un seul comptage par affaire pour tout le lot
+        affaire_ids = {vals['affaire_id'] for vals in vals_list if not vals.get('name') and vals.get('affaire_id')}
+        if affaire_ids:
+            counts = {
+                affaire.id: count
+                for affaire, count in self._read_group(
+                    [('affaire_id', 'in', list(affaire_ids))], ['affaire_id'], ['__count'])
+            }
+            affaires = self.env['kes_inspections.affaire'].browse(affaire_ids)
+            names = {affaire.id: affaire.name for affaire in affaires}
+            for vals in vals_list:
+                if not vals.get('name') and vals.get('affaire_id'):
+                    numero = counts.get(vals['affaire_id'], 0) + 1
+                    counts[vals['affaire_id']] = numero
+                    vals['name'] = f"{names[vals['affaire_id']]}/SA{str(numero).zfill(3)}"
         
         # Assigner automatiquement le chargé d'affaire comme inspecteur par défaut
-        sous_affaire = super().create(vals)
+        sous_affaires = super().create(vals_list)
         
         # Créer l'entrée pour le chargé d'affaire principal
-        if sous_affaire.charge_affaire_principal:
-            self.env['kes_inspections.sous_affaire_inspecteur'].create({
-                'sous_affaire_id': sous_affaire.id,
-                'inspecteur_id': sous_affaire.charge_affaire_principal.id,
-                'role': 'site_rapport'
-            })
+        self.env['kes_inspections.sous_affaire_inspecteur'].create([{
+            'sous_affaire_id': sous_affaire.id,
+            'inspecteur_id': sous_affaire.charge_affaire_principal.id,
+            'role': 'site_rapport'
+        } for sous_affaire in sous_affaires if sous_affaire.charge_affaire_principal])
         
-        return sous_affaire
+        return sous_affaires
     # ─────────────────────────────────────────────────────────────
     # 🔸 ACTIONS
     # ─────────────────────────────────────────────────────────────
@@ -215,7 +215,7 @@ class InspectionSousAffaire(models.Model):
             'type': 'ir.actions.act_window',
             'name': f'Rapports - {self.name}',
             'res_model': 'kes_inspections.rapport',
-            'view_mode': 'list,form',
+            'view_mode': 'list,kanban,form',
             'domain': [('sous_affaire_id', '=', self.id)],
             'context': {'default_sous_affaire_id': self.id}
         }
@@ -272,6 +272,9 @@ class InspectionSousAffaire(models.Model):
         if not self.produit_etiquette_ids:
             raise ValidationError("Aucun produit configuré pour la génération d'étiquettes.")
         
+        if not acquire_generation_lock(self):
+            return concurrent_run_notification(self, self.name)
+        
         etiquettes_crees = 0
         for produit_line in self.produit_etiquette_ids:
             if produit_line.nombre_etiquettes > 0:
@@ -332,6 +335,9 @@ class InspectionSousAffaire(models.Model):
         """Génère toutes les étiquettes et les télécharge immédiatement en ZIP"""
         self.ensure_one()
         
+        if not acquire_generation_lock(self):
+            return concurrent_run_notification(self, self.name)
+        
         # 1. Générer toutes les étiquettes
         for produit in self.produit_etiquette_ids:
             if produit.nombre_etiquettes > 0:
@@ -355,6 +361,8 @@ class InspectionSousAffaire(models.Model):
 
 class KesBondCommande(models.Model):
     _name = 'kes_inspections.bond_commande'
+    _inherit = ['kes_inspections.document.mixin']
+    _document_field = 'bond_commande_file'
     _description = 'Bond de commande'
 
     sous_affaire_id = fields.Many2one(
@@ -368,6 +376,17 @@ class KesBondCommande(models.Model):
     bond_commande_file = fields.Binary(string='Fichier bond de commande', required=True)
     date_upload = fields.Datetime(string='Date d\'envoi', default=fields.Datetime.now)
 
+    @api.onchange('bond_commande_file')
+    def _onchange_bond_commande_file(self):
+        """Signale un bon de commande déjà reçu (même contenu)"""
+        existing = self._find_same_content(self.bond_commande_file)
+        if existing:
+            return {'warning': {
+                'title': "Bon de commande déjà reçu",
+                'message': f"Ce fichier est identique à « {existing[0].bond_commande_filename} » "
+                           f"({existing[0].sous_affaire_id.name}). Il ne sera stocké qu'une fois.",
+            }}
+
     def action_download_bond_commande(self):
         """Télécharger le bond de commande"""
         self.ensure_one()
@@ -382,6 +401,8 @@ class KesBondCommande(models.Model):
 
 class KesPV(models.Model):
     _name = 'kes_inspections.pv'
+    _inherit = ['kes_inspections.document.mixin']
+    _document_field = 'pv_file'
     _description = 'Procès-verbal'
 
     sous_affaire_id = fields.Many2one(
@@ -409,6 +430,8 @@ class KesPV(models.Model):
 
 class KesEnqueteSatisfaction(models.Model):
     _name = 'kes_inspections.enquete_satisfaction'
+    _inherit = ['kes_inspections.document.mixin']
+    _document_field = 'enquete_satisfaction_file'
     _description = 'Enquête de satisfaction'
 
     sous_affaire_id = fields.Many2one(
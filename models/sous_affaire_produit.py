@@ -3,6 +3,9 @@ from odoo.exceptions import ValidationError
 import secrets
 import string
 
+from .generation_lock import acquire_generation_lock, check_concurrent_run, concurrent_run_notification
+from .perf_sample import perf_probe
+
 class SousAffaireProduit(models.Model):
     _name = 'kes_inspections.sous_affaire_produit'
     _description = 'Produit pour génération d\'étiquettes dans sous-affaire'
@@ -75,9 +78,20 @@ class SousAffaireProduit(models.Model):
         
         if self.nombre_etiquettes <= 0:
             raise ValidationError("Le nombre d'étiquettes doit être supérieur à 0")
+
+        with perf_probe(self.env, 'sous_affaire_produit.generer_etiquettes') as probe:
+            return self._generer_etiquettes(probe)
+
+    def _generer_etiquettes(self, probe):
+        # Verrou par sous-affaire (réentrant si l'appelant le détient déjà)
+        with probe.stage('lock'):
+            if not acquire_generation_lock(self.sous_affaire_id):
+                check_concurrent_run(self)
+                return len(self.etiquette_ids)
         
         # Supprimer les anciennes étiquettes
-        self.etiquette_ids.unlink()
+        with probe.stage('unlink'):
+            self.etiquette_ids.unlink()
         
         # Déterminer le type d'équipement basé sur le produit
         type_equipement = self._get_equipement_type_from_product()
@@ -90,31 +104,38 @@ class SousAffaireProduit(models.Model):
             'nombre_etiquettes': self.nombre_etiquettes,
         }
         
-        equipement = self.env['kes_inspections.equipement'].create(equipement_vals)
+        with probe.stage('equipement'):
+            equipement = self.env['kes_inspections.equipement'].create(equipement_vals)
         
-        # Générer les étiquettes
+        # Générer les étiquettes (créées en un seul lot)
         codes_generes = set()
+        etiquettes_vals = []
         for i in range(self.nombre_etiquettes):
-            for attempt in range(10):  # 10 tentatives max
-                code_unique = self._generer_code_etiquette_unique(i + 1, equipement)
-                if code_unique not in codes_generes:
-                    codes_generes.add(code_unique)
-                    break
-            else:
-                raise ValidationError("Impossible de générer un code d'étiquette unique")
+            with probe.stage('codes'):
+                for attempt in range(10):  # 10 tentatives max
+                    code_unique = self._generer_code_etiquette_unique(i + 1, equipement)
+                    if code_unique not in codes_generes:
+                        codes_generes.add(code_unique)
+                        break
+                else:
+                    raise ValidationError("Impossible de générer un code d'étiquette unique")
             
-            # Créer l'étiquette
-            etiquette_vals = {
+            etiquettes_vals.append({
                 'sous_affaire_produit_id': self.id,
                 'sous_affaire_id': self.sous_affaire_id.id,
                 'equipement_id': equipement.id,
                 'code_etiquette': code_unique,
                 'numero_etiquette': i + 1,
                 'date_generation': fields.Date.today(),
-            }
-            
-            self.env['kes_inspections.etiquette'].create(etiquette_vals)
-        
+            })
+
+        # Créer les étiquettes
+        with probe.stage('create'):
+            self.env['kes_inspections.etiquette'].create(etiquettes_vals)
+
+        with probe.stage('flush'):
+            self.env.flush_all()
+        probe.label_count = self.nombre_etiquettes
         return self.nombre_etiquettes
 
     def _get_equipement_type_from_product(self):
@@ -173,6 +194,8 @@ class SousAffaireProduit(models.Model):
     def action_generer_etiquettes(self):
         """Génère les étiquettes pour ce produit spécifique"""
         self.ensure_one()
+        if not acquire_generation_lock(self.sous_affaire_id):
+            return concurrent_run_notification(self, self.sous_affaire_id.name)
         count = self.generer_etiquettes()
         
         return {
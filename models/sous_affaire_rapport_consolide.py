@@ -0,0 +1,265 @@
+# models/sous_affaire_rapport_consolide.py
+"""Rapport consolidé d'une sous-affaire : un seul PDF pour le client.
+
+Une page de garde et une table des matières sont générées avec reportlab,
+puis les pages des rapports PDF sont recopiées telles quelles (sans
+ré-interprétation du contenu) depuis leurs fichiers du filestore. Un signet
+est ajouté par équipement et par étiquette. Le résultat est écrit dans un
+fichier du filestore, sans passer par le base64.
+
+Limite : ``PdfFileWriter`` garde la structure du document jusqu'à
+``write()`` et les fichiers sources restent ouverts pendant la fusion ; les
+pages sont recopiées sans rendu mais l'écriture n'est pas incrémentale.
+"""
+import io
+import logging
+import math
+import os
+from contextlib import ExitStack
+
+from odoo import models, fields
+from odoo.exceptions import UserError
+
+from .affaire_dossier import safe_name
+from .filestore_utils import attach_file, temp_path
+
+_logger = logging.getLogger(__name__)
+
+# Lignes de table des matières par page A4
+TOC_LINES_PER_PAGE = 38
+
+
+def _pdf_compat(writer):
+    """Méthodes d'ajout de page et de signet (PyPDF2 1.x ou pypdf)"""
+    add_page = getattr(writer, 'add_page', None) or writer.addPage
+    add_outline = getattr(writer, 'add_outline_item', None) or writer.addBookmark
+    return add_page, add_outline
+
+
+def render_cover_and_toc(title, lines, toc_entries, toc_pages):
+    """PDF de la page de garde et de la table des matières.
+
+    ``toc_entries`` : liste de (niveau, libellé, numéro de page).
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    width, height = A4
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    pdf.setTitle(title)
+
+    # 🔹 PAGE DE GARDE
+    pdf.setFont('Helvetica-Bold', 24)
+    pdf.drawCentredString(width / 2, height * 0.65, "Rapport d'inspection consolidé")
+    pdf.setFont('Helvetica-Bold', 16)
+    pdf.drawCentredString(width / 2, height * 0.65 - 36, title)
+    pdf.setFont('Helvetica', 12)
+    y = height * 0.65 - 90
+    for line in lines:
+        pdf.drawCentredString(width / 2, y, line)
+        y -= 20
+    pdf.showPage()
+
+    # 🔹 TABLE DES MATIÈRES
+    left, right = 60, width - 60
+    for page_index in range(toc_pages):
+        pdf.setFont('Helvetica-Bold', 18)
+        pdf.drawString(left, height - 70, "Table des matières")
+        y = height - 110
+        chunk = toc_entries[page_index * TOC_LINES_PER_PAGE:(page_index + 1) * TOC_LINES_PER_PAGE]
+        for level, label, page_number in chunk:
+            font = 'Helvetica-Bold' if level == 0 else 'Helvetica'
+            pdf.setFont(font, 11)
+            x = left + 18 * level
+            label = label if len(label) <= 80 else label[:77] + '...'
+            pdf.drawString(x, y, label)
+            number = str(page_number)
+            pdf.drawRightString(right, y, number)
+            # Points de conduite entre le libellé et le numéro
+            start = x + pdf.stringWidth(label, font, 11) + 6
+            end = right - pdf.stringWidth(number, font, 11) - 6
+            if end > start:
+                pdf.setFont('Helvetica', 11)
+                dots = '.' * int((end - start) / pdf.stringWidth('.', 'Helvetica', 11))
+                pdf.drawRightString(end, y, dots)
+            y -= 18
+        pdf.showPage()
+
+    pdf.save()
+    return buffer.getvalue()
+
+
+class InspectionSousAffaireRapportConsolide(models.Model):
+    _inherit = 'kes_inspections.sous_affaire'
+
+    rapport_consolide = fields.Binary(string='Rapport consolidé', attachment=True, readonly=True, copy=False)
+    rapport_consolide_filename = fields.Char(string='Nom du rapport consolidé', readonly=True, copy=False)
+    rapport_consolide_date = fields.Datetime(string='Rapport consolidé le', readonly=True, copy=False)
+
+    def action_generer_rapport_consolide(self):
+        """Fusionne les rapports PDF de la sous-affaire et télécharge le résultat"""
+        self.ensure_one()
+        self._generer_rapport_consolide()
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f"/web/content/{self._name}/{self.id}/rapport_consolide/"
+                   f"{self.rapport_consolide_filename}?download=true",
+            'target': 'self',
+        }
+
+    def _get_rapports_consolides_groupes(self):
+        """Rapports regroupés : [(équipement, [(étiquette, [rapports])])]
+
+        Les rapports sans étiquette ni équipement forment un groupe final.
+        """
+        self.ensure_one()
+        rapports = self.rapport_ids.filtered(lambda r: r.file_type == 'pdf')
+        rapports = rapports.sorted(lambda r: (
+            (r.equipement_id or r.etiquette_id.equipement_id).sequence or 0,
+            (r.equipement_id or r.etiquette_id.equipement_id).name or '￿',
+            r.etiquette_id.code_etiquette or '',
+            r.create_date or fields.Datetime.now(),
+            r.id,
+        ))
+        groups = []
+        for rapport in rapports:
+            equipement = rapport.equipement_id or rapport.etiquette_id.equipement_id
+            if not groups or groups[-1][0] != equipement:
+                groups.append((equipement, []))
+            labels = groups[-1][1]
+            if not labels or labels[-1][0] != rapport.etiquette_id:
+                labels.append((rapport.etiquette_id, []))
+            labels[-1][1].append(rapport)
+        return groups
+
+    def _generer_rapport_consolide(self):
+        self.ensure_one()
+        from odoo.tools.pdf import PdfFileReader, PdfFileWriter
+
+        groups = self._get_rapports_consolides_groupes()
+        if not groups:
+            raise UserError("Aucun rapport PDF n'est rattaché à cette sous-affaire.")
+        attachments = {
+            att.res_id: att
+            for att in self.rapport_ids.filtered(lambda r: r.file_type == 'pdf')._get_document_attachments()
+        }
+        self.env['ir.attachment'].browse(
+            [att.id for att in attachments.values()]
+        )._restore_from_archive()
+
+        with ExitStack() as stack:
+            # 🔹 1. Ouverture paresseuse des sources : seule la table xref est lue
+            readers = {}
+            ignores = []
+            for _equipement, labels in groups:
+                for _etiquette, rapports in labels:
+                    for rapport in rapports:
+                        attachment = attachments.get(rapport.id)
+                        try:
+                            if attachment and attachment.store_fname:
+                                stream = stack.enter_context(open(attachment._full_path(attachment.store_fname), 'rb'))
+                            elif attachment:
+                                stream = io.BytesIO(attachment.raw or b'')
+                            else:
+                                raise ValueError("fichier manquant")
+                            reader = PdfFileReader(stream, strict=False)
+                            if not reader.pages:
+                                raise ValueError("aucune page")
+                            readers[rapport.id] = (reader, len(reader.pages))
+                        except Exception as e:
+                            _logger.warning("Rapport %s ignoré dans le consolidé : %s", rapport.id, e)
+                            ignores.append(rapport.filename)
+
+            if not readers:
+                raise UserError("Aucun rapport PDF lisible dans cette sous-affaire. Fichiers illisibles : "
+                                + ", ".join(ignores))
+            # Seuls les rapports lisibles figurent au sommaire et dans les signets
+            lisibles = []
+            for equipement, labels in groups:
+                labels = [
+                    (etiquette, [rapport for rapport in rapports if rapport.id in readers])
+                    for etiquette, rapports in labels
+                ]
+                labels = [(etiquette, rapports) for etiquette, rapports in labels if rapports]
+                if labels:
+                    lisibles.append((equipement, labels))
+            groups = lisibles
+
+            # 🔹 2. Pagination : garde + sommaire, puis les rapports dans l'ordre
+            toc_entries = []
+            page_count = 0
+            for equipement, labels in groups:
+                toc_entries.append([0, equipement.name or "Rapports de la sous-affaire", None])
+                for etiquette, rapports in labels:
+                    if etiquette:
+                        toc_entries.append([1, etiquette.code_etiquette, None])
+                    for rapport in rapports:
+                        toc_entries.append([2 if etiquette else 1, rapport.filename, page_count])
+                        page_count += readers[rapport.id][1]
+            toc_pages = max(1, math.ceil(len(toc_entries) / TOC_LINES_PER_PAGE))
+            offset = 1 + toc_pages
+            # Un titre de groupe renvoie à la première page qui le suit
+            next_page = page_count
+            for entry in reversed(toc_entries):
+                if entry[2] is None:
+                    entry[2] = next_page
+                next_page = entry[2]
+            for entry in toc_entries:
+                entry[2] += offset + 1
+
+            cover_lines = [
+                f"Affaire : {self.affaire_id.name or ''}",
+                f"Client : {self.partner_id.name or ''}",
+                f"Site : {self.site_intervention or ''} {self.lieu_intervention or ''}".strip(),
+                f"Rapports : {len(readers)} — Pages : {page_count}",
+                f"Édité le {fields.Date.context_today(self).strftime('%d/%m/%Y')}",
+            ]
+            if ignores:
+                cover_lines.append(f"Rapports non intégrés (illisibles) : {len(ignores)}")
+            cover = PdfFileReader(io.BytesIO(render_cover_and_toc(
+                self.name, cover_lines, toc_entries, toc_pages,
+            )), strict=False)
+
+            # 🔹 3. Copie des pages sans rendu, avec signets
+            writer = PdfFileWriter()
+            add_page, add_outline = _pdf_compat(writer)
+            for page in cover.pages:
+                add_page(page)
+            entries = iter(toc_entries)
+            for equipement, labels in groups:
+                level0 = next(entries)
+                parent = add_outline(level0[1], level0[2] - 1)
+                for etiquette, rapports in labels:
+                    if etiquette:
+                        level1 = next(entries)
+                        add_outline(level1[1], level1[2] - 1, parent)
+                    for rapport in rapports:
+                        next(entries)
+                        for page in readers[rapport.id][0].pages:
+                            add_page(page)
+
+            # Écriture directe dans le filestore puis rangement adressé par contenu
+            filename = f"rapport_consolide_{safe_name(self.name)}.pdf"
+            path = temp_path(self.env, f"consolide_{self.id}_{os.getpid()}.pdf")
+            try:
+                with open(path, 'wb') as output:
+                    writer.write(output)
+            except Exception:
+                if os.path.exists(path):
+                    os.remove(path)
+                raise
+
+        self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', 'rapport_consolide'),
+            ('res_id', '=', self.id),
+        ]).unlink()
+        attach_file(self.env, path, filename, self._name, self.id,
+                    res_field='rapport_consolide', mimetype='application/pdf')
+        self.invalidate_recordset(['rapport_consolide'])
+        self.write({
+            'rapport_consolide_filename': filename,
+            'rapport_consolide_date': fields.Datetime.now(),
+        })
+        return True
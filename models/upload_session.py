@@ -0,0 +1,168 @@
+# models/upload_session.py
+"""Téléversement par morceaux des gros rapports (thermographie, arc flash...).
+
+Chaque morceau est écrit directement dans un fichier partiel du filestore :
+le document n'est jamais chargé entier en mémoire ni encodé en base64. Une
+session interrompue reprend à ``received_size``. À la fin, l'empreinte SHA-1
+est vérifiée, le fichier est déplacé à son emplacement définitif
+(adressé par son contenu) et le rapport est créé.
+"""
+import logging
+import mimetypes
+import os
+import secrets
+from datetime import timedelta
+
+from odoo import models, fields, api
+from odoo.exceptions import UserError, ValidationError
+
+from .filestore_utils import attach_file, file_sha1
+
+_logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 8 * 1024 * 1024
+COPY_BUFFER = 1024 * 1024
+
+
+class KesUploadSession(models.Model):
+    _name = 'kes_inspections.upload.session'
+    _description = 'Session de téléversement par morceaux'
+    _order = 'create_date desc'
+
+    token = fields.Char(string='Jeton', required=True, readonly=True, index=True, copy=False,
+                        default=lambda self: secrets.token_urlsafe(24))
+    user_id = fields.Many2one('res.users', string='Utilisateur', required=True, readonly=True,
+                              default=lambda self: self.env.user, ondelete='cascade')
+    filename = fields.Char(string='Nom du fichier', required=True)
+    total_size = fields.Integer(string='Taille attendue (octets)', required=True)
+    received_size = fields.Integer(string='Octets reçus', default=0, readonly=True)
+    checksum = fields.Char(string='Empreinte SHA-1 attendue', required=True)
+    state = fields.Selection([
+        ('uploading', 'En cours'),
+        ('done', 'Terminé'),
+        ('failed', 'Échec'),
+    ], string='Statut', default='uploading', readonly=True)
+
+    # 🔹 CIBLE DU RAPPORT
+    target_model = fields.Selection([
+        ('kes_inspections.rapport', 'Rapport étiquette / sous-affaire'),
+        ('kes_inspections.rapport.affaire', 'Rapport affaire'),
+    ], string='Type de rapport', required=True)
+    sous_affaire_id = fields.Many2one('kes_inspections.sous_affaire', string='Sous-affaire', ondelete='cascade')
+    etiquette_id = fields.Many2one('kes_inspections.etiquette', string='Étiquette', ondelete='cascade')
+    affaire_id = fields.Many2one('kes_inspections.affaire', string='Affaire', ondelete='cascade')
+    res_id = fields.Integer(string='Rapport créé', readonly=True)
+
+    @api.constrains('filename', 'total_size', 'target_model', 'affaire_id')
+    def _check_upload(self):
+        for session in self:
+            fname = (session.filename or '').lower()
+            if not fname.endswith(('.pdf', '.doc', '.docx')):
+                raise ValidationError("Seuls les fichiers PDF et Word sont acceptés.")
+            if session.total_size <= 0:
+                raise ValidationError("La taille du fichier doit être positive.")
+            if session.target_model == 'kes_inspections.rapport.affaire' and not session.affaire_id:
+                raise ValidationError("Un rapport d'affaire doit être rattaché à une affaire.")
+
+    # ─────────────────────────────────────────────────────────────
+    # 🔸 FICHIER PARTIEL
+    # ─────────────────────────────────────────────────────────────
+
+    def _part_path(self):
+        self.ensure_one()
+        path = self.env['ir.attachment']._full_path(f'kes_uploads/{self.token}.part')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def write_chunk(self, offset, stream):
+        """Écrit un morceau à ``offset`` ; retourne le nombre d'octets reçus.
+
+        La partie d'un morceau déjà reçue (réémise après une coupure) est
+        ignorée, seule la suite est ajoutée au fichier partiel ; un morceau
+        qui laisserait un trou est refusé, le client doit reprendre à
+        ``received_size``.
+        """
+        self.ensure_one()
+        if self.state != 'uploading':
+            raise UserError("Ce téléversement est terminé.")
+        if offset > self.received_size:
+            raise UserError(f"Morceau hors séquence : reprendre à l'octet {self.received_size}.")
+
+        # Octets déjà reçus (morceau réémis) : lus et ignorés, sans toucher au fichier
+        skip = self.received_size - offset
+        while skip > 0:
+            buffer = stream.read(min(skip, COPY_BUFFER))
+            if not buffer:
+                return self.received_size
+            skip -= len(buffer)
+
+        path = self._part_path()
+        with open(path, 'r+b' if os.path.exists(path) else 'wb') as part:
+            # Octets écrits sans être validés (transaction annulée) : écartés
+            part.truncate(self.received_size)
+            part.seek(self.received_size)
+            while True:
+                buffer = stream.read(COPY_BUFFER)
+                if not buffer:
+                    break
+                part.write(buffer)
+            received = part.tell()
+
+        if received > self.total_size:
+            raise UserError("Le fichier reçu dépasse la taille annoncée.")
+        self.received_size = received
+        return received
+
+    def finish(self):
+        """Vérifie l'empreinte, range le fichier dans le filestore et crée le rapport"""
+        self.ensure_one()
+        if self.state == 'done':
+            return self.res_id
+        if self.received_size != self.total_size:
+            raise UserError(f"Téléversement incomplet : {self.received_size}/{self.total_size} octets reçus.")
+
+        path = self._part_path()
+        checksum = file_sha1(path)
+        if checksum != self.checksum.lower():
+            self.state = 'failed'
+            os.remove(path)
+            raise UserError("L'empreinte du fichier reçu ne correspond pas : téléversement rejeté.")
+
+        # Emplacement définitif, adressé par le contenu comme ir.attachment._file_write
+        rapport = self._create_rapport()
+        attach_file(
+            self.env, path, self.filename, rapport._name, rapport.id, res_field='file',
+            mimetype=mimetypes.guess_type(self.filename)[0], checksum=checksum,
+        )
+        rapport.invalidate_recordset(['file'])
+        rapport.modified(['file'])
+        # Même suite qu'une écriture du champ (indexation, miniature)
+        rapport._document_changed()
+
+        self.write({'state': 'done', 'res_id': rapport.id})
+        return rapport.id
+
+    def _create_rapport(self):
+        self.ensure_one()
+        vals = {'name': self.filename, 'filename': self.filename}
+        if self.target_model == 'kes_inspections.rapport.affaire':
+            vals['affaire_id'] = self.affaire_id.id
+        else:
+            vals.update({
+                'sous_affaire_id': self.sous_affaire_id.id or self.etiquette_id.sous_affaire_id.id,
+                'etiquette_id': self.etiquette_id.id,
+            })
+        return self.env[self.target_model].create(vals)
+
+    @api.autovacuum
+    def _gc_upload_sessions(self):
+        """Supprime les sessions abandonnées depuis plus de 2 jours et leurs fichiers partiels"""
+        sessions = self.sudo().search([
+            ('state', '!=', 'done'),
+            ('write_date', '<', fields.Datetime.now() - timedelta(days=2)),
+        ])
+        for session in sessions:
+            path = session._part_path()
+            if os.path.exists(path):
+                os.remove(path)
+        sessions.unlink()
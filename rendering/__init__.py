@@ -0,0 +1,13 @@
+# rendering/__init__.py
+"""Rendu des étiquettes, indépendant de l'ORM.
+
+Les entrées sont des dataclasses simples (``TemplateSpec``, ``LabelSpec``,
+``TextSpec``) et les sorties des images PIL ou des octets : aucun import
+d'Odoo ici. Le paquet peut donc être mesuré, testé ou exécuté dans des
+processus de travail sans base de données (en ajoutant le dossier du module
+à ``sys.path`` puis ``import rendering``).
+
+Formats : ``raster`` (PNG, Pillow), ``svg``, ``pdf`` (planches, reportlab)
+et ``zpl`` (imprimantes thermiques).
+"""
+from .specs import LabelSpec, TemplateSpec, TextSpec
@@ -0,0 +1,29 @@
+# rendering/images.py
+"""Lecture d'en-têtes d'images, sans Pillow."""
+import struct
+
+
+def image_size(data):
+    """(largeur, hauteur) d'une image PNG ou JPEG lue dans son en-tête"""
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        return struct.unpack('>II', data[16:24])
+    if data[:2] == b'\xff\xd8':
+        index = 2
+        while index + 9 < len(data):
+            if data[index] != 0xFF:
+                index += 1
+                continue
+            marker = data[index + 1]
+            if marker in (0xC0, 0xC1, 0xC2):
+                height, width = struct.unpack('>HH', data[index + 5:index + 9])
+                return width, height
+            index += 2 + struct.unpack('>H', data[index + 2:index + 4])[0]
+    raise ValueError("Format d'image de modèle non reconnu")
+
+
+def hex_to_rgb(color):
+    """'#RRGGBB' -> (r, g, b) entre 0 et 1"""
+    color = (color or '#000000').lstrip('#')
+    if len(color) != 6:
+        return 0, 0, 0
+    return tuple(int(color[i:i + 2], 16) / 255.0 for i in (0, 2, 4))
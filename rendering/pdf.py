@@ -0,0 +1,146 @@
+# rendering/pdf.py
+"""Briques du rendu PDF (reportlab) : planches, QR vectoriel, traits de coupe."""
+import io
+
+from .images import hex_to_rgb
+from .qr import qr_matrix, qr_runs
+
+MM = 72.0 / 25.4  # points PDF par millimètre
+
+PAGE_FORMATS = {
+    'a4': (210.0, 297.0),
+    'a3': (297.0, 420.0),
+}
+
+# Résolution à laquelle les fonds de modèle sont intégrés au PDF
+BACKGROUND_DPI = 300
+
+
+def draw_qr(canvas, matrix, x, y, size):
+    """Trace le QR Code en un seul chemin ; (x, y) = coin inférieur gauche en points"""
+    count = len(matrix)
+    module = size / count
+    canvas.setFillColorRGB(1, 1, 1)
+    canvas.rect(x, y, size, size, stroke=0, fill=1)
+    path = canvas.beginPath()
+    for row, col, length in qr_runs(matrix):
+        path.rect(x + col * module, y + size - (row + 1) * module, length * module, module)
+    canvas.setFillColorRGB(0, 0, 0)
+    canvas.drawPath(path, stroke=0, fill=1)
+
+
+def prepare_background(image_data, width_mm, dpi=BACKGROUND_DPI):
+    """Fond du modèle réduit à la résolution d'impression, encodé en PNG"""
+    from PIL import Image
+    img = Image.open(io.BytesIO(image_data))
+    target_width = int(round(width_mm / 25.4 * dpi))
+    if img.width > target_width:
+        target_height = int(round(img.height * target_width / img.width))
+        img = img.resize((target_width, target_height), Image.Resampling.LANCZOS)
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA')
+    output = io.BytesIO()
+    img.save(output, format='PNG', optimize=True)
+    return output.getvalue()
+
+
+def sheet_layout(page_size_mm, label_size_mm, margin_mm, gap_mm):
+    """Positions (x, y) en mm, depuis le coin inférieur gauche, des étiquettes d'une page"""
+    page_w, page_h = page_size_mm
+    label_w, label_h = label_size_mm
+    columns = int((page_w - 2 * margin_mm + gap_mm) // (label_w + gap_mm))
+    rows = int((page_h - 2 * margin_mm + gap_mm) // (label_h + gap_mm))
+    if columns < 1 or rows < 1:
+        raise ValueError("L'étiquette ne tient pas sur la page avec ces marges.")
+    return [
+        (margin_mm + col * (label_w + gap_mm), page_h - margin_mm - (row + 1) * label_h - row * gap_mm)
+        for row in range(rows)
+        for col in range(columns)
+    ]
+
+
+def draw_cut_marks(canvas, x, y, width, height, length=3 * MM, offset=1 * MM):
+    """Traits de coupe aux quatre coins, à l'extérieur de l'étiquette"""
+    canvas.setLineWidth(0.25)
+    canvas.setStrokeColorRGB(0, 0, 0)
+    for corner_x, direction_x in ((x, -1), (x + width, 1)):
+        for corner_y, direction_y in ((y, -1), (y + height, 1)):
+            canvas.line(corner_x + direction_x * offset, corner_y,
+                        corner_x + direction_x * (offset + length), corner_y)
+            canvas.line(corner_x, corner_y + direction_y * offset,
+                        corner_x, corner_y + direction_y * (offset + length))
+
+
+def render_sheet_pdf(items, page_format='a4', label_width_mm=50.0, margin_mm=10.0, gap_mm=4.0, cut_marks=True):
+    """PDF multi-pages ; ``items`` : liste de (TemplateSpec, LabelSpec).
+
+    Le fond de chaque modèle est dessiné une seule fois dans un XObject
+    (formulaire PDF) réutilisé par toutes ses étiquettes.
+    """
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas as pdf_canvas
+
+    # 🔹 Géométrie par modèle : taille de l'étiquette en mm et facteur px -> points
+    geometry = {}
+    for template, _label in items:
+        form_key = template.key or id(template)
+        if form_key in geometry:
+            continue
+        width_px, height_px = template.size
+        geometry[form_key] = {
+            'name': f'tpl{len(geometry)}',
+            'size': (label_width_mm, label_width_mm * height_px / width_px),
+            'scale': label_width_mm * MM / width_px,
+            'background': prepare_background(template.image, label_width_mm),
+        }
+
+    cell = (max(g['size'][0] for g in geometry.values()), max(g['size'][1] for g in geometry.values()))
+    if page_format == 'roll':
+        page_size = (cell[0] + 2 * margin_mm, cell[1] + 2 * margin_mm)
+    else:
+        page_size = PAGE_FORMATS[page_format]
+    positions = sheet_layout(page_size, cell, margin_mm, gap_mm)
+
+    buffer = io.BytesIO()
+    canvas = pdf_canvas.Canvas(buffer, pagesize=(page_size[0] * MM, page_size[1] * MM))
+    canvas.setTitle("Étiquettes")
+
+    for geo in geometry.values():
+        width, height = geo['size'][0] * MM, geo['size'][1] * MM
+        canvas.beginForm(geo['name'], lowerx=0, lowery=0, upperx=width, uppery=height)
+        canvas.drawImage(ImageReader(io.BytesIO(geo['background'])), 0, 0, width, height, mask='auto')
+        canvas.endForm()
+
+    for index, (template, label) in enumerate(items):
+        slot = index % len(positions)
+        if index and slot == 0:
+            canvas.showPage()
+        geo = geometry[template.key or id(template)]
+        x, y = positions[slot][0] * MM, positions[slot][1] * MM
+        width, height = geo['size'][0] * MM, geo['size'][1] * MM
+        draw_label(canvas, template, label, geo['name'], geo['scale'], x, y, height)
+        if cut_marks:
+            draw_cut_marks(canvas, x, y, width, height)
+    canvas.showPage()
+    canvas.save()
+    return buffer.getvalue()
+
+
+def draw_label(canvas, template, label, form_name, scale, x, y, height):
+    """Une étiquette : fond partagé, QR vectoriel, textes"""
+    canvas.saveState()
+    canvas.translate(x, y)
+    canvas.doForm(form_name)
+
+    # Coordonnées du modèle en pixels depuis le coin supérieur gauche
+    qr_size = template.qr_size * scale
+    draw_qr(canvas, qr_matrix(label.qr_payload, label.qr_error_correction, label.qr_border),
+            template.qr_x * scale, height - template.qr_y * scale - qr_size, qr_size)
+
+    for text in label.texts:
+        font_size = text.font_size * scale
+        canvas.setFont('Helvetica', font_size)
+        canvas.setFillColorRGB(*hex_to_rgb(text.color))
+        # Pillow place le haut du texte en (x, y) ; reportlab écrit sur la ligne de base
+        canvas.drawString(text.x * scale, height - text.y * scale - 0.8 * font_size, text.text)
+    canvas.restoreState()
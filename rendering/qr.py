@@ -0,0 +1,40 @@
+# rendering/qr.py
+"""Matrice QR Code commune à tous les formats de sortie.
+
+``qrcode`` n'est importé qu'au premier QR Code construit : les processus qui
+ne rendent jamais d'étiquette (workers, crons) n'en paient pas le chargement.
+"""
+ERROR_CORRECTION = ('L', 'M', 'Q', 'H')
+
+
+def qr_code(payload, error_correction='L', border=4, box_size=10):
+    import qrcode
+    if error_correction not in ERROR_CORRECTION:
+        raise KeyError(error_correction)
+    qr = qrcode.QRCode(version=1, error_correction=getattr(qrcode.constants, f'ERROR_CORRECT_{error_correction}'),
+                       box_size=box_size, border=border)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    return qr
+
+
+def qr_matrix(payload, error_correction='L', border=4):
+    """Matrice booléenne du QR Code (marge comprise)"""
+    return qr_code(payload, error_correction, border, box_size=1).get_matrix()
+
+
+def qr_module_count(payload, error_correction='L'):
+    """Nombre de modules (sans marge) du plus petit QR Code contenant ``payload``"""
+    return qr_code(payload, error_correction, border=0, box_size=1).modules_count
+
+
+def qr_runs(matrix):
+    """Segments horizontaux de modules noirs : (ligne, colonne, longueur)"""
+    for row_index, row in enumerate(matrix):
+        start = None
+        for col_index, dark in enumerate(list(row) + [False]):
+            if dark and start is None:
+                start = col_index
+            elif not dark and start is not None:
+                yield row_index, start, col_index - start
+                start = None
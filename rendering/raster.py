@@ -0,0 +1,107 @@
+# rendering/raster.py
+"""Rendu PNG des étiquettes (Pillow)."""
+import io
+from collections import OrderedDict
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+from .qr import qr_code
+from .timing import NULL_TIMER
+
+FONT_PATHS = {
+    False: ('/usr/share/fonts/dejavu/DejaVuSans.ttf',),
+    True: ('/usr/share/fonts/dejavu/DejaVuSans-Bold.ttf',),
+}
+
+# Fonds de modèle décodés, par TemplateSpec.key
+_DECODED_TEMPLATES = OrderedDict()
+_DECODED_TEMPLATES_MAX = 16
+
+
+@lru_cache(maxsize=32)
+def load_font(size=12, bold=False):
+    """Police DejaVu (gras simulé par une taille +10 % à défaut), sinon police par défaut"""
+    candidates = [(path, size) for path in FONT_PATHS[bold]]
+    if bold:
+        candidates += [(path, int(size * 1.1)) for path in FONT_PATHS[False]]
+    for path, font_size in candidates:
+        try:
+            return ImageFont.truetype(path, font_size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+def normalize_template(image_data, width=None):
+    """Copie « de rendu » d'un fond : PNG déjà dans le mode utilisé au rendu
+    (RGB ou RGBA), sans métadonnées ; ``decode_template`` n'a plus rien à convertir.
+
+    Avec ``width``, le fond est réduit une fois pour toutes à cette largeur
+    (jamais agrandi) : les étiquettes sont ensuite dessinées directement à la
+    résolution de sortie.
+    """
+    with Image.open(io.BytesIO(image_data)) as img:
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA')
+        if width and width < img.width:
+            height = max(1, round(img.height * width / img.width))
+            img = img.resize((width, height), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        img.save(output, format='PNG')
+        return output.getvalue()
+
+
+def decode_template(template):
+    """Image du fond prête à dessiner (copie d'une version décodée en cache)"""
+    cached = _DECODED_TEMPLATES.get(template.key) if template.key else None
+    if cached is None:
+        cached = Image.open(io.BytesIO(template.image))
+        if cached.mode not in ('RGB', 'RGBA'):
+            cached = cached.convert('RGBA')
+        cached.load()
+        if template.key:
+            _DECODED_TEMPLATES[template.key] = cached
+            while len(_DECODED_TEMPLATES) > _DECODED_TEMPLATES_MAX:
+                _DECODED_TEMPLATES.popitem(last=False)
+    else:
+        _DECODED_TEMPLATES.move_to_end(template.key)
+    return cached.copy()
+
+
+def build_qr_image(label, size):
+    qr = qr_code(label.qr_payload, label.qr_error_correction, label.qr_border)
+    qr_img = qr.make_image(fill_color="black", back_color="white")
+    return qr_img.resize((size, size), Image.Resampling.LANCZOS)
+
+
+def render_label_image(template, label, timer=NULL_TIMER):
+    """Image PIL de l'étiquette : fond + QR Code + textes"""
+    with timer.stage('decode'):
+        base_img = decode_template(template)
+    with timer.stage('qr'):
+        qr_img = build_qr_image(label, template.qr_size)
+    with timer.stage('paste'):
+        if base_img.mode == 'RGBA':
+            base_img.paste(qr_img, (template.qr_x, template.qr_y), qr_img)
+        else:
+            base_img.paste(qr_img, (template.qr_x, template.qr_y))
+
+    with timer.stage('text'):
+        draw = ImageDraw.Draw(base_img)
+        for text in label.texts:
+            draw.text((text.x, text.y), text.text, fill=text.color, font=load_font(text.font_size))
+    return base_img
+
+
+def encode_png(image, optimize=False, timer=NULL_TIMER):
+    """Octets PNG d'une image PIL"""
+    with timer.stage('png'):
+        output = io.BytesIO()
+        image.save(output, format='PNG', optimize=optimize)
+        return output.getvalue()
+
+
+def render_label_png(template, label, optimize=False, timer=NULL_TIMER):
+    """Octets PNG de l'étiquette"""
+    return encode_png(render_label_image(template, label, timer), optimize, timer)
@@ -0,0 +1,55 @@
+# rendering/specs.py
+"""Entrées du rendu : données simples, sans ORM.
+
+Un ``TemplateSpec`` décrit le fond et la géométrie d'un modèle (en pixels de
+l'image du modèle, origine en haut à gauche) ; un ``LabelSpec`` décrit ce qui
+change d'une étiquette à l'autre (contenu du QR Code, textes). Quand le fond
+est pré-réduit à la résolution de sortie, ``LabelSpec.scaled`` ramène les
+textes dans les mêmes pixels.
+"""
+from dataclasses import dataclass, field, replace
+from functools import cached_property
+
+from .images import image_size
+
+
+@dataclass(frozen=True)
+class TextSpec:
+    x: int
+    y: int
+    text: str
+    font_size: int = 12
+    color: str = '#000000'
+
+    def scaled(self, factor):
+        return replace(self, x=round(self.x * factor), y=round(self.y * factor),
+                       font_size=max(1, round(self.font_size * factor)))
+
+
+@dataclass(frozen=True)
+class TemplateSpec:
+    image: bytes
+    qr_x: int
+    qr_y: int
+    qr_size: int
+    # Identifiant stable du fond (cache des images décodées) ; vide = pas de cache
+    key: str = ''
+
+    @cached_property
+    def size(self):
+        """(largeur, hauteur) de l'image du modèle, lue dans son en-tête"""
+        return image_size(self.image)
+
+
+@dataclass(frozen=True)
+class LabelSpec:
+    qr_payload: str
+    texts: tuple = field(default_factory=tuple)
+    qr_error_correction: str = 'L'
+    qr_border: int = 4
+
+    def scaled(self, factor):
+        """Même étiquette, textes à l'échelle ``factor`` (1 = inchangée)"""
+        if factor == 1:
+            return self
+        return replace(self, texts=tuple(text.scaled(factor) for text in self.texts))
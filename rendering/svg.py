@@ -0,0 +1,34 @@
+# rendering/svg.py
+"""Rendu SVG des étiquettes : simple construction de texte, sans Pillow."""
+from xml.sax.saxutils import escape, quoteattr
+
+from .qr import qr_matrix, qr_runs
+
+
+def qr_svg_path(matrix):
+    """Chemin SVG des modules noirs, en unités de module"""
+    return ''.join(f'M{col} {row}h{length}v1h-{length}z' for row, col, length in qr_runs(matrix))
+
+
+def render_label_svg(template, label, background_href, size=None):
+    """SVG d'une étiquette, en pixels du modèle ; le fond est référencé par ``background_href``"""
+    width, height = size or template.size
+    matrix = qr_matrix(label.qr_payload, label.qr_error_correction, label.qr_border)
+    count = len(matrix)
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+        f'width="{width}" height="{height}" viewBox="0 0 {width} {height}">',
+        f'<image x="0" y="0" width="{width}" height="{height}" xlink:href={quoteattr(background_href)}/>',
+        f'<g transform="translate({template.qr_x} {template.qr_y}) scale({template.qr_size / count:.6g})">',
+        f'<rect width="{count}" height="{count}" fill="#fff"/>',
+        f'<path d="{qr_svg_path(matrix)}" fill="#000"/>',
+        '</g>',
+    ]
+    for text in label.texts:
+        # Pillow place le haut du texte en (x, y) ; SVG écrit sur la ligne de base
+        parts.append(
+            f'<text x="{text.x}" y="{text.y + 0.8 * text.font_size:.6g}" font-family="DejaVu Sans, sans-serif" '
+            f'font-size="{text.font_size}" fill={quoteattr(text.color or "#000000")}>{escape(text.text)}</text>'
+        )
+    parts.append('</svg>')
+    return ''.join(parts)
@@ -0,0 +1,41 @@
+# rendering/timing.py
+"""Chronométrage des étapes du rendu.
+
+Les fonctions de rendu acceptent un ``timer`` optionnel ; ``NULL_TIMER`` (par
+défaut) ne mesure rien et ne coûte rien.
+"""
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class StageTimer:
+    """Durées cumulées (secondes) par étape.
+
+    Les étapes peuvent s'imbriquer : le temps d'une étape enfant n'est compté
+    que pour elle, pas pour l'étape qui l'englobe.
+    """
+
+    def __init__(self):
+        self.durations = {}
+        self._children = []
+
+    @contextmanager
+    def stage(self, name):
+        self._children.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            own = elapsed - self._children.pop()
+            if self._children:
+                self._children[-1] += elapsed
+            self.durations[name] = self.durations.get(name, 0.0) + own
+
+
+class _NullTimer:
+    def stage(self, name):
+        return nullcontext()
+
+
+NULL_TIMER = _NullTimer()
@@ -0,0 +1,170 @@
+# rendering/zpl.py
+"""Langage ZPL des imprimantes thermiques et envoi en TCP brut (port 9100)."""
+import io
+import logging
+import math
+import socket
+import time
+
+from .qr import qr_module_count
+
+_logger = logging.getLogger(__name__)
+
+# Points par millimètre selon la résolution de la tête d'impression
+DPMM = {'203': 8, '300': 12, '600': 24}
+
+
+# ─────────────────────────────────────────────────────────────
+# 🔸 ENCODAGE ZPL
+# ─────────────────────────────────────────────────────────────
+
+def zpl_escape(value):
+    """Texte d'un champ ^FD (à utiliser avec ^FH_) : caractères spéciaux en hexadécimal"""
+    escaped = []
+    for char in value or '':
+        if char in '_^~\\' or ord(char) < 32:
+            escaped.append(''.join(f'_{byte:02X}' for byte in char.encode('utf-8')))
+        else:
+            escaped.append(char)
+    return ''.join(escaped)
+
+
+def _zpl_repeat(count, char):
+    """Compression ZPL d'une répétition : G..Y = 1..19, g..z = 20..400"""
+    parts = []
+    while count > 400:
+        parts.append('z')
+        count -= 400
+    if count >= 20:
+        parts.append(chr(ord('g') + count // 20 - 1))
+        count %= 20
+    if count:
+        parts.append(chr(ord('G') + count - 1))
+    return ''.join(parts) + char
+
+
+def zpl_compress_row(row_hex):
+    """Compresse une ligne hexadécimale de graphique (codage ZPL « ACS »)"""
+    stripped = row_hex.rstrip('0')
+    if not stripped:
+        return ','
+    suffix = ',' if len(stripped) < len(row_hex) else ''
+    out = []
+    index = 0
+    while index < len(stripped):
+        char = stripped[index]
+        run = 1
+        while index + run < len(stripped) and stripped[index + run] == char:
+            run += 1
+        out.append(_zpl_repeat(run, char) if run > 2 else char * run)
+        index += run
+    return ''.join(out) + suffix
+
+
+def image_to_zpl_graphic(image_data, width_dots, name):
+    """Commande ``~DG`` d'un fond de modèle converti en monochrome à ``width_dots``"""
+    from PIL import Image
+    img = Image.open(io.BytesIO(image_data))
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGBA')
+        background = Image.new('RGBA', img.size, (255, 255, 255, 255))
+        background.alpha_composite(img)
+        img = background
+    # Largeur multiple de 8 : un octet entier par groupe de 8 points
+    width_dots = max(8, int(math.ceil(width_dots / 8.0)) * 8)
+    height_dots = int(round(img.height * width_dots / img.width))
+    img = img.convert('L').resize((width_dots, height_dots), Image.Resampling.LANCZOS).convert('1')
+    # Pillow : bit à 1 = blanc ; ZPL : bit à 1 = point noir
+    data = bytes(byte ^ 0xFF for byte in img.tobytes())
+    bytes_per_row = width_dots // 8
+    rows = []
+    previous = None
+    for offset in range(0, len(data), bytes_per_row):
+        row = data[offset:offset + bytes_per_row].hex().upper()
+        rows.append(':' if row == previous else zpl_compress_row(row))
+        previous = row
+    command = f"~DG{name},{len(data)},{bytes_per_row},{''.join(rows)}"
+    return command, width_dots, height_dots
+
+
+def zpl_label(graphic_name, size_dots, qr, text=None, copies=1):
+    """Une étiquette ZPL.
+
+    ``qr`` : (x, y, grossissement, contenu) ; ``text`` : (x, y, hauteur, texte).
+    """
+    width, height = size_dots
+    lines = [
+        '^XA',
+        '^CI28',  # textes en UTF-8
+        f'^PW{width}',
+        f'^LL{height}',
+        f'^FO0,0^XG{graphic_name},1,1^FS',
+    ]
+    qr_x, qr_y, magnification, payload = qr
+    lines.append(f'^FO{qr_x},{qr_y}^BQN,2,{magnification}^FH_^FDLA,{zpl_escape(payload)}^FS')
+    if text:
+        text_x, text_y, text_height, value = text
+        lines.append(f'^FO{text_x},{text_y}^A0N,{text_height},{text_height}^FH_^FD{zpl_escape(value)}^FS')
+    if copies > 1:
+        lines.append(f'^PQ{copies}')
+    lines.append('^XZ')
+    return '\n'.join(lines)
+
+
+# ─────────────────────────────────────────────────────────────
+# 🔸 ENVOI EN TCP BRUT
+# ─────────────────────────────────────────────────────────────
+
+class RawPrinterSpooler:
+    """Envoie des travaux à une imprimante réseau en TCP brut (port 9100)"""
+
+    def __init__(self, host, port=9100, timeout=10.0, retries=3, backoff=1.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+    def send(self, payload):
+        """Envoie un travail ; réessaie avec attente croissante en cas d'erreur réseau"""
+        data = payload.encode('utf-8') if isinstance(payload, str) else payload
+        for attempt in range(self.retries + 1):
+            try:
+                with socket.create_connection((self.host, self.port), timeout=self.timeout) as connection:
+                    connection.sendall(data)
+                return len(data)
+            except OSError as e:
+                if attempt == self.retries:
+                    raise
+                delay = self.backoff * (2 ** attempt)
+                _logger.warning("Imprimante %s:%s injoignable (%s), nouvel essai dans %.1fs",
+                                self.host, self.port, e, delay)
+                time.sleep(delay)
+
+    def send_batches(self, header, labels, batch_size=100):
+        """Envoie ``labels`` par lots ; ``header`` (graphiques ``~DG``) part une
+        seule fois, avec le premier lot : l'imprimante garde les graphiques en
+        mémoire et les étiquettes suivantes les rappellent par ``^XG``.
+        """
+        sent = 0
+        for start in range(0, len(labels), batch_size):
+            batch = '\n'.join(labels[start:start + batch_size])
+            self.send(header + '\n' + batch if start == 0 and header else batch)
+            sent += len(labels[start:start + batch_size])
+        return sent
+
+
+def render_label_zpl(template, label, graphic_name, size_dots, scale, copies=1):
+    """Étiquette ZPL d'après les specs ; ``scale`` : points d'impression par pixel du modèle"""
+    # Grossissement ^BQ (1 à 10) le plus proche de la taille prévue au modèle
+    modules = qr_module_count(label.qr_payload, label.qr_error_correction) + 2 * label.qr_border
+    magnification = max(1, min(10, round(template.qr_size * scale / modules)))
+    text = None
+    if label.texts:
+        first = label.texts[0]
+        text = (round(first.x * scale), round(first.y * scale), max(10, round(first.font_size * scale)), first.text)
+    return zpl_label(
+        graphic_name, size_dots,
+        (round(template.qr_x * scale), round(template.qr_y * scale), magnification, label.qr_payload),
+        text, copies,
+    )
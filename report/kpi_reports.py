@@ -0,0 +1,272 @@
+# report/kpi_reports.py
+"""Modèles de reporting (``_auto = False``) adossés à des vues SQL.
+
+Les compteurs calculés des modèles métier (``total_etiquettes``,
+``equipement_count``...) ne sont ni stockés ni groupables. Ces vues agrègent
+directement dans PostgreSQL pour les vues pivot et graphique.
+
+Si le paramètre ``kes_inspections.kpi_materialized`` vaut ``True`` lors de
+l'installation ou de la mise à jour du module, les vues sont créées en vues
+matérialisées et rafraîchies par un cron.
+"""
+import logging
+
+from odoo import models, fields, api, tools
+
+_logger = logging.getLogger(__name__)
+
+
+def _selection_from(model_name, field_name):
+    """Reprend la sélection d'un champ métier pour une colonne de reporting"""
+    return lambda self: self.env[model_name]._fields[field_name].selection
+
+
+class KpiSqlView(models.AbstractModel):
+    """Base des modèles de reporting : chaque modèle concret (``_auto = False``)
+    définit ``_query()``, qui retourne la requête SELECT de sa vue (colonne
+    ``id`` unique comprise) ; ``init()`` l'ignore sur les modèles abstraits.
+    """
+    _name = 'kes_inspections.report.sql_view'
+    _description = 'Base des vues SQL de reporting'
+
+    @api.model
+    def _is_materialized(self):
+        param = self.env['ir.config_parameter'].sudo().get_param('kes_inspections.kpi_materialized', 'False')
+        return param.lower() in ('1', 'true', 'yes')
+
+    def _drop_relation(self):
+        """Supprime la vue, qu'elle soit simple ou matérialisée"""
+        self.env.cr.execute("SELECT relkind FROM pg_class WHERE relname = %s", (self._table,))
+        row = self.env.cr.fetchone()
+        if not row:
+            return
+        if row[0] == 'm':
+            self.env.cr.execute(f'DROP MATERIALIZED VIEW IF EXISTS "{self._table}" CASCADE')
+        else:
+            tools.drop_view_if_exists(self.env.cr, self._table)
+
+    def init(self):
+        if self._abstract:
+            return
+        self._drop_relation()
+        if self._is_materialized():
+            self.env.cr.execute(f'CREATE MATERIALIZED VIEW "{self._table}" AS ({self._query()})')
+            # Index unique requis pour REFRESH ... CONCURRENTLY
+            self.env.cr.execute(f'CREATE UNIQUE INDEX "{self._table}_id_uniq" ON "{self._table}" (id)')
+        else:
+            self.env.cr.execute(f'CREATE OR REPLACE VIEW "{self._table}" AS ({self._query()})')
+
+    @api.model
+    def _cron_refresh_kpi_views(self):
+        """Rafraîchit les vues matérialisées de reporting (sans effet sur les vues simples)"""
+        # Le cron est porté par un modèle concret : on part de la base commune
+        for model_name in self.env.registry.descendants(['kes_inspections.report.sql_view'], '_inherit'):
+            model = self.env[model_name]
+            if model._abstract:
+                continue
+            self.env.cr.execute("SELECT relkind FROM pg_class WHERE relname = %s", (model._table,))
+            row = self.env.cr.fetchone()
+            if row and row[0] == 'm':
+                self.env.cr.execute(f'REFRESH MATERIALIZED VIEW CONCURRENTLY "{model._table}"')
+                _logger.info("Vue matérialisée %s rafraîchie", model._table)
+            model.invalidate_model()
+
+
+class KpiEtiquette(models.Model):
+    _name = 'kes_inspections.report.etiquette'
+    _inherit = 'kes_inspections.report.sql_view'
+    _description = 'Analyse des étiquettes par client, produit et mois'
+    _auto = False
+    _order = 'mois desc'
+
+    mois = fields.Date(string='Mois', readonly=True)
+    partner_id = fields.Many2one('res.partner', string='Client', readonly=True)
+    product_id = fields.Many2one('product.product', string='Produit', readonly=True)
+    affaire_id = fields.Many2one('kes_inspections.affaire', string='Affaire', readonly=True)
+    label_template_id = fields.Many2one('label.template', string='Modèle', readonly=True)
+    nb_etiquettes = fields.Integer(string='Étiquettes', readonly=True)
+    nb_rapports = fields.Integer(string='Rapports', readonly=True)
+
+    def _query(self):
+        return """
+            SELECT MIN(e.id) AS id,
+                   date_trunc('month', e.date_generation)::date AS mois,
+                   e.partner_id,
+                   e.product_id,
+                   e.affaire_id,
+                   e.label_template_id,
+                   COUNT(*) AS nb_etiquettes,
+                   SUM(COALESCE(e.rapport_count, 0)) AS nb_rapports
+              FROM kes_inspections_etiquette e
+          GROUP BY date_trunc('month', e.date_generation), e.partner_id, e.product_id,
+                   e.affaire_id, e.label_template_id
+        """
+
+
+class KpiEquipement(models.Model):
+    _name = 'kes_inspections.report.equipement'
+    _inherit = 'kes_inspections.report.sql_view'
+    _description = 'Répartition des équipements par état et par affaire'
+    _auto = False
+
+    affaire_id = fields.Many2one('kes_inspections.affaire', string='Affaire', readonly=True)
+    client_id = fields.Many2one('res.partner', string='Client', readonly=True)
+    charge_affaire_id = fields.Many2one('hr.employee', string="Chargé d'affaire", readonly=True)
+    type_equipement = fields.Selection(
+        selection=_selection_from('kes_inspections.equipement', 'type_equipement'),
+        string="Type d'équipement", readonly=True)
+    state = fields.Selection(
+        selection=_selection_from('kes_inspections.equipement', 'state'),
+        string='Statut', readonly=True)
+    nb_equipements = fields.Integer(string='Équipements', readonly=True)
+    nb_etiquettes_prevues = fields.Integer(string='Étiquettes prévues', readonly=True)
+    nb_etiquettes_generees = fields.Integer(string='Étiquettes générées', readonly=True)
+
+    def _query(self):
+        return """
+            SELECT MIN(eq.id) AS id,
+                   eq.affaire_id,
+                   a.client_id,
+                   a.charge_affaire_id,
+                   eq.type_equipement,
+                   eq.state,
+                   COUNT(*) AS nb_equipements,
+                   SUM(COALESCE(eq.nombre_etiquettes, 0)) AS nb_etiquettes_prevues,
+                   SUM(COALESCE(et.nb, 0)) AS nb_etiquettes_generees
+              FROM kes_inspections_equipement eq
+              JOIN kes_inspections_affaire a ON a.id = eq.affaire_id
+         LEFT JOIN (SELECT equipement_id, COUNT(*) AS nb
+                      FROM kes_inspections_etiquette
+                  GROUP BY equipement_id) et ON et.equipement_id = eq.id
+          GROUP BY eq.affaire_id, a.client_id, a.charge_affaire_id, eq.type_equipement, eq.state
+        """
+
+
+class KpiInspecteur(models.Model):
+    _name = 'kes_inspections.report.inspecteur'
+    _inherit = 'kes_inspections.report.sql_view'
+    _description = 'Charge de travail des inspecteurs'
+    _auto = False
+    _order = 'date_debut_intervention desc'
+
+    inspecteur_id = fields.Many2one('hr.employee', string='Inspecteur', readonly=True)
+    sous_affaire_id = fields.Many2one('kes_inspections.sous_affaire', string='Sous-affaire', readonly=True)
+    affaire_id = fields.Many2one('kes_inspections.affaire', string='Affaire', readonly=True)
+    client_id = fields.Many2one('res.partner', string='Client', readonly=True)
+    role = fields.Selection(
+        selection=_selection_from('kes_inspections.sous_affaire_inspecteur', 'role'),
+        string='Rôle', readonly=True)
+    state = fields.Selection(
+        selection=_selection_from('kes_inspections.sous_affaire', 'state'),
+        string='Statut sous-affaire', readonly=True)
+    date_debut_intervention = fields.Date(string='Début intervention', readonly=True)
+    date_fin_intervention = fields.Date(string='Fin intervention', readonly=True)
+    nb_missions = fields.Integer(string='Missions', readonly=True)
+    nb_jours_terrain = fields.Integer(string='Jours terrain', readonly=True)
+
+    def _query(self):
+        return """
+            SELECT si.id,
+                   si.inspecteur_id,
+                   si.sous_affaire_id,
+                   sa.affaire_id,
+                   a.client_id,
+                   si.role,
+                   sa.state,
+                   a.date_debut_intervention,
+                   a.date_fin_intervention,
+                   1 AS nb_missions,
+                   CASE WHEN a.date_debut_intervention IS NOT NULL AND a.date_fin_intervention IS NOT NULL
+                        THEN a.date_fin_intervention - a.date_debut_intervention + 1
+                        ELSE 0 END AS nb_jours_terrain
+              FROM kes_inspections_sous_affaire_inspecteur si
+              JOIN kes_inspections_sous_affaire sa ON sa.id = si.sous_affaire_id
+              JOIN kes_inspections_affaire a ON a.id = sa.affaire_id
+        """
+
+
+class KpiProchaineInspection(models.Model):
+    _name = 'kes_inspections.report.prochaine_inspection'
+    _inherit = 'kes_inspections.report.sql_view'
+    _description = 'Inspections à venir'
+    _auto = False
+    _order = 'date_prochaine_inspection'
+
+    affaire_id = fields.Many2one('kes_inspections.affaire', string='Affaire', readonly=True)
+    client_id = fields.Many2one('res.partner', string='Client', readonly=True)
+    charge_affaire_id = fields.Many2one('hr.employee', string="Chargé d'affaire", readonly=True)
+    department_id = fields.Many2one('product.category', string='Département', readonly=True)
+    date_prochaine_inspection = fields.Date(string='Date prochaine inspection', readonly=True)
+    echeance = fields.Selection([
+        ('depassee', 'Dépassée'),
+        ('30j', 'Sous 30 jours'),
+        ('90j', 'Sous 90 jours'),
+        ('180j', 'Sous 6 mois'),
+        ('plus', 'Plus tard'),
+    ], string='Échéance', readonly=True)
+    jours_restants = fields.Integer(string='Jours restants', readonly=True)
+    nb_equipements = fields.Integer(string='Équipements', readonly=True)
+
+    def _query(self):
+        return """
+            SELECT a.id,
+                   a.id AS affaire_id,
+                   a.client_id,
+                   a.charge_affaire_id,
+                   a.department_id,
+                   a.date_prochaine_inspection,
+                   a.date_prochaine_inspection - CURRENT_DATE AS jours_restants,
+                   CASE WHEN a.date_prochaine_inspection < CURRENT_DATE THEN 'depassee'
+                        WHEN a.date_prochaine_inspection < CURRENT_DATE + 30 THEN '30j'
+                        WHEN a.date_prochaine_inspection < CURRENT_DATE + 90 THEN '90j'
+                        WHEN a.date_prochaine_inspection < CURRENT_DATE + 180 THEN '180j'
+                        ELSE 'plus' END AS echeance,
+                   COALESCE(eq.nb, 0) AS nb_equipements
+              FROM kes_inspections_affaire a
+         LEFT JOIN (SELECT affaire_id, COUNT(*) AS nb
+                      FROM kes_inspections_equipement
+                  GROUP BY affaire_id) eq ON eq.affaire_id = a.id
+             WHERE a.date_prochaine_inspection IS NOT NULL
+        """
+
+
+class KpiPerf(models.Model):
+    _name = 'kes_inspections.report.perf'
+    _inherit = 'kes_inspections.report.sql_view'
+    _description = 'Performances des étiquettes (p50 / p95 par action et par étape)'
+    _auto = False
+    _order = 'action, stage'
+
+    action = fields.Char(string='Action', readonly=True)
+    stage = fields.Char(string='Étape', readonly=True)
+    nb_samples = fields.Integer(string='Échantillons', readonly=True)
+    p50_ms = fields.Float(string='p50 (ms)', readonly=True, aggregator='max')
+    p95_ms = fields.Float(string='p95 (ms)', readonly=True, aggregator='max')
+    avg_labels = fields.Float(string='Étiquettes (moy.)', readonly=True, aggregator='avg')
+    avg_queries = fields.Float(string='Requêtes SQL (moy.)', readonly=True, aggregator='avg')
+    avg_bytes = fields.Float(string='Octets produits (moy.)', readonly=True, aggregator='avg')
+    last_sample = fields.Datetime(string='Dernier échantillon', readonly=True)
+
+    def _query(self):
+        # Une ligne « total » par action, puis une ligne par étape mesurée
+        return """
+            SELECT ROW_NUMBER() OVER (ORDER BY m.action, m.stage) AS id,
+                   m.action,
+                   m.stage,
+                   COUNT(*) AS nb_samples,
+                   PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY m.ms) AS p50_ms,
+                   PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY m.ms) AS p95_ms,
+                   AVG(m.label_count) AS avg_labels,
+                   AVG(m.query_count) AS avg_queries,
+                   AVG(m.bytes_out) AS avg_bytes,
+                   MAX(m.create_date) AS last_sample
+              FROM (SELECT s.action, 'total' AS stage, s.duration_ms AS ms,
+                           s.label_count, s.query_count, s.bytes_out, s.create_date
+                      FROM kes_inspections_perf_sample s
+                    UNION ALL
+                    SELECT s.action, st.key, st.value::float,
+                           s.label_count, s.query_count, s.bytes_out, s.create_date
+                      FROM kes_inspections_perf_sample s,
+                           jsonb_each_text(s.stages) st) m
+          GROUP BY m.action, m.stage
+        """
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+
+from . import test_benchmark_flows
+from . import test_label_zpl
+from . import test_query_budgets
+from . import test_rapport_consolide
+from . import test_upload_session
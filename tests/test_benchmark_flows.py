@@ -0,0 +1,96 @@
+# tests/test_benchmark_flows.py
+"""Parcours Odoo : génération et export des étiquettes (temps et requêtes SQL).
+
+Exclus des tests standard ; à lancer explicitement ::
+
+    odoo-bin -d <base> -u kes_inspections --test-tags benchmark --stop-after-init
+
+Les mesures sont comparées à ``benchmarks/baselines.json`` : nombres de
+requêtes strictement, durées avec le seuil. Sans référence, le test est
+ignoré (seule une régression mesurée le fait échouer) ; pour enregistrer les
+références sur la machine de référence, lancer la même commande avec
+``KES_BENCHMARK_SAVE_BASELINE=1``.
+"""
+import logging
+import os
+
+from odoo.tests import tagged
+from odoo.tests.common import TransactionCase
+
+from ..benchmarks.common import (DEFAULT_THRESHOLD, check_regressions, load_baselines, measure,
+                                 missing_baselines, save_baselines)
+
+_logger = logging.getLogger(__name__)
+
+COUNTS = (10, 100)
+
+
+@tagged('-standard', 'benchmark', 'post_install', '-at_install')
+class TestBenchmarkFlows(TransactionCase):
+
+    def _create_sous_affaire(self, count):
+        """Sous-affaire de test avec une ligne produit de ``count`` étiquettes"""
+        partner = self.env['res.partner'].create({'name': 'Client benchmark'})
+        employee = self.env['hr.employee'].create({'name': 'Chargé benchmark'})
+        affaire = self.env['kes_inspections.affaire'].create({
+            'client_id': partner.id,
+            'charge_affaire_id': employee.id,
+            'lieu_intervention': 'Site benchmark',
+        })
+        sous_affaire = self.env['kes_inspections.sous_affaire'].create({'affaire_id': affaire.id})
+        product = self.env['product.product'].create({'name': 'Vérification extincteur'})
+        self.env['kes_inspections.sous_affaire_produit'].create({
+            'sous_affaire_id': sous_affaire.id,
+            'product_id': product.id,
+            'nombre_etiquettes': count,
+        })
+        return sous_affaire
+
+    def _check_baseline(self, scenario, metrics):
+        """Compare ``metrics`` à la référence du scénario (ou l'enregistre)"""
+        _logger.info("%s : %s", scenario, metrics)
+        results = {scenario: metrics}
+        if os.environ.get('KES_BENCHMARK_SAVE_BASELINE'):
+            save_baselines(results)
+            return
+        baselines = load_baselines()
+        if missing_baselines(results, baselines):
+            self.skipTest(f"Aucune référence pour {scenario} : relancer avec KES_BENCHMARK_SAVE_BASELINE=1 "
+                          "sur la machine de référence")
+        regressions = check_regressions(results, baselines, DEFAULT_THRESHOLD)
+        self.assertFalse(regressions, f"Régression de performance : {regressions}")
+
+    def test_generer_etiquettes(self):
+        for count in COUNTS:
+            produit = self._create_sous_affaire(count).produit_etiquette_ids
+            _, duration, queries = measure(self.env, produit.generer_etiquettes)
+            self.assertEqual(len(produit.etiquette_ids), count)
+            self._check_baseline(f'flow.generer_etiquettes.{count}', {'total': duration, 'queries': queries})
+
+    def test_action_generer_toutes_etiquettes(self):
+        for count in COUNTS:
+            sous_affaire = self._create_sous_affaire(count)
+            sous_affaire.produit_etiquette_ids.generer_etiquettes()
+            # Régénération depuis la sous-affaire (les étiquettes existantes sont remplacées)
+            _, duration, queries = measure(self.env, sous_affaire.action_generer_toutes_etiquettes)
+            self.assertEqual(len(sous_affaire.etiquette_ids), count)
+            self._check_baseline(f'flow.action_generer_toutes_etiquettes.{count}',
+                                 {'total': duration, 'queries': queries})
+
+    def test_zip_export(self):
+        for count in COUNTS:
+            sous_affaire = self._create_sous_affaire(count)
+            sous_affaire.produit_etiquette_ids.generer_etiquettes()
+            etiquettes = sous_affaire.etiquette_ids
+
+            data, duration, queries = measure(self.env, etiquettes._render_zip_etiquettes)
+            self._check_baseline(f'flow.zip_export.{count}',
+                                 {'total': duration, 'queries': queries, 'zip_bytes': len(data)})
+
+            # Action complète : clé de cache, pièce jointe temporaire, puis réutilisation
+            _, duration, queries = measure(self.env, etiquettes.action_generate_zip_etiquettes)
+            self._check_baseline(f'flow.action_generate_zip_etiquettes.{count}',
+                                 {'total': duration, 'queries': queries})
+            _, duration, queries = measure(self.env, etiquettes.action_generate_zip_etiquettes)
+            self._check_baseline(f'flow.action_generate_zip_etiquettes.cached.{count}',
+                                 {'total': duration, 'queries': queries})
@@ -0,0 +1,167 @@
+# tests/test_label_zpl.py
+import io
+import socket
+import threading
+from unittest.mock import patch
+
+from PIL import Image
+
+from odoo.tests import tagged
+from odoo.tests.common import BaseCase
+
+from ..rendering import zpl
+from ..rendering.specs import LabelSpec, TemplateSpec, TextSpec
+
+
+class _Listener:
+    """Imprimante factice : écoute sur 127.0.0.1 et mémorise chaque travail reçu"""
+
+    def __init__(self):
+        self.payloads = []
+        self.server = socket.socket()
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen()
+        self.server.settimeout(0.2)
+        self.port = self.server.getsockname()[1]
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join(5)
+        self.server.close()
+        return False
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                connection, _address = self.server.accept()
+            except socket.timeout:
+                continue
+            with connection:
+                chunks = []
+                while chunk := connection.recv(65536):
+                    chunks.append(chunk)
+            self.payloads.append(b''.join(chunks).decode('utf-8'))
+
+    def wait(self, count):
+        """Attend ``count`` travaux complets (connexions fermées par l'émetteur)"""
+        for _attempt in range(50):
+            if len(self.payloads) >= count:
+                break
+            self._stop.wait(0.1)
+        return self.payloads
+
+
+def _closed_port():
+    """Port local sans écoute : la connexion y est refusée"""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+@tagged('post_install', '-at_install')
+class TestRawPrinterSpooler(BaseCase):
+
+    def _send(self, count, batch_size):
+        header = '~DGR:KES1.GRF,4,1,FF'
+        labels = [
+            zpl.zpl_label('R:KES1.GRF', (400, 200), (10, 10, 3, f'EQ/{index}'), (100, 20, 30, f'Client {index}'))
+            for index in range(count)
+        ]
+        with _Listener() as listener:
+            spooler = zpl.RawPrinterSpooler('127.0.0.1', listener.port, timeout=5, retries=0)
+            sent = spooler.send_batches(header, labels, batch_size)
+            payloads = listener.wait(-(-count // batch_size))
+        self.assertEqual(sent, count)
+        return payloads
+
+    def test_graphic_sent_once(self):
+        payloads = self._send(25, 10)
+        self.assertEqual(len(payloads), 3)
+        self.assertEqual(''.join(payloads).count('~DG'), 1)
+        self.assertTrue(payloads[0].startswith('~DG'))
+
+    def test_batches_split_between_labels(self):
+        payloads = self._send(25, 10)
+        for index, payload in enumerate(payloads):
+            body = payload.split('\n', 1)[1] if index == 0 else payload
+            self.assertTrue(body.startswith('^XA'))
+            self.assertTrue(body.endswith('^XZ'))
+            self.assertEqual(body.count('^XA'), body.count('^XZ'))
+        self.assertEqual(sum(payload.count('^XA') for payload in payloads), 25)
+
+    def test_retry_with_backoff(self):
+        delays = []
+        spooler = zpl.RawPrinterSpooler('127.0.0.1', _closed_port(), timeout=1, retries=2, backoff=0.5)
+        with patch.object(zpl.time, 'sleep', delays.append):
+            with self.assertRaises(OSError):
+                spooler.send('^XA^XZ')
+        self.assertEqual(delays, [0.5, 1.0])
+
+    def test_retry_then_delivered(self):
+        delays = []
+        create_connection = socket.create_connection
+        attempts = []
+
+        def flaky(*args, **kw):
+            attempts.append(args)
+            if len(attempts) == 1:
+                raise ConnectionRefusedError
+            return create_connection(*args, **kw)
+
+        with _Listener() as listener:
+            spooler = zpl.RawPrinterSpooler('127.0.0.1', listener.port, timeout=5, retries=1, backoff=0.25)
+            with patch.object(zpl.time, 'sleep', delays.append), \
+                    patch.object(zpl.socket, 'create_connection', flaky):
+                self.assertEqual(spooler.send('^XA^XZ'), 6)
+            payloads = listener.wait(1)
+        self.assertEqual(delays, [0.25])
+        self.assertEqual(payloads, ['^XA^XZ'])
+
+
+@tagged('post_install', '-at_install')
+class TestZplEncoding(BaseCase):
+
+    def test_compress_row(self):
+        self.assertEqual(zpl.zpl_compress_row('0000'), ',')
+        self.assertEqual(zpl.zpl_compress_row('FFFF'), 'JF')
+        self.assertEqual(zpl.zpl_compress_row('FF00'), 'FF,')
+        self.assertEqual(zpl.zpl_compress_row('A0A0'), 'A0A,')
+        self.assertEqual(zpl.zpl_compress_row('F' * 41), 'hGF')
+
+    def test_graphic_from_known_bitmap(self):
+        # 16 × 4 points : noire, noire (répétée), blanche, moitié gauche noire
+        img = Image.new('L', (16, 4), 255)
+        for x in range(16):
+            img.putpixel((x, 0), 0)
+            img.putpixel((x, 1), 0)
+        for x in range(8):
+            img.putpixel((x, 3), 0)
+        buffer = io.BytesIO()
+        img.save(buffer, format='PNG')
+        command, width, height = zpl.image_to_zpl_graphic(buffer.getvalue(), 16, 'R:T.GRF')
+        self.assertEqual((width, height), (16, 4))
+        name, byte_count, bytes_per_row, data = command.split(',', 3)
+        self.assertEqual(name, '~DGR:T.GRF')
+        self.assertEqual(int(byte_count), 8)
+        self.assertEqual(int(bytes_per_row), 2)
+        # JF : 4 × F ; « : » ligne identique à la précédente ; « , » fin de ligne à zéro
+        self.assertEqual(data, 'JF:,FF,')
+
+    def test_render_label_zpl(self):
+        template = TemplateSpec(image=b'', qr_x=100, qr_y=50, qr_size=290)
+        label = LabelSpec('EQ/1', texts=(TextSpec(200, 40, 'A^B', 20),))
+        label_zpl = zpl.render_label_zpl(template, label, 'R:KES1.GRF', (400, 200), 0.5, copies=2)
+        lines = label_zpl.split('\n')
+        self.assertEqual(lines[0], '^XA')
+        self.assertEqual(lines[-1], '^XZ')
+        self.assertIn('^FO0,0^XGR:KES1.GRF,1,1^FS', lines)
+        # QR version 1 : 21 modules + 2 × 4 de marge = 29 ; 290 × 0,5 / 29 = 5
+        self.assertIn('^FO50,25^BQN,2,5^FH_^FDLA,EQ/1^FS', lines)
+        self.assertIn('^FO100,20^A0N,10,10^FH_^FDA_5EB^FS', lines)
+        self.assertIn('^PQ2', lines)
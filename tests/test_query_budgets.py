@@ -0,0 +1,172 @@
+# tests/test_query_budgets.py
+"""Budgets de requêtes SQL des parcours principaux (détection des N+1).
+
+Chaque parcours est mesuré sur un petit volume, puis rejoué sur un volume
+plus grand sous ``assertQueryCount`` : le second ne peut pas dépasser le
+premier de plus de ``BUDGETS[parcours]`` requêtes par enregistrement
+supplémentaire. Un budget de 0 signifie que le nombre de requêtes ne dépend
+pas du volume : une requête par enregistrement (N+1) fait échouer le test.
+"""
+from lxml import etree
+
+from odoo.tests import tagged
+from odoo.tests.common import TransactionCase
+
+from ..benchmarks.common import measure
+
+# Requêtes supplémentaires tolérées par enregistrement supplémentaire
+BUDGETS = {
+    'sale_order.affaires': 0,
+    'sale_order.list': 0,
+    'sous_affaire.create': 0,
+    'etiquettes.generate': 0,
+    'affaire.list': 0,
+    'affaire.form': 0,
+    'inspecteur.planning': 0,
+}
+
+# Volumes (petit, grand) par parcours
+SIZES = {
+    'etiquettes.generate': (50, 500),
+}
+DEFAULT_SIZES = (5, 25)
+
+
+def _view_fields(model, view_type):
+    """Champs lus par le client web : ({champ}, {champ x2many: [sous-champs]})"""
+    arch = etree.fromstring(model.get_view(view_type=view_type)['arch'])
+    fields_top = set()
+    subfields = {}
+    for node in arch.iter('field'):
+        parent = node.getparent()
+        while parent is not None and parent.tag != 'field':
+            parent = parent.getparent()
+        if parent is None:
+            fields_top.add(node.get('name'))
+        else:
+            subfields.setdefault(parent.get('name'), set()).add(node.get('name'))
+    fields_top = {name for name in fields_top if name in model._fields}
+    return fields_top, subfields
+
+
+def _read_view(records, view_type):
+    """Lecture équivalente à l'ouverture d'une vue liste ou formulaire"""
+    fields_top, subfields = _view_fields(records, view_type)
+    records.read(list(fields_top))
+    for name, names in subfields.items():
+        if name in fields_top and records._fields[name].type in ('one2many', 'many2many'):
+            lines = records[name]
+            lines.read([sub for sub in names if sub in lines._fields])
+
+
+@tagged('post_install', '-at_install')
+class TestQueryBudgets(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner = cls.env['res.partner'].create({'name': 'Client budget SQL'})
+        department = cls.env['hr.department'].create({'name': 'INSPECTION'})
+        cls.employee = cls.env['hr.employee'].create({'name': 'Chargé budget SQL', 'department_id': department.id})
+        cls.category = cls.env['product.category'].create({'name': 'Inspection budget SQL'})
+        cls.product = cls.env['product.product'].create({
+            'name': 'Vérification extincteur',
+            'categ_id': cls.category.id,
+            'type': 'service',
+        })
+
+    def _orders(self, count):
+        return self.env['sale.order'].create([{
+            'partner_id': self.partner.id,
+            'department_id': self.category.id,
+            'order_line': [(0, 0, {'product_id': self.product.id, 'product_uom_qty': 1})],
+        } for _ in range(count)])
+
+    def _affaires(self, count):
+        return self.env['kes_inspections.affaire'].create([{
+            'client_id': self.partner.id,
+            'charge_affaire_id': self.employee.id,
+        } for _ in range(count)])
+
+    def _sous_affaires(self, affaire, count):
+        return self.env['kes_inspections.sous_affaire'].create([
+            {'affaire_id': affaire.id} for _ in range(count)
+        ])
+
+    def _prepare(self, name, count):
+        """Crée les données du parcours ``name`` ; retourne le parcours à mesurer"""
+        if name == 'sale_order.affaires':
+            orders = self._orders(count)
+            return lambda: self.env['kes_inspections.affaire']._create_from_sale_orders(orders)
+        if name == 'sale_order.list':
+            orders = self._orders(count)
+            orders.action_confirm()
+            return lambda: _read_view(orders, 'list')
+        if name == 'sous_affaire.create':
+            affaire = self._affaires(1)
+            return lambda: self._sous_affaires(affaire, count)
+        if name == 'etiquettes.generate':
+            sous_affaire = self._sous_affaires(self._affaires(1), 1)
+            produit = self.env['kes_inspections.sous_affaire_produit'].create({
+                'sous_affaire_id': sous_affaire.id,
+                'product_id': self.product.id,
+                'nombre_etiquettes': count,
+            })
+            return produit.generer_etiquettes
+        if name == 'affaire.list':
+            affaires = self._affaires(count)
+            for affaire in affaires:
+                self._sous_affaires(affaire, 2)
+            return lambda: _read_view(affaires, 'list')
+        if name == 'affaire.form':
+            affaire = self._affaires(1)
+            self._sous_affaires(affaire, count)
+            self.env['kes_inspections.equipement'].create([{
+                'name': f'Équipement {i}',
+                'affaire_id': affaire.id,
+                'type_equipement': 'verification_extincteur',
+            } for i in range(count)])
+            return lambda: _read_view(affaire, 'form')
+        if name == 'inspecteur.planning':
+            employees = self.env['hr.employee'].create([{'name': f'Inspecteur {i}'} for i in range(count)])
+            inspecteurs = self.env['kes_inspections.inspecteur'].create([
+                {'employee_id': employee.id} for employee in employees
+            ])
+            sous_affaires = self._sous_affaires(self._affaires(1), count)
+            self.env['kes_inspections.sous_affaire_inspecteur'].create([{
+                'sous_affaire_id': sous_affaire.id,
+                'inspecteur_id': employee.id,
+                'role': 'site_rapport',
+            } for sous_affaire, employee in zip(sous_affaires, employees)])
+            return lambda: _read_view(inspecteurs, 'list')
+        raise ValueError(f"Parcours inconnu : {name}")
+
+    def _assert_budget(self, name):
+        small, large = SIZES.get(name, DEFAULT_SIZES)
+        queries_small = measure(self.env, self._prepare(name, small))[2]
+        flow = self._prepare(name, large)
+        self.env.flush_all()
+        self.env.invalidate_all()
+        with self.assertQueryCount(queries_small + BUDGETS[name] * (large - small)):
+            flow()
+
+    def test_sale_order_affaires(self):
+        self._assert_budget('sale_order.affaires')
+
+    def test_sale_order_list(self):
+        self._assert_budget('sale_order.list')
+
+    def test_sous_affaire_create(self):
+        self._assert_budget('sous_affaire.create')
+
+    def test_etiquettes_generate(self):
+        self._assert_budget('etiquettes.generate')
+
+    def test_affaire_list(self):
+        self._assert_budget('affaire.list')
+
+    def test_affaire_form(self):
+        self._assert_budget('affaire.form')
+
+    def test_inspecteur_planning(self):
+        self._assert_budget('inspecteur.planning')
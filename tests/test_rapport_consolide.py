@@ -0,0 +1,54 @@
+# tests/test_rapport_consolide.py
+import base64
+import io
+
+from odoo.tests import tagged
+from odoo.tests.common import TransactionCase
+from odoo.tools.pdf import PdfFileReader
+
+
+def _page_text(page):
+    return page.extract_text() if hasattr(page, 'extract_text') else page.extractText()
+
+
+def _small_pdf(text):
+    """PDF d'une page portant ``text``"""
+    from reportlab.pdfgen import canvas
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    pdf.drawString(100, 700, text)
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+@tagged('post_install', '-at_install')
+class TestRapportConsolide(TransactionCase):
+
+    def test_merge_two_reports(self):
+        partner = self.env['res.partner'].create({'name': 'Client consolidé'})
+        employee = self.env['hr.employee'].create({'name': 'Chargé consolidé'})
+        affaire = self.env['kes_inspections.affaire'].create({
+            'client_id': partner.id,
+            'charge_affaire_id': employee.id,
+        })
+        sous_affaire = self.env['kes_inspections.sous_affaire'].create({'affaire_id': affaire.id})
+        self.env['kes_inspections.rapport'].create([{
+            'name': name,
+            'filename': f'{name}.pdf',
+            'file': base64.b64encode(_small_pdf(f'Contenu {name}')),
+            'sous_affaire_id': sous_affaire.id,
+        } for name in ('rapport_a', 'rapport_b')])
+
+        sous_affaire._generer_rapport_consolide()
+
+        self.assertTrue(sous_affaire.rapport_consolide)
+        reader = PdfFileReader(io.BytesIO(base64.b64decode(sous_affaire.rapport_consolide)), strict=False)
+        pages = [_page_text(page) for page in reader.pages]
+        # Garde, sommaire, puis une page par rapport dans l'ordre
+        self.assertEqual(len(pages), 4)
+        self.assertIn(sous_affaire.name, pages[0])
+        self.assertIn('rapport_a.pdf', pages[1])
+        self.assertIn('rapport_b.pdf', pages[1])
+        self.assertIn('Contenu rapport_a', pages[2])
+        self.assertIn('Contenu rapport_b', pages[3])
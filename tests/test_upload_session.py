@@ -0,0 +1,46 @@
+# tests/test_upload_session.py
+import base64
+import hashlib
+import io
+
+from odoo.tests import tagged
+from odoo.tests.common import TransactionCase
+
+
+@tagged('post_install', '-at_install')
+class TestUploadSession(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        partner = cls.env['res.partner'].create({'name': 'Client téléversement'})
+        employee = cls.env['hr.employee'].create({'name': 'Chargé téléversement'})
+        affaire = cls.env['kes_inspections.affaire'].create({
+            'client_id': partner.id,
+            'charge_affaire_id': employee.id,
+        })
+        cls.sous_affaire = cls.env['kes_inspections.sous_affaire'].create({'affaire_id': affaire.id})
+
+    def test_chunked_upload_with_resent_chunk(self):
+        data = b'%PDF-1.4\n' + bytes(range(256)) * 40 + b'\n%%EOF\n'
+        first, second = data[:4096], data[4096:]
+        session = self.env['kes_inspections.upload.session'].create({
+            'filename': 'thermographie.pdf',
+            'total_size': len(data),
+            'checksum': hashlib.sha1(data).hexdigest(),
+            'target_model': 'kes_inspections.rapport',
+            'sous_affaire_id': self.sous_affaire.id,
+        })
+
+        self.assertEqual(session.write_chunk(0, io.BytesIO(first)), len(first))
+        self.assertEqual(session.write_chunk(len(first), io.BytesIO(second)), len(data))
+        # Premier morceau réémis après une coupure : rien n'est perdu
+        self.assertEqual(session.write_chunk(0, io.BytesIO(first)), len(data))
+        self.assertEqual(session.received_size, len(data))
+
+        rapport = self.env['kes_inspections.rapport'].browse(session.finish())
+        self.assertEqual(session.state, 'done')
+        self.assertEqual(base64.b64decode(rapport.file), data)
+        self.assertEqual(rapport.file_checksum, hashlib.sha1(data).hexdigest())
+        attachment = rapport._get_document_attachments()
+        self.assertEqual(attachment.file_size, len(data))